@@ -0,0 +1,225 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_HISTORY_FILE = "audit_benchmark_history.json"
+DEFAULT_BUCKETS = [10, 100]
+DEFAULT_OBJECTS = [100, 1000]
+DEFAULT_LATENCY_MS = 10.0
+# Slower than this fraction against the previous run of the same scenario is flagged.
+REGRESSION_THRESHOLD = 0.10
+TARGETS = ["audit_by_profile", "audit"]
+PROFILE_NAME = "bench"
+
+# ---- 1. Scenario Execution (runs in a fresh process) ----
+
+def _prepare_environment(work_dir):
+    credentials_path = os.path.join(work_dir, "credentials")
+    with open(credentials_path, 'w', encoding='utf-8') as f:
+        f.write("[{}]\naws_access_key_id = bench\naws_secret_access_key = bench\n".format(PROFILE_NAME))
+
+    os.environ.update({
+        "AWS_SHARED_CREDENTIALS_FILE": credentials_path,
+        "AWS_CONFIG_FILE": os.path.join(work_dir, "config"),
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "AWS_EC2_METADATA_DISABLED": "true"
+    })
+    os.chdir(work_dir)
+
+def _run_target(scenario, work_dir):
+    region_cache = os.path.join(work_dir, "regions.json")
+
+    if scenario["target"] == "audit":
+        from scripts.bucket_s3 import audit
+
+        audit.output_file = os.path.join(work_dir, "audit_report.json")
+        audit.listing_mode = scenario["listing_mode"]
+        audit.list_workers = scenario["list_workers"]
+        audit.report_format = scenario["report_format"]
+        audit.region_cache = region_cache
+        audit.audit_run(scenario["check_workers"])
+        return None
+
+    from scripts.bucket_s3.audit_by_profile import audit_options, audit_run
+
+    options = audit_options(
+        check_workers=scenario["check_workers"],
+        listing_mode=scenario["listing_mode"],
+        list_workers=scenario["list_workers"],
+        report_format=scenario["report_format"],
+        region_cache=region_cache
+    )
+    return audit_run(PROFILE_NAME, options)
+
+def run_scenario(scenario):
+    """
+    Runs ´audit_run´ end to end against the fake S3 and returns the measurements.
+    Meant to run in its own process, so the peak RSS belongs to this scenario only.
+    """
+    with tempfile.TemporaryDirectory(prefix="audit_bench_") as work_dir:
+        _prepare_environment(work_dir)
+
+        from benchmarks.fake_s3 import install_fake_s3, new_fake_account
+        account = new_fake_account(scenario["buckets"], scenario["objects"], scenario["seed"])
+        stats = install_fake_s3(account, scenario["latency_ms"], scenario["list_latency_ms"], scenario["seed"])
+
+        # The audit output is not part of the measurement.
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        started = time.perf_counter()
+        try:
+            summary = _run_target(scenario, work_dir)
+        finally:
+            wall_time = time.perf_counter() - started
+            sys.stdout.close()
+            sys.stdout = stdout
+
+        calls = dict(sorted(stats["calls"].items()))
+        return {
+            "wall_time_seconds": round(wall_time, 3),
+            # ru_maxrss is in KiB on Linux.
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "total_calls": sum(calls.values()),
+            "calls": calls,
+            "status": summary["STATUS"] if summary else "OK"
+        }
+
+def _scenario_worker(scenario, queue):
+    try:
+        queue.put({"result": run_scenario(scenario)})
+    except Exception as e:
+        queue.put({"error": "{}: {}".format(type(e).__name__, e)})
+
+def run_isolated(scenario):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_scenario_worker, args=(scenario, queue))
+    process.start()
+    outcome = queue.get()
+    process.join()
+    if "error" in outcome:
+        raise RuntimeError(outcome["error"])
+    return outcome["result"]
+
+# ---- 2. History File ----
+
+def scenario_key(scenario):
+    """Scenarios with the same key are compared with each other across runs"""
+    return "{target}:{buckets}x{objects}:{listing_mode}:cw{check_workers}:lw{list_workers}:{report_format}:{latency_ms}ms/{list_latency_ms}ms".format(**scenario)
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def load_history(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+def previous_result(history, key):
+    for entry in reversed(history):
+        if entry["scenario_key"] == key:
+            return entry
+    return None
+
+def append_history(path, entries):
+    history = load_history(path)
+    history.extend(entries)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=4, ensure_ascii=False)
+
+def compare_with_previous(entry, previous):
+    """
+    Returns a one-line comparison with the previous run of the scenario, flagging regressions.
+    """
+    if previous is None:
+        return "first run"
+    before, after = previous["metrics"]["wall_time_seconds"], entry["metrics"]["wall_time_seconds"]
+    change = (after - before) / before if before else 0.0
+    flag = "  <-- REGRESSION" if change > REGRESSION_THRESHOLD else ""
+    calls = entry["metrics"]["total_calls"] - previous["metrics"]["total_calls"]
+    return "{:+.1%} wall time vs {} ({}), {:+d} calls{}".format(change, previous["commit"], previous["timestamp"], calls, flag)
+
+# ---- 3. Main Execution ----
+
+def build_scenarios(args):
+    return [
+        {
+            "target": args.target,
+            "buckets": buckets,
+            "objects": objects,
+            "listing_mode": args.listing_mode,
+            "check_workers": args.check_workers,
+            "list_workers": args.list_workers,
+            "report_format": args.report_format,
+            "latency_ms": args.latency_ms,
+            "list_latency_ms": args.list_latency_ms if args.list_latency_ms is not None else args.latency_ms,
+            "seed": args.seed
+        }
+        for buckets in args.buckets
+        for objects in args.objects
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the S3 audit end to end against an in-process fake S3.")
+    parser.add_argument("--target", choices=TARGETS, default="audit_by_profile", help="Audit script to run (default: audit_by_profile).")
+    parser.add_argument("--buckets", type=int, nargs="+", default=DEFAULT_BUCKETS, help="Bucket counts of the synthetic accounts.")
+    parser.add_argument("--objects", type=int, nargs="+", default=DEFAULT_OBJECTS, help="Objects per bucket of the synthetic accounts.")
+    parser.add_argument("--listing-mode", choices=["full", "stream", "inventory"], default="full")
+    parser.add_argument("--check-workers", type=int, default=16)
+    parser.add_argument("--list-workers", type=int, default=1)
+    parser.add_argument("--report-format", choices=["json", "ndjson", "ndjson.gz"], default="json")
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS, help="Injected latency of each API call (default: {}).".format(DEFAULT_LATENCY_MS))
+    parser.add_argument("--list-latency-ms", type=float, help="Injected latency of listing calls (default: same as --latency-ms).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--history", default=DEFAULT_HISTORY_FILE, help="JSON history file (default: {}).".format(DEFAULT_HISTORY_FILE))
+    args = parser.parse_args(argv)
+
+    history_path = os.path.abspath(args.history)
+    history = load_history(history_path)
+    commit = _git_commit()
+    entries = []
+
+    for scenario in build_scenarios(args):
+        key = scenario_key(scenario)
+        print("Running {} ...".format(key))
+        metrics = run_isolated(scenario)
+
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "scenario_key": key,
+            "scenario": scenario,
+            "metrics": metrics
+        }
+        print("\t{:.3f}s, {} calls, {} MB peak RSS: {}".format(
+            metrics["wall_time_seconds"], metrics["total_calls"], metrics["peak_rss_mb"],
+            compare_with_previous(entry, previous_result(history, key))
+        ))
+        entries.append(entry)
+
+    append_history(history_path, entries)
+    print("\nResults appended to '{}'".format(history_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import bisect
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, quote, urlsplit
+from xml.sax.saxutils import escape
+import botocore.session
+from botocore.awsrequest import AWSResponse
+
+# ---- Initialization and Global Variables ----
+
+ACCOUNT_ID = "123456789012"
+S3_NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+REGIONS = ["us-east-1", "us-east-2", "sa-east-1", "eu-west-1"]
+# Bucket Public Access Block settings: None means "not configured".
+PAB_SETTINGS = [None, True, False, "partial"]
+OBJECTS_PER_CUSTOMER = 100
+MAX_CUSTOMERS = 20
+BASE_LAST_MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+LAST_MODIFIED_VALUES = [
+    (BASE_LAST_MODIFIED + timedelta(days=day)).strftime("%Y-%m-%dT%H:%M:%S.000Z") for day in range(365)
+]
+
+# ---- 1. Synthetic Account ----
+
+def new_fake_account(buckets, objects, seed=42, website_ratio=0.3, account_pab=None, bucket_region_in_listing=True):
+    """
+    Returns a synthetic account with ´buckets´ buckets of ´objects´ objects each.
+
+    Objects are not stored: their keys (´clientes/cliente-NNN/obj-NNNNNNN.dat´), sizes
+    and dates are derived from their index, so the stand-in itself uses almost no memory.
+    """
+    rng = random.Random(seed)
+    return {
+        "account_pab": account_pab,
+        "bucket_region_in_listing": bucket_region_in_listing,
+        "buckets": {
+            "bench-bucket-{:05d}".format(i): {
+                "pab": rng.choice(PAB_SETTINGS),
+                "website": rng.random() < website_ratio,
+                "region": rng.choice(REGIONS),
+                "objects": objects
+            }
+            for i in range(buckets)
+        }
+    }
+
+def _customers(bucket):
+    return max(1, min(MAX_CUSTOMERS, -(-bucket["objects"] // OBJECTS_PER_CUSTOMER)))
+
+def _object_key(bucket, index):
+    per_customer = -(-bucket["objects"] // _customers(bucket))
+    return "clientes/cliente-{:03d}/obj-{:07d}.dat".format(index // per_customer, index % per_customer)
+
+def _object_entry(bucket, index):
+    return {
+        "Key": _object_key(bucket, index),
+        "Size": (index * 2654435761) % (8 * 1024 ** 2),
+        "LastModified": LAST_MODIFIED_VALUES[index % 365],
+        "StorageClass": "STANDARD" if index % 7 else "STANDARD_IA"
+    }
+
+def _first_index(bucket, key):
+    """Index of the first object whose key is >= ´key´ (keys are in index order)"""
+    return bisect.bisect_left(range(bucket["objects"]), key, key=lambda index: _object_key(bucket, index))
+
+# ---- 2. Responses ----
+
+def _xml(body, status=200):
+    return status, '<?xml version="1.0" encoding="UTF-8"?>\n' + body
+
+def _error(code, status):
+    return _xml("<Error><Code>{0}</Code><Message>{0}</Message><RequestId>bench</RequestId></Error>".format(code), status)
+
+def _pab_xml(setting):
+    flags = [setting is True] * 4 if setting != "partial" else [True, True, False, False]
+    names = ["BlockPublicAcls", "IgnorePublicAcls", "BlockPublicPolicy", "RestrictPublicBuckets"]
+    return '<PublicAccessBlockConfiguration xmlns="{}">{}</PublicAccessBlockConfiguration>'.format(
+        S3_NAMESPACE, "".join("<{0}>{1}</{0}>".format(name, str(flag).lower()) for name, flag in zip(names, flags))
+    )
+
+def _contents_xml(entries):
+    return "".join(
+        "<Contents><Key>{}</Key><LastModified>{}</LastModified><ETag>\"{:032x}\"</ETag><Size>{}</Size><StorageClass>{}</StorageClass></Contents>".format(
+            quote(entry["Key"], safe="/"), entry["LastModified"],
+            entry["Size"], entry["Size"], entry["StorageClass"]
+        ) for entry in entries
+    )
+
+def _list_objects(bucket_name, bucket, query, version):
+    prefix = query.get("prefix", "")
+    delimiter = query.get("delimiter")
+    max_keys = int(query.get("max-keys", 1000))
+    start_after = query.get("continuation-token") or query.get("start-after") or query.get("marker") or ""
+
+    index = _first_index(bucket, max(prefix, start_after))
+    if start_after and index < bucket["objects"] and _object_key(bucket, index) == start_after:
+        index += 1
+
+    entries, common_prefixes, last_key = [], [], None
+    while index < bucket["objects"] and len(entries) + len(common_prefixes) < max_keys:
+        key = _object_key(bucket, index)
+        if not key.startswith(prefix):
+            break
+        rest = key[len(prefix):]
+        if delimiter and delimiter in rest:
+            common_prefix = prefix + rest.split(delimiter, 1)[0] + delimiter
+            common_prefixes.append(common_prefix)
+            last_key = common_prefix
+            # Jump past every key of the common prefix.
+            index = _first_index(bucket, common_prefix[:-1] + chr(ord(delimiter[-1]) + 1))
+            continue
+        entries.append(_object_entry(bucket, index))
+        last_key = key
+        index += 1
+
+    truncated = index < bucket["objects"] and _object_key(bucket, index).startswith(prefix)
+    parts = [
+        '<ListBucketResult xmlns="{}">'.format(S3_NAMESPACE),
+        "<Name>{}</Name><Prefix>{}</Prefix><MaxKeys>{}</MaxKeys>".format(bucket_name, escape(prefix), max_keys),
+        "<IsTruncated>{}</IsTruncated>".format(str(truncated).lower()),
+        "<EncodingType>url</EncodingType>"
+    ]
+    if delimiter:
+        parts.append("<Delimiter>{}</Delimiter>".format(escape(delimiter)))
+    if version == 2:
+        parts.append("<KeyCount>{}</KeyCount>".format(len(entries) + len(common_prefixes)))
+        if truncated:
+            parts.append("<NextContinuationToken>{}</NextContinuationToken>".format(escape(last_key)))
+    elif truncated:
+        parts.append("<NextMarker>{}</NextMarker>".format(quote(last_key, safe="/")))
+    parts.append(_contents_xml(entries))
+    parts.append("".join("<CommonPrefixes><Prefix>{}</Prefix></CommonPrefixes>".format(quote(p, safe="/")) for p in common_prefixes))
+    parts.append("</ListBucketResult>")
+    return _xml("".join(parts))
+
+def _s3_response(account, operation, bucket_name, query):
+    if operation == "ListBuckets":
+        entries = "".join(
+            "<Bucket><Name>{}</Name><CreationDate>2020-01-01T00:00:00.000Z</CreationDate>{}</Bucket>".format(
+                name, "<BucketRegion>{}</BucketRegion>".format(bucket["region"]) if account["bucket_region_in_listing"] else ""
+            ) for name, bucket in sorted(account["buckets"].items())
+        )
+        return _xml('<ListAllMyBucketsResult xmlns="{}"><Owner><ID>bench</ID></Owner><Buckets>{}</Buckets></ListAllMyBucketsResult>'.format(S3_NAMESPACE, entries))
+
+    bucket = account["buckets"].get(bucket_name)
+    if bucket is None:
+        return _error("NoSuchBucket", 404)
+
+    if operation == "GetBucketLocation":
+        location = "" if bucket["region"] == "us-east-1" else bucket["region"]
+        return _xml('<LocationConstraint xmlns="{}">{}</LocationConstraint>'.format(S3_NAMESPACE, location))
+    if operation == "GetPublicAccessBlock":
+        if bucket["pab"] is None:
+            return _error("NoSuchPublicAccessBlockConfiguration", 404)
+        return _xml(_pab_xml(bucket["pab"]))
+    if operation == "GetBucketWebsite":
+        if not bucket["website"]:
+            return _error("NoSuchWebsiteConfiguration", 404)
+        return _xml('<WebsiteConfiguration xmlns="{}"><IndexDocument><Suffix>index.html</Suffix></IndexDocument></WebsiteConfiguration>'.format(S3_NAMESPACE))
+    if operation == "ListBucketInventoryConfigurations":
+        return _xml('<ListInventoryConfigurationsResult xmlns="{}"><IsTruncated>false</IsTruncated></ListInventoryConfigurationsResult>'.format(S3_NAMESPACE))
+    if operation == "ListObjects":
+        return _list_objects(bucket_name, bucket, query, 1)
+    if operation == "ListObjectsV2":
+        return _list_objects(bucket_name, bucket, query, 2)
+    return _error("NotImplemented", 501)
+
+def _respond(account, service_name, operation, request):
+    if service_name == "sts" and operation == "GetCallerIdentity":
+        return _xml(
+            '<GetCallerIdentityResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/"><GetCallerIdentityResult>'
+            "<Arn>arn:aws:iam::{0}:user/bench</Arn><UserId>BENCH</UserId><Account>{0}</Account>"
+            "</GetCallerIdentityResult><ResponseMetadata><RequestId>bench</RequestId></ResponseMetadata></GetCallerIdentityResponse>".format(ACCOUNT_ID)
+        )
+    if service_name == "s3-control" and operation == "GetPublicAccessBlock":
+        if account["account_pab"] is None:
+            return _error("NoSuchPublicAccessBlockConfiguration", 404)
+        return _xml(_pab_xml(account["account_pab"]))
+    if service_name == "s3":
+        url = urlsplit(request.url)
+        query = {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+        path = url.path.lstrip("/")
+        # Virtual-hosted style (bucket.s3.<region>.amazonaws.com) or path style (s3.<region>.amazonaws.com/bucket).
+        bucket_name = url.hostname.split(".s3")[0] if not url.hostname.startswith("s3") else path.split("/")[0]
+        return _s3_response(account, operation, bucket_name, query)
+    return _error("NotImplemented", 501)
+
+# ---- 3. Stand-in Installation ----
+
+class _Raw:
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **kwargs):
+        yield self._body
+
+def install_fake_s3(account, latency_ms=0.0, list_latency_ms=None, seed=42):
+    """
+    Answers every AWS call made by clients created from now on with the synthetic
+    account, after sleeping the injected latency. Calls are answered right before they
+    would go on the wire, so serialization, signing, retries and parsing still run.
+
+    Returns the stats of the stand-in: ´{"calls": {"s3.ListObjectsV2": n, ...}}´.
+    """
+    stats = {"calls": {}, "lock": threading.Lock()}
+    rng = random.Random(seed)
+    list_latency_ms = latency_ms if list_latency_ms is None else list_latency_ms
+
+    def fake_endpoint(request, event_name=None, **kwargs):
+        _, service_name, operation = event_name.split(".", 2)
+        with stats["lock"]:
+            name = "{}.{}".format(service_name, operation)
+            stats["calls"][name] = stats["calls"].get(name, 0) + 1
+            # Up to +-20% jitter around the configured latency.
+            jitter = 0.8 + 0.4 * rng.random()
+
+        delay = list_latency_ms if operation.startswith("ListObjects") else latency_ms
+        if delay:
+            time.sleep(delay * jitter / 1000.0)
+
+        status, body = _respond(account, service_name, operation, request)
+        return AWSResponse(request.url, status, {"Content-Type": "application/xml"}, _Raw(body.encode("utf-8")))
+
+    original_create_client = botocore.session.Session.create_client
+
+    def create_client(self, *args, **kwargs):
+        client = original_create_client(self, *args, **kwargs)
+        # Registered last, so the rate-control handlers still run before every attempt.
+        client.meta.events.register("before-send", fake_endpoint, unique_id="bench-fake-s3")
+        return client
+
+    botocore.session.Session.create_client = create_client
+    return stats
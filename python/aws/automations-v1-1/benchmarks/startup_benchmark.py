@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# ---- Initialization and Global Variables ----
+
+# Importing main.py (the menu) must stay under this budget.
+STARTUP_TARGET_SECONDS = 0.05
+DEFAULT_RUNS = 5
+HEAVY_MODULES = ["boto3", "botocore"]
+
+# Runs in a fresh interpreter: imports main and reports what it cost.
+PROBE = """
+import json, os, sys, time
+
+opened = []
+watched = (os.environ["AWS_SHARED_CREDENTIALS_FILE"], os.environ["AWS_CONFIG_FILE"])
+
+def audit(event, args):
+    if event == "open" and isinstance(args[0], str) and args[0] in watched:
+        opened.append(args[0])
+
+sys.addaudithook(audit)
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_seconds": elapsed,
+    "loaded_modules": [name for name in %r if name in sys.modules],
+    "credential_files_opened": opened
+}))
+"""
+
+# ---- 1. Measurement ----
+
+def measure_startup(project_dir):
+    """
+    Imports ´main´ in a fresh interpreter with credential files that do not exist,
+    and returns the import time, the heavy modules loaded and the credential files opened.
+    """
+    with tempfile.TemporaryDirectory(prefix="startup_bench_") as work_dir:
+        env = dict(os.environ)
+        env.update({
+            "AWS_SHARED_CREDENTIALS_FILE": os.path.join(work_dir, "credentials"),
+            "AWS_CONFIG_FILE": os.path.join(work_dir, "config"),
+            "PYTHONDONTWRITEBYTECODE": "1"
+        })
+        for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN", "AWS_PROFILE"):
+            env.pop(name, None)
+
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE % (HEAVY_MODULES,)],
+            cwd=project_dir, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            # e.g. a module building a client at import time with no region/credentials configured
+            return {"error": (result.stderr.strip().splitlines() or ["exit code {}".format(result.returncode)])[-1]}
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+def check_startup(project_dir, runs=DEFAULT_RUNS, target=STARTUP_TARGET_SECONDS):
+    """
+    Returns ´(ok, report)´: ´main´ must import without errors, the best import time of
+    ´runs´ must be under ´target´ and no run may load boto3/botocore or open a credentials file.
+    """
+    measurements = [measure_startup(project_dir) for _ in range(runs)]
+    errors = sorted({m["error"] for m in measurements if "error" in m})
+    if errors:
+        return False, {"errors": errors, "target_seconds": target}
+
+    best = min(m["import_seconds"] for m in measurements)
+    loaded = sorted({name for m in measurements for name in m["loaded_modules"]})
+    opened = sorted({path for m in measurements for path in m["credential_files_opened"]})
+
+    report = {
+        "best_import_seconds": round(best, 4),
+        "target_seconds": target,
+        "loaded_heavy_modules": loaded,
+        "credential_files_opened": opened
+    }
+    return best < target and not loaded and not opened, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checks that main.py starts fast and without touching AWS credentials.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Number of fresh interpreters to measure (default: {}).".format(DEFAULT_RUNS))
+    parser.add_argument("--target", type=float, default=STARTUP_TARGET_SECONDS,
+                        help="Maximum import time of main.py in seconds (default: {}).".format(STARTUP_TARGET_SECONDS))
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ok, report = check_startup(project_dir, args.runs, args.target)
+    print(json.dumps(report, indent=4))
+    print("OK" if ok else "FAILED: main.py startup is over target or touched boto3/credentials")
+    sys.exit(0 if ok else 1)
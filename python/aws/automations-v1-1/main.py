@@ -1,7 +1,5 @@
-from scripts.iam.policy.create_policies_s3 import main as main_policy
-from scripts.iam.role.create_role import main as main_role
-from scripts.bucket_s3.management_bucket import main as main_bucket
-from scripts.transfer_family.manager_server import main as main_transfer_family
+# Subsystems are imported when their option is chosen, so the menu starts without
+# loading boto3 or resolving credentials (see benchmarks/startup_benchmark.py).
 
 def show_menu():
     menu = """
@@ -23,12 +21,16 @@ def show_menu():
 def handler_management_choice(choice):
     match choice:
         case '1':
+            from scripts.bucket_s3.management_bucket import main as main_bucket
             main_bucket()
         case '2':
+            from scripts.iam.policy.create_policies_s3 import main as main_policy
             main_policy()
         case '3':
+            from scripts.iam.role.create_role import main as main_role
             main_role()
         case '4':
+            from scripts.transfer_family.manager_server import main as main_transfer_family
             main_transfer_family()
         case '5':
             pass
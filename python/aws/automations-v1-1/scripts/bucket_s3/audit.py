@@ -1,18 +1,55 @@
-import boto3
 import json
-from botocore.exceptions import ClientError
+from scripts.bucket_s3.bucket_checks import run_bucket_check_set
+from scripts.bucket_s3.check_executor import (
+    DEFAULT_CHECK_WORKERS,
+    create_thread_clients,
+    iter_bucket_checks,
+    run_bucket_checks,
+    thread_client
+)
+from scripts.bucket_s3.inventory import DEFAULT_INVENTORY_WORKERS, bucket_object_stats
+from scripts.bucket_s3.object_stats import (
+    DEFAULT_SAMPLE_SIZE,
+    object_stats_report
+)
+from scripts.bucket_s3.parallel_listing import DEFAULT_LIST_WORKERS, parallel_list_keys, parallel_object_stats
+from scripts.bucket_s3.public_access import (
+    get_account_public_access_block,
+    is_fully_blocked
+)
+from scripts.bucket_s3.region_pool import (
+    DEFAULT_REGION_CACHE,
+    bucket_client,
+    bucket_resource,
+    resolve_bucket_regions
+)
+from scripts.bucket_s3.report_sink import close_report_sink, open_report_sink, write_report_record
 
 output_file = "audit_report.json"
-
-s3_client = boto3.client('s3')
-s3_resource = boto3.resource('s3')
-sts_client = boto3.client('sts')
+# "full" keeps every object key, "stream" keeps statistics and a bounded key sample,
+# "inventory" reads the statistics from S3 Inventory when the bucket has one configured
+listing_mode = "full"
+sample_size = DEFAULT_SAMPLE_SIZE
+inventory_workers = DEFAULT_INVENTORY_WORKERS
+# > 1 splits each listing by key prefix (e.g. ´clientes/<cliente>/´) and lists the shards concurrently
+list_workers = DEFAULT_LIST_WORKERS
+# "json" writes output_file at the end, "ndjson" / "ndjson.gz" write each bucket as soon as it is analyzed
+report_format = "json"
+region_cache = DEFAULT_REGION_CACHE
+# registry checks (scripts/bucket_s3/bucket_checks.py) added to the details of each risk bucket,
+# e.g. ["policy_public", "acl_public_grants", "default_encryption", "versioning"]
+extra_checks = []
+
+# Clients are created on first use, by the thread that needs them.
+clients = create_thread_clients()
 
 
 buckets = []
+account_public_access_block = None
 
 def get_account_info():
     try:
+        sts_client = thread_client(clients, 'sts')
         response = sts_client.get_caller_identity()
         account_id = response['Account']
         account_username = response['Arn'].split('/')[1]
@@ -25,17 +62,20 @@ def get_account_info():
 def list_buckets():
     global buckets
     try:
+        s3_client = thread_client(clients, 's3')
         response = s3_client.list_buckets()
         buckets = response['Buckets']
 
         print(f"Total de buckets encontrados: {len(buckets)}")
+        # Per-bucket calls go straight to the bucket's regional endpoint.
+        clients["bucket_regions"] = resolve_bucket_regions(s3_client, buckets, region_cache)
 
     except Exception as e:
         print(f"Error listing buckets: {e}")
 
 def list_objects(bucket):
     objects = []
-    global s3_resource
+    s3_resource = bucket_resource(clients, bucket)
     try:
         bucket = s3_resource.Bucket(bucket)
         
@@ -46,82 +86,116 @@ def list_objects(bucket):
 
     except Exception as e:
         print(f"Error listing objects in bucket '{bucket}': {e}")
-    return objects
+    return len(objects), objects
 
 
 def _check_public_acess_logic(bucket):
-    try:
-        response = s3_client.get_public_access_block(
-            Bucket=bucket
-        )
-        config = response['PublicAccessBlockConfiguration']
-
-        blocked = (config['BlockPublicAcls'] and 
-            config['IgnorePublicAcls'] and 
-            config['BlockPublicPolicy'] and 
-            config['RestrictPublicBuckets'])
-        
-        return not blocked
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchPublicAccessBlockConfiguration':
-            return True
-        return False
+    # S3 enforces a flag when either the account or the bucket enables it
+    context = {"account_config": account_public_access_block}
+    return run_bucket_check_set(bucket_client(clients, bucket), bucket, ["public_access"], context)["public_access"]
 
 def _check_static_website(bucket):
-    try:
-        s3_client.get_bucket_website(
-            Bucket=bucket
-        )
-        return True
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchWebsiteConfiguration':
-            return False
-        return False
+    return run_bucket_check_set(bucket_client(clients, bucket), bucket, ["static_website"])["static_website"]
+
 
+def check_public_acess(max_workers=DEFAULT_CHECK_WORKERS):
+    if is_fully_blocked(account_public_access_block):
+        print("Account-level Public Access Block is fully enabled, skipping bucket checks.")
+        return []
+
+    bucket_names = [b['Name'] for b in buckets]
+    results = run_bucket_checks(_check_public_acess_logic, bucket_names, max_workers)
 
-def check_public_acess():
     public_buckets = []
-    for b in buckets:
-        bucket_name = b['Name']
-        if _check_public_acess_logic(bucket_name):
+    for bucket_name, is_public in zip(bucket_names, results):
+        if is_public:
             public_buckets.append(bucket_name)
     return public_buckets
 
-def generate_report(public_buckets):
-    details = []
-    for bucket_name in public_buckets:
-        print(f"  - Analyzing bucket: {bucket_name}")
-        static_website_status = _check_static_website(bucket_name)
+def _analyze_bucket(bucket_name):
+    print(f"  - Analyzing bucket: {bucket_name}")
+    # the extra checks share the pass (and the concurrent API calls) of the static website check
+    check_results = run_bucket_check_set(bucket_client(clients, bucket_name), bucket_name, ["static_website"] + extra_checks)
+
+    details = {
+        'bucket_name': bucket_name,
+        'public_access': True,
+        'static_website': check_results.pop("static_website")
+    }
+    if extra_checks:
+        details['checks'] = check_results
+
+    if listing_mode in ("stream", "inventory"):
+        s3_client = bucket_client(clients, bucket_name)
+        if listing_mode == "inventory":
+            stats, source = bucket_object_stats(s3_client, bucket_name, sample_size, inventory_workers, list_workers)
+        else:
+            stats, source = parallel_object_stats(s3_client, bucket_name, sample_size=sample_size, max_workers=list_workers), "listing"
+
+        details['object_count'] = stats["count"]
+        details['object_key'] = stats["sample_keys"]
+        details['object_stats'] = object_stats_report(stats)
+        details['object_stats']['source'] = source
+    elif list_workers > 1:
+        object_keys = parallel_list_keys(bucket_client(clients, bucket_name), bucket_name, max_workers=list_workers)
+        details['object_count'] = len(object_keys)
+        details['object_key'] = object_keys
+    else:
         object_count, object_keys = list_objects(bucket_name)
+        details['object_count'] = object_count
+        details['object_key'] = object_keys
 
-        details.append({
-            'bucket_name': bucket_name,
-            'public_access': True,
-            'static_website': static_website_status,
-            'object_count': object_count,
-            'object_key': object_keys
-        })
     return details
 
-def audit_run():
+def generate_report(public_buckets, max_workers=DEFAULT_CHECK_WORKERS):
+    return run_bucket_checks(_analyze_bucket, public_buckets, max_workers)
+
+def stream_report(public_buckets, sink, max_workers=DEFAULT_CHECK_WORKERS):
+    for _, details in iter_bucket_checks(_analyze_bucket, public_buckets, max_workers):
+        write_report_record(sink, details)
+
+def audit_run(check_workers=DEFAULT_CHECK_WORKERS):
     print("\n" + "="*50)
     print("         STARTING S3 SECURITY AUDIT REPORT")
     print("="*50)
 
+    global account_public_access_block
+
     account_id, account_username = get_account_info()
+    if account_id:
+        account_public_access_block = get_account_public_access_block(thread_client(clients, 's3control'), account_id)
     list_buckets()
-    public_buckets = check_public_acess()
+    public_buckets = check_public_acess(check_workers)
+
+    sink = None
+    if report_format != "json":
+        sink = open_report_sink(
+            "audit_report.{}".format(report_format),
+            {"aws_account_id": account_id, "aws_account_username": account_username},
+            "details_bucket"
+        )
     
     final_details = []
     if public_buckets:
         print("\nGenerating detailed reports for risk buckets")
-        final_details = generate_report(public_buckets)
+        if sink is not None:
+            stream_report(public_buckets, sink, check_workers)
+        else:
+            final_details = generate_report(public_buckets, check_workers)
     else:
         print("\nNo risk buckets found.")  
     
     print("\n" + "="*50)
     print("         FINAL S3 SECURITY AUDIT REPORT")
     print("="*50)
+
+    if sink is not None:
+        close_report_sink(sink, {
+            "found_bucket_public_access": len(public_buckets),
+            "name_buckets": public_buckets
+        })
+        print(f"\nReport saved to '{sink['path']}'")
+        return
         
     final_reports = {
         "aws_account_id": account_id,
@@ -1,26 +1,94 @@
+import argparse
 import configparser
 import os
 import sys
-import boto3
+import time
 import json
-from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from scripts.bucket_s3.audit_state import (
+    DEFAULT_TTL_HOURS,
+    load_bucket_results,
+    open_state_store,
+    prune_bucket_results,
+    read_change_events,
+    reusable_results,
+    save_bucket_results
+)
+from scripts.bucket_s3.bucket_checks import CHECKS, run_bucket_check_set
+from scripts.bucket_s3.check_executor import (
+    DEFAULT_CHECK_WORKERS,
+    create_thread_clients,
+    iter_bucket_checks,
+    run_bucket_checks,
+    thread_client
+)
+from scripts.bucket_s3.inventory import DEFAULT_INVENTORY_WORKERS, bucket_object_stats
+from scripts.bucket_s3.object_stats import (
+    DEFAULT_SAMPLE_SIZE,
+    object_stats_report
+)
+from scripts.bucket_s3.parallel_listing import (
+    DEFAULT_LIST_WORKERS,
+    parallel_list_keys,
+    parallel_object_stats
+)
+from scripts.bucket_s3.public_access import (
+    get_account_public_access_block,
+    is_fully_blocked
+)
+from scripts.bucket_s3.region_pool import (
+    DEFAULT_REGION_CACHE,
+    bucket_client,
+    bucket_resource,
+    resolve_bucket_regions
+)
+from scripts.bucket_s3.report_sink import (
+    REPORT_FORMATS,
+    close_report_sink,
+    open_report_sink,
+    write_report_record
+)
 
 # ---- Initialization and Global Variables ----
 
-s3_client = None
-s3_resource = None
-sts_client = None
-
+DEFAULT_MAX_WORKERS = 4
+SUMMARY_FILENAME = "s3_audit_summary_{}.json"
+LISTING_MODES = ["full", "stream", "inventory"]
+
+DEFAULT_AUDIT_OPTIONS = {
+    "check_workers": DEFAULT_CHECK_WORKERS,
+    "listing_mode": "full",
+    "sample_size": DEFAULT_SAMPLE_SIZE,
+    "inventory_workers": DEFAULT_INVENTORY_WORKERS,
+    "state_db": None,
+    "ttl_hours": DEFAULT_TTL_HOURS,
+    "cloudtrail_dir": None,
+    "report_format": "json",
+    "region_cache": DEFAULT_REGION_CACHE,
+    "extra_checks": [],
+    "list_workers": DEFAULT_LIST_WORKERS
+}
 
-buckets = []
+def audit_options(**overrides):
+    """
+    Returns a copy of the default audit options updated with ´overrides´.
+    """
+    options = dict(DEFAULT_AUDIT_OPTIONS)
+    options.update(overrides)
+    return options
 
-reports ={
-    "AWS_ACCOUNT_ID": "",
-    "AWS_PROFILE_NAME": '',
-    "FOUND_BUCKET_PUBLIC_ACCESS": 0,
-    "VUNERABLE_BUCKET_NAMES": '',
-    "BUCKET_DETAILS": {}
-}
+def new_report(profile_name):
+    """
+    Returns an empty report structure for a single profile run.
+    """
+    return {
+        "AWS_ACCOUNT_ID": "",
+        "AWS_PROFILE_NAME": profile_name,
+        "FOUND_BUCKET_PUBLIC_ACCESS": 0,
+        "VUNERABLE_BUCKET_NAMES": [],
+        "BUCKET_DETAILS": {}
+    }
 
 # ---- 1. Utility Functions (GET Profile/Account Info) ----
 def get_all_target_profiles(credentials_path='~/.aws/credentials'):
@@ -33,7 +101,7 @@ def get_all_target_profiles(credentials_path='~/.aws/credentials'):
         print("ERROR: AWS credentials file not found at {}".format(credentials_file), file=sys.stderr)
         sys.exit(1)
         return []
-    
+
     config = configparser.ConfigParser()
     config.read(credentials_file)
 
@@ -41,7 +109,7 @@ def get_all_target_profiles(credentials_path='~/.aws/credentials'):
 
     return profiles
 
-def get_account_info():
+def get_account_info(sts_client, reports):
     """
     GETs the AWS Account ID for the current session
     """
@@ -50,195 +118,440 @@ def get_account_info():
 
         reports["AWS_ACCOUNT_ID"] = response['Account']
 
-        print("Audit running on AWS Account ID: {}".format(reports["AWS_ACCOUNT_ID"]))
-        
+        print("[{}] Audit running on AWS Account ID: {}".format(reports["AWS_PROFILE_NAME"], reports["AWS_ACCOUNT_ID"]))
+
     except Exception as e:
         print("Error getting account information: {}".format(e),file=sys.stderr)
 
 # ---- 2. Core Audit Functions ----
 
-def list_buckets():
+def list_buckets(s3_client):
     """LISTs all buckets for the current profile"""
 
-    global buckets
-
     try:
         response = s3_client.list_buckets()
         buckets = response['Buckets']
 
         print(f"Total de buckets encontrados: {len(buckets)}")
+        return buckets
 
     except Exception as e:
         print("Error listing buckets: {}".format(e),file=sys.stderr)
+    return []
 
-def _check_public_acess_logic(bucket):
+def _check_public_acess_logic(s3_client, bucket, account_config=None):
     """
     Return ´TRUE´ if Public Access Block (PAB) is *NOT* fully enabled (indicating risk).
-    """
 
-    try:
-        response = s3_client.get_public_access_block(
-            Bucket=bucket
-        )
-        config = response['PublicAccessBlockConfiguration']
-
-        blocked = (config['BlockPublicAcls'] and 
-            config['IgnorePublicAcls'] and 
-            config['BlockPublicPolicy'] and 
-            config['RestrictPublicBuckets'])
-        
-        return not blocked
-    
-    except ClientError as e:
-
-        if e.response['Error']['Code'] == 'NoSuchPublicAccessBlockConfiguration':
-            return True
-        
-        return False
+    The bucket settings are merged with the account-level ones (´account_config´),
+    as S3 enforces whichever of the two enables a flag.
+    """
+    return run_bucket_check_set(s3_client, bucket, ["public_access"], {"account_config": account_config})["public_access"]
 
-def check_vunerable_access():
+def check_vunerable_access(clients, buckets, reports, max_workers=DEFAULT_CHECK_WORKERS, known_results=None, account_config=None):
     """
     Identifies and registers all buckets with potential public access risk.
+
+    Buckets in ´known_results´ (bucket name -> cached risk flag) are not queried again.
+    When the account-level PAB is fully enabled no bucket can be public and no
+    per-bucket call is made.
     """
-    
-    for b in buckets:
-        bucket_name = b['Name']
-        if _check_public_acess_logic(bucket_name):
+    bucket_names = [b['Name'] for b in buckets]
+
+    if is_fully_blocked(account_config):
+        print("[{}] Account-level Public Access Block is fully enabled, skipping bucket checks.".format(reports["AWS_PROFILE_NAME"]))
+        return
+
+    known_results = known_results or {}
+    pending = [bucket_name for bucket_name in bucket_names if bucket_name not in known_results]
+
+    results = dict(zip(pending, run_bucket_checks(
+        lambda bucket_name: _check_public_acess_logic(bucket_client(clients, bucket_name), bucket_name, account_config),
+        pending,
+        max_workers
+    )))
+    results.update(known_results)
+
+    for bucket_name in bucket_names:
+        if results[bucket_name]:
             reports["VUNERABLE_BUCKET_NAMES"].append(bucket_name)
             reports["FOUND_BUCKET_PUBLIC_ACCESS"] += 1
 
 # ---- 3. Details Functions for vunerable buckets ----
 
-def _check_static_website_logic(bucket):
+def _check_static_website_logic(s3_client, bucket):
     """
     Checks if Static Website Hosting is enabled for the given bucket.
     """
-    try:
-        s3_client.get_bucket_website(
-            Bucket=bucket
-        )
-        return True
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchWebsiteConfiguration':
-            return False
-        return False
+    return run_bucket_check_set(s3_client, bucket, ["static_website"])["static_website"]
 
-def list_objects(bucket):
+def list_objects(s3_resource, bucket):
     """
     Lists all objects (recursively) in the specified bucket and returns the count and keys.
     """
     objects = []
-    global s3_resource
     try:
         bucket = s3_resource.Bucket(bucket)
-        
+
         for obj in bucket.objects.all():
             objects.append(obj.key)
 
-        return len(objects), objects
-
     except Exception as e:
         print(f"Error listing objects in bucket '{bucket}': {e}")
-    return objects
+    return len(objects), objects
+
+def _analyze_bucket_logic(clients, profile_name, bucket_name, options):
+    """
+    Builds the detail entry of a single vunerable bucket.
+
+    In ´stream´ listing mode ´object_key´ only holds a bounded sample of keys and
+    the entry gets an ´object_stats´ summary instead of every key. ´inventory´
+    mode computes the same summary from the bucket's S3 Inventory when one is
+    configured and lists the bucket otherwise.
+
+    With ´list_workers´ > 1 every listing is split by key prefix and the shards
+    are listed concurrently.
+
+    The ´extra_checks´ of the registry run in the same pass as the static website
+    check and their results go to ´checks´.
+    """
+    print("\t - [{}] Analyzing bucket: {}".format(profile_name, bucket_name))
+
+    public_access_status = True
+    check_results = run_bucket_check_set(bucket_client(clients, bucket_name), bucket_name, ["static_website"] + options["extra_checks"])
+
+    details = {
+        'bucket_name': bucket_name,
+        'public_access': public_access_status,
+        'static_website': check_results.pop("static_website")
+    }
+    if options["extra_checks"]:
+        details['checks'] = check_results
+
+    if options["listing_mode"] in ("stream", "inventory"):
+        s3_client = bucket_client(clients, bucket_name)
+        if options["listing_mode"] == "inventory":
+            stats, source = bucket_object_stats(s3_client, bucket_name, options["sample_size"], options["inventory_workers"], options["list_workers"])
+        else:
+            stats, source = parallel_object_stats(s3_client, bucket_name, sample_size=options["sample_size"], max_workers=options["list_workers"]), "listing"
+
+        details['object_count'] = stats["count"]
+        details['object_key'] = stats["sample_keys"]
+        details['object_stats'] = object_stats_report(stats)
+        details['object_stats']['source'] = source
+    elif options["list_workers"] > 1:
+        object_keys = parallel_list_keys(bucket_client(clients, bucket_name), bucket_name, max_workers=options["list_workers"])
+        details['object_count'] = len(object_keys)
+        details['object_key'] = object_keys
+    else:
+        object_count, object_keys = list_objects(bucket_resource(clients, bucket_name), bucket_name)
+        details['object_count'] = object_count
+        details['object_key'] = object_keys
+
+    return details
 
-def generate_detailed_report():
+def generate_detailed_report(clients, reports, options=DEFAULT_AUDIT_OPTIONS, known_details=None, sink=None, on_details=None):
     """
     Generates a detailed report structure for EACH vunerable bucket.
+
+    Buckets in ´known_details´ (bucket name -> cached detail entry) are not analyzed
+    again and ´on_details(bucket_name, details)´ is called for every freshly analyzed
+    one. With a ´sink´ every entry is written out, in bucket order, as soon as it is
+    ready instead of being kept in the report.
     """
-    for bucket_name in reports["VUNERABLE_BUCKET_NAMES"]:
-        print("\t - Analyzing bucket: {}".format(bucket_name))
+    known_details = known_details or {}
+
+    def analyze(bucket_name):
+        if bucket_name in known_details:
+            return known_details[bucket_name]
+        return _analyze_bucket_logic(clients, reports["AWS_PROFILE_NAME"], bucket_name, options)
+
+    for bucket_name, details in iter_bucket_checks(analyze, reports["VUNERABLE_BUCKET_NAMES"], options["check_workers"]):
+        if on_details is not None and bucket_name not in known_details:
+            on_details(bucket_name, details)
 
-        public_access_status = True
-        static_website_status = _check_static_website_logic(bucket_name)
-        object_count, object_keys = list_objects(bucket_name)
+        if sink is not None:
+            write_report_record(sink, details)
+        else:
+            reports["BUCKET_DETAILS"][bucket_name] = details
 
-        reports["BUCKET_DETAILS"][bucket_name] = {
-            'bucket_name': bucket_name,
-            'public_access': public_access_status,
-            'static_website': static_website_status,
-            'object_count': object_count,
-            'object_key': object_keys
-        }
+def _load_cached_results(state, account_id, bucket_names, options, now):
+    """
+    Returns the stored results that are still valid for this run (incremental mode).
+    """
+    stored = load_bucket_results(state, account_id)
+    since = min((checked_at for checked_at, _ in stored.values()), default=None)
+    changed = read_change_events(options["cloudtrail_dir"], account_id, since)
+
+    cached = reusable_results(stored, bucket_names, changed, options["ttl_hours"] * 3600, now)
+    # Details stored by another listing mode or check set have a different shape.
+    return {
+        bucket_name: result for bucket_name, result in cached.items()
+        if result.get("listing_mode") == options["listing_mode"]
+        and result.get("extra_checks", []) == options["extra_checks"]
+    }
+
+def _save_state_logic(state, account_id, results, checked_at, options):
+    """
+    Stores fresh bucket results in the state store without interrupting the audit on errors.
+    """
+    try:
+        save_bucket_results(state, account_id, results, checked_at)
+    except Exception as e:
+        print("ERROR: Failed to save audit state {}: {}".format(options["state_db"],e),file=sys.stderr)
 
 # ---- 4. Main Execution Functions ----
-def audit_run(profile_name):
+def audit_run(profile_name, options=None):
     """
     Executes the full audit process for a single account using the specified profile.
+
+    Every run owns its session, clients and report, so several profiles can be
+    audited at the same time. Per-bucket calls fan out over ´check_workers´
+    threads. With a ´state_db´ only new, expired or changed buckets are checked
+    and the other results come from the store. Returns the summary entry for
+    the profile.
     """
+    options = options or audit_options()
+    started = time.perf_counter()
+    checked_at = time.time()
+    summary = {
+        "AWS_PROFILE_NAME": profile_name,
+        "AWS_ACCOUNT_ID": "",
+        "STATUS": "FAILED",
+        "FOUND_BUCKET_PUBLIC_ACCESS": 0,
+        "CACHED_BUCKETS": 0,
+        "ACCOUNT_PUBLIC_ACCESS_BLOCKED": False,
+        "REPORT_FILE": None,
+        "WALL_TIME_SECONDS": 0.0
+    }
+
     print("\n" + "="*100)
     print("\t\tSTARTING S3 SECURITY AUDIT REPORT FOR: {}".format(profile_name))
     print("="*100)
 
     # 4.1. Initialize Session and Clients for the Profile
     try:
-        session = boto3.Session(profile_name=profile_name)
-        global s3_client, s3_resource, sts_client
+        clients = create_thread_clients(profile_name)
+        s3_client = thread_client(clients, 's3')
+        sts_client = thread_client(clients, 'sts')
 
-        s3_client = session.client('s3')
-        s3_resource = session.resource('s3')
-        sts_client = session.client('sts')
-    
     except Exception as e:
         print("ERROR: Failed to initialize session for profile '{}': {}".format(profile_name,e),file=sys.stderr)
-        return
-    
-    # 4.2. Reset Global Report and Set Profile Name
-    global reports
-    reports = {
-        "AWS_ACCOUNT_ID": "",
-        "AWS_PROFILE_NAME": profile_name,
-        "FOUND_BUCKET_PUBLIC_ACCESS": 0,
-        "VUNERABLE_BUCKET_NAMES": [],
-        "BUCKET_DETAILS": {}
-    }
+        summary["WALL_TIME_SECONDS"] = round(time.perf_counter() - started, 3)
+        return summary
+
+    # 4.2. Create the Report for this Profile
+    reports = new_report(profile_name)
 
     # 4.3. Execute Audit Steps
 
-    get_account_info()
-    list_buckets()
-    check_vunerable_access()
-    
+    get_account_info(sts_client, reports)
+    buckets = list_buckets(s3_client)
+    bucket_names = [b['Name'] for b in buckets]
+    account_id = reports["AWS_ACCOUNT_ID"]
+    # Per-bucket calls go straight to the bucket's regional endpoint.
+    clients["bucket_regions"] = resolve_bucket_regions(s3_client, buckets, options["region_cache"], options["check_workers"])
+
+    state = None
+    cached = {}
+    if options["state_db"] and account_id:
+        try:
+            state = open_state_store(options["state_db"])
+            cached = _load_cached_results(state, account_id, bucket_names, options, checked_at)
+            print("[{}] Reusing cached results for {} of {} buckets".format(profile_name, len(cached), len(bucket_names)))
+        except Exception as e:
+            print("ERROR: Failed to read audit state {}: {}".format(options["state_db"],e),file=sys.stderr)
+            state, cached = None, {}
+
+    account_config = None
+    if account_id:
+        account_config = get_account_public_access_block(thread_client(clients, 's3control'), account_id)
+
+    check_vunerable_access(
+        clients, buckets, reports, options["check_workers"],
+        {bucket_name: result["public_access"] for bucket_name, result in cached.items()},
+        account_config
+    )
+
+    # An empty listing may be a failed call, so the store is left untouched.
+    update_state = state is not None and len(bucket_names) > 0
+    on_details = None
+    if update_state:
+        vunerable_names = set(reports["VUNERABLE_BUCKET_NAMES"])
+        _save_state_logic(state, account_id, {
+            bucket_name: {"listing_mode": options["listing_mode"], "extra_checks": options["extra_checks"], "public_access": False, "details": None}
+            for bucket_name in bucket_names
+            if bucket_name not in cached and bucket_name not in vunerable_names
+        }, checked_at, options)
+
+        on_details = lambda bucket_name, details: _save_state_logic(state, account_id, {
+            bucket_name: {"listing_mode": options["listing_mode"], "extra_checks": options["extra_checks"], "public_access": True, "details": details}
+        }, checked_at, options)
+
+    # 4.4. Open the Report File (NDJSON reports are written while buckets are analyzed)
+    report_extension = "json" if options["report_format"] == "json" else options["report_format"]
+    report_filename = "s3_audit_report_{}_{}.{}".format(profile_name, account_id, report_extension)
+
+    sink = None
+    if options["report_format"] != "json":
+        try:
+            sink = open_report_sink(
+                report_filename,
+                {"AWS_PROFILE_NAME": profile_name, "AWS_ACCOUNT_ID": account_id},
+                "BUCKET_DETAILS"
+            )
+        except Exception as e:
+            print("ERROR: Failed to open report file {}: {}".format(report_filename,e),file=sys.stderr)
+            summary["WALL_TIME_SECONDS"] = round(time.perf_counter() - started, 3)
+            return summary
+
     if reports["FOUND_BUCKET_PUBLIC_ACCESS"] > 0:
-        print("\nGenerating detailed reports for risk buckets")
-        generate_detailed_report()
+        print("\n[{}] Generating detailed reports for risk buckets".format(profile_name))
+        generate_detailed_report(
+            clients, reports, options,
+            {bucket_name: result["details"] for bucket_name, result in cached.items() if result["details"]},
+            sink,
+            on_details
+        )
     else:
-        print("\nNo vulnerable buckets found in this account.")  
-
-    # 4.4. Save Final Report to File
-    report_filename = "s3_audit_report_{}_{}.json".format(profile_name, reports["AWS_ACCOUNT_ID"])
-    
-    final_report = {
-        "AWS_PROFILE_NAME": reports["AWS_PROFILE_NAME"],
-        "AWS_ACCOUNT_ID": reports["AWS_ACCOUNT_ID"],
-        "FOUND_BUCKET_PUBLIC_ACCESS": reports["FOUND_BUCKET_PUBLIC_ACCESS"],
-        "VUNERABLE_BUCKET_NAMES": reports["VUNERABLE_BUCKET_NAMES"],
-        "BUCKET_DETAILS": [
-            details for bucket, details in reports["BUCKET_DETAILS"].items()
-        
-        ]
-    }
+        print("\n[{}] No vulnerable buckets found in this account.".format(profile_name))
+
+    if update_state:
+        try:
+            prune_bucket_results(state, account_id, bucket_names)
+        except Exception as e:
+            print("ERROR: Failed to save audit state {}: {}".format(options["state_db"],e),file=sys.stderr)
+    if state is not None:
+        state.close()
+
+    # 4.5. Save Final Report to File
 
     print("\n" + "="*100)
-    print("\t\tFINAL S3 SECURITY AUDIT REPORT")
+    print("\t\tFINAL S3 SECURITY AUDIT REPORT: {}".format(profile_name))
     print("="*100)
 
+    summary["AWS_ACCOUNT_ID"] = account_id
+    summary["FOUND_BUCKET_PUBLIC_ACCESS"] = reports["FOUND_BUCKET_PUBLIC_ACCESS"]
+    summary["CACHED_BUCKETS"] = len(cached)
+    summary["ACCOUNT_PUBLIC_ACCESS_BLOCKED"] = is_fully_blocked(account_config)
+
     try:
-        with open(report_filename, 'w', encoding='utf-8') as f:
-            json.dump(final_report, f, indent=4, ensure_ascii=False)
+        if sink is not None:
+            close_report_sink(sink, {
+                "FOUND_BUCKET_PUBLIC_ACCESS": reports["FOUND_BUCKET_PUBLIC_ACCESS"],
+                "VUNERABLE_BUCKET_NAMES": reports["VUNERABLE_BUCKET_NAMES"]
+            })
+        else:
+            final_report = {
+                "AWS_PROFILE_NAME": reports["AWS_PROFILE_NAME"],
+                "AWS_ACCOUNT_ID": account_id,
+                "FOUND_BUCKET_PUBLIC_ACCESS": reports["FOUND_BUCKET_PUBLIC_ACCESS"],
+                "VUNERABLE_BUCKET_NAMES": reports["VUNERABLE_BUCKET_NAMES"],
+                "BUCKET_DETAILS": [
+                    details for bucket, details in reports["BUCKET_DETAILS"].items()
+
+                ]
+            }
+            with open(report_filename, 'w', encoding='utf-8') as f:
+                json.dump(final_report, f, indent=4, ensure_ascii=False)
         print("\nReport saved to '{}'".format(report_filename))
+        summary["STATUS"] = "OK"
+        summary["REPORT_FILE"] = report_filename
     except Exception as e:
         print("ERROR: Failed to save report to file {}: {}".format(report_filename,e),file=sys.stderr)
 
+    summary["WALL_TIME_SECONDS"] = round(time.perf_counter() - started, 3)
+    return summary
+
+def run_all_profiles(profiles, max_workers=DEFAULT_MAX_WORKERS, options=None):
+    """
+    Audits every profile in its own worker and writes the combined run summary.
+    """
+    options = options or audit_options()
+    started = time.perf_counter()
+    started_at = datetime.now(timezone.utc)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [(profile, executor.submit(audit_run, profile, options)) for profile in profiles]
+        for profile, future in futures:
+            # A failing profile (e.g. a connection error) must not lose the others.
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print("ERROR: Audit of profile '{}' failed: {}".format(profile, e), file=sys.stderr)
+                results.append({"AWS_PROFILE_NAME": profile, "STATUS": "FAILED", "ERROR": str(e)})
+
+    run_summary = {
+        "STARTED_AT": started_at.isoformat(),
+        "MAX_WORKERS": max_workers,
+        "OPTIONS": options,
+        "TOTAL_PROFILES": len(profiles),
+        "FAILED_PROFILES": [r["AWS_PROFILE_NAME"] for r in results if r["STATUS"] != "OK"],
+        "WALL_TIME_SECONDS": round(time.perf_counter() - started, 3),
+        "PROFILES": results
+    }
+
+    summary_filename = SUMMARY_FILENAME.format(started_at.strftime("%Y%m%dT%H%M%SZ"))
+    try:
+        with open(summary_filename, 'w', encoding='utf-8') as f:
+            json.dump(run_summary, f, indent=4, ensure_ascii=False)
+        print("\nRun summary saved to '{}'".format(summary_filename))
+    except Exception as e:
+        print("ERROR: Failed to save run summary to file {}: {}".format(summary_filename,e),file=sys.stderr)
+
+    return run_summary
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="S3 security audit for every profile in ~/.aws/credentials.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Number of profiles audited at the same time (default: {}).".format(DEFAULT_MAX_WORKERS))
+    parser.add_argument("--check-workers", type=int, default=DEFAULT_CHECK_WORKERS,
+                        help="Number of per-bucket checks run at the same time per profile, 1 runs serially (default: {}).".format(DEFAULT_CHECK_WORKERS))
+    parser.add_argument("--listing-mode", choices=LISTING_MODES, default="full",
+                        help="´full´ keeps every object key, ´stream´ keeps statistics and a bounded key sample, "
+                             "´inventory´ reads them from S3 Inventory when configured (default: full).")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help="Maximum number of object keys kept per bucket in ´stream´ mode (default: {}).".format(DEFAULT_SAMPLE_SIZE))
+    parser.add_argument("--inventory-workers", type=int, default=DEFAULT_INVENTORY_WORKERS,
+                        help="Number of inventory files read at the same time per bucket (default: {}).".format(DEFAULT_INVENTORY_WORKERS))
+    parser.add_argument("--state-db",
+                        help="SQLite file with per-bucket results; enables the incremental audit.")
+    parser.add_argument("--ttl-hours", type=float, default=DEFAULT_TTL_HOURS,
+                        help="Hours a stored bucket result stays valid (default: {}).".format(DEFAULT_TTL_HOURS))
+    parser.add_argument("--cloudtrail-dir",
+                        help="Folder with exported CloudTrail logs; buckets changed after their last check are re-checked.")
+    parser.add_argument("--report-format", choices=REPORT_FORMATS, default="json",
+                        help="´ndjson´ / ´ndjson.gz´ write each bucket as soon as it is analyzed (default: json).")
+    parser.add_argument("--region-cache", default=DEFAULT_REGION_CACHE,
+                        help="JSON file caching the region of each bucket (default: {}).".format(DEFAULT_REGION_CACHE))
+    parser.add_argument("--list-workers", type=int, default=DEFAULT_LIST_WORKERS,
+                        help="Number of key prefixes listed at the same time per bucket, 1 lists sequentially (default: {}).".format(DEFAULT_LIST_WORKERS))
+    parser.add_argument("--checks", nargs="+", default=[],
+                        choices=[name for name in CHECKS if name not in ("public_access", "static_website")],
+                        help="Extra checks added to the details of every risk bucket.")
+    args = parser.parse_args()
+
     all_profiles = get_all_target_profiles()
 
     if not all_profiles:
         print("No AWS profiles found or configured in ´~/.aws/credentials´.")
     else:
-        for profile in all_profiles:
-            if profile == "default":
-                print("Skipping 'default' profile.")
-                continue
-            audit_run(profile)
-
+        if "default" in all_profiles:
+            print("Skipping 'default' profile.")
+        target_profiles = [profile for profile in all_profiles if profile != "default"]
+        options = audit_options(
+            check_workers=args.check_workers,
+            listing_mode=args.listing_mode,
+            sample_size=args.sample_size,
+            inventory_workers=args.inventory_workers,
+            state_db=args.state_db,
+            ttl_hours=args.ttl_hours,
+            cloudtrail_dir=args.cloudtrail_dir,
+            report_format=args.report_format,
+            region_cache=args.region_cache,
+            extra_checks=args.checks,
+            list_workers=args.list_workers
+        )
+        run_all_profiles(target_profiles, args.workers, options)
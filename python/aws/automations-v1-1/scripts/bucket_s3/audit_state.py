@@ -0,0 +1,161 @@
+import gzip
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_TTL_HOURS = 24
+
+# CloudTrail management events that can change the outcome of a bucket check, including
+# the registry checks cached with the details (´--checks´).
+CHANGE_EVENT_NAMES = {
+    "PutBucketPublicAccessBlock",
+    "PutPublicAccessBlock",
+    "PutBucketPolicy",
+    "PutBucketWebsite",
+    "PutBucketAcl",
+    "PutBucketEncryption",
+    "PutBucketVersioning",
+    "PutBucketOwnershipControls",
+    "PutBucketLogging"
+}
+# Also covers DeleteBucketPublicAccessBlock, DeleteBucketPolicy, DeleteBucketEncryption...
+CHANGE_EVENT_PREFIXES = ("DeleteBucket",)
+# Account-level events invalidate every bucket of the account.
+ACCOUNT_EVENT_NAMES = {
+    "PutAccountPublicAccessBlock",
+    "DeleteAccountPublicAccessBlock"
+}
+ACCOUNT_WIDE = "*"
+
+# ---- 1. State Store ----
+
+def open_state_store(path):
+    """
+    Opens (and creates when needed) the SQLite store of per-bucket audit results.
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bucket_results (
+            account_id TEXT NOT NULL,
+            bucket_name TEXT NOT NULL,
+            checked_at REAL NOT NULL,
+            result TEXT NOT NULL,
+            PRIMARY KEY (account_id, bucket_name)
+        )
+    """)
+    conn.commit()
+    return conn
+
+def load_bucket_results(conn, account_id):
+    """
+    Returns ´{bucket_name: (checked_at, result)}´ for every bucket stored for the account.
+    """
+    rows = conn.execute(
+        "SELECT bucket_name, checked_at, result FROM bucket_results WHERE account_id = ?",
+        (account_id,)
+    )
+    return {bucket_name: (checked_at, json.loads(result)) for bucket_name, checked_at, result in rows}
+
+def save_bucket_results(conn, account_id, results, checked_at):
+    """
+    Stores fresh results (´{bucket_name: result}´). Can be called as buckets finish.
+    """
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO bucket_results (account_id, bucket_name, checked_at, result) VALUES (?, ?, ?, ?)",
+            [(account_id, bucket_name, checked_at, json.dumps(result, ensure_ascii=False))
+             for bucket_name, result in results.items()]
+        )
+
+def prune_bucket_results(conn, account_id, existing_buckets):
+    """
+    Drops rows of buckets that no longer exist in the account.
+    """
+    with conn:
+        stored = {row[0] for row in conn.execute(
+            "SELECT bucket_name FROM bucket_results WHERE account_id = ?", (account_id,)
+        )}
+        removed = stored - set(existing_buckets)
+        conn.executemany(
+            "DELETE FROM bucket_results WHERE account_id = ? AND bucket_name = ?",
+            [(account_id, bucket_name) for bucket_name in removed]
+        )
+
+# ---- 2. CloudTrail Change Events ----
+
+def _is_change_event(event_name):
+    return (event_name in CHANGE_EVENT_NAMES
+            or event_name in ACCOUNT_EVENT_NAMES
+            or event_name.startswith(CHANGE_EVENT_PREFIXES))
+
+def _cloudtrail_files(log_dir):
+    for root, _, files in os.walk(log_dir):
+        for file_name in sorted(files):
+            if file_name.endswith(('.json', '.json.gz')):
+                yield os.path.join(root, file_name)
+
+def read_change_events(log_dir, account_id=None, since=None):
+    """
+    Reads exported CloudTrail log files (´.json´ or ´.json.gz´) and returns
+    ´{bucket_name: latest_event_time}´ for the bucket changes the audit cares about.
+    Account-level changes are returned under ´ACCOUNT_WIDE´.
+    """
+    changed = {}
+    if not log_dir:
+        return changed
+
+    for path in _cloudtrail_files(log_dir):
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as f:
+                records = json.load(f).get('Records', [])
+        except Exception as e:
+            print("Error reading CloudTrail file {}: {}".format(path, e), file=sys.stderr)
+            continue
+
+        for record in records:
+            if record.get('eventSource') != 's3.amazonaws.com' or record.get('errorCode'):
+                continue
+            if not _is_change_event(record.get('eventName', '')):
+                continue
+            if account_id and record.get('recipientAccountId') not in (None, account_id):
+                continue
+
+            if record.get('eventName') in ACCOUNT_EVENT_NAMES:
+                bucket_name = ACCOUNT_WIDE
+            else:
+                bucket_name = (record.get('requestParameters') or {}).get('bucketName')
+            if not bucket_name:
+                continue
+
+            event_time = datetime.fromisoformat(record['eventTime'].replace('Z', '+00:00')).timestamp()
+            if since is not None and event_time < since:
+                continue
+            changed[bucket_name] = max(event_time, changed.get(bucket_name, event_time))
+    return changed
+
+# ---- 3. Incremental Planning ----
+
+def reusable_results(stored, bucket_names, changed, ttl_seconds, now):
+    """
+    Returns ´{bucket_name: result}´ for the buckets whose stored result can be reused:
+    they were checked before, the result has not expired and no change event
+    happened after the check. Every other bucket has to be checked again.
+    """
+    reusable = {}
+    account_changed_at = changed.get(ACCOUNT_WIDE, float('-inf'))
+    for bucket_name in bucket_names:
+        if bucket_name not in stored:
+            continue
+        checked_at, result = stored[bucket_name]
+        if now - checked_at > ttl_seconds:
+            continue
+        if max(changed.get(bucket_name, float('-inf')), account_changed_at) >= checked_at:
+            continue
+        reusable[bucket_name] = result
+    return reusable
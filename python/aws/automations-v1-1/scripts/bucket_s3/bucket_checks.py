@@ -0,0 +1,161 @@
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from scripts.bucket_s3.public_access import is_fully_blocked, merge_public_access_block
+
+# ---- Initialization and Global Variables ----
+
+# API calls the checks can ask for: name -> error codes meaning "not configured".
+API_CALLS = {
+    "get_public_access_block": ["NoSuchPublicAccessBlockConfiguration"],
+    "get_bucket_website": ["NoSuchWebsiteConfiguration"],
+    "get_bucket_policy_status": ["NoSuchBucketPolicy"],
+    "get_bucket_acl": [],
+    "get_bucket_encryption": ["ServerSideEncryptionConfigurationNotFoundError"],
+    "get_bucket_versioning": [],
+    "get_bucket_logging": [],
+    "get_bucket_ownership_controls": ["OwnershipControlsNotFoundError"],
+    "get_bucket_tagging": ["NoSuchTagSet"],
+    "get_bucket_cors": ["NoSuchCORSConfiguration"],
+    "get_bucket_lifecycle_configuration": ["NoSuchLifecycleConfiguration"],
+    "get_bucket_policy": ["NoSuchBucketPolicy"]
+}
+
+PUBLIC_GRANTEE_URIS = {
+    "http://acs.amazonaws.com/groups/global/AllUsers": "AllUsers",
+    "http://acs.amazonaws.com/groups/global/AuthenticatedUsers": "AuthenticatedUsers"
+}
+
+# name -> {"api_calls": [...], "evaluate": function(responses, context)}
+CHECKS = {}
+
+def register_check(name, api_calls):
+    """
+    Registers a bucket check. The decorated function receives ´responses´
+    (API call name -> call result, see ´_call_api_logic´) and the audit ´context´.
+    """
+    for api_call in api_calls:
+        if api_call not in API_CALLS:
+            raise ValueError("Unknown API call '{}' for check '{}'".format(api_call, name))
+
+    def decorator(evaluate):
+        CHECKS[name] = {"api_calls": list(api_calls), "evaluate": evaluate}
+        return evaluate
+    return decorator
+
+# ---- 1. Registered Checks ----
+
+@register_check("public_access", ["get_public_access_block"])
+def _public_access_check(responses, context):
+    """Return ´TRUE´ if the effective (account + bucket) PAB is *NOT* fully enabled"""
+    result = responses["get_public_access_block"]
+    account_config = context.get("account_config")
+    if result["status"] == "ok":
+        config = merge_public_access_block(account_config, result["response"]['PublicAccessBlockConfiguration'])
+        return not is_fully_blocked(config)
+    if result["status"] == "missing":
+        return not is_fully_blocked(account_config)
+    return False
+
+@register_check("static_website", ["get_bucket_website"])
+def _static_website_check(responses, context):
+    return responses["get_bucket_website"]["status"] == "ok"
+
+@register_check("policy_public", ["get_bucket_policy_status"])
+def _policy_public_check(responses, context):
+    result = responses["get_bucket_policy_status"]
+    if result["status"] != "ok":
+        return False
+    return result["response"]['PolicyStatus'].get('IsPublic', False)
+
+@register_check("acl_public_grants", ["get_bucket_acl"])
+def _acl_public_grants_check(responses, context):
+    result = responses["get_bucket_acl"]
+    if result["status"] != "ok":
+        return []
+    grants = []
+    for grant in result["response"].get('Grants', []):
+        group = PUBLIC_GRANTEE_URIS.get(grant.get('Grantee', {}).get('URI'))
+        if group:
+            grants.append({"grantee": group, "permission": grant['Permission']})
+    return grants
+
+@register_check("default_encryption", ["get_bucket_encryption"])
+def _default_encryption_check(responses, context):
+    result = responses["get_bucket_encryption"]
+    if result["status"] != "ok":
+        return None
+    rules = result["response"]['ServerSideEncryptionConfiguration'].get('Rules', [])
+    algorithms = [rule['ApplyServerSideEncryptionByDefault']['SSEAlgorithm']
+                  for rule in rules if 'ApplyServerSideEncryptionByDefault' in rule]
+    return algorithms[0] if algorithms else None
+
+@register_check("versioning", ["get_bucket_versioning"])
+def _versioning_check(responses, context):
+    result = responses["get_bucket_versioning"]
+    if result["status"] != "ok":
+        return None
+    return result["response"].get('Status', 'Disabled')
+
+@register_check("access_logging", ["get_bucket_logging"])
+def _access_logging_check(responses, context):
+    result = responses["get_bucket_logging"]
+    if result["status"] != "ok":
+        return None
+    return result["response"].get('LoggingEnabled', {}).get('TargetBucket')
+
+@register_check("ownership_controls", ["get_bucket_ownership_controls"])
+def _ownership_controls_check(responses, context):
+    result = responses["get_bucket_ownership_controls"]
+    if result["status"] != "ok":
+        return None
+    rules = result["response"]['OwnershipControls'].get('Rules', [])
+    return rules[0]['ObjectOwnership'] if rules else None
+
+# ---- 2. Batched Check Pass ----
+
+def _call_api_logic(s3_client, api_call, bucket_name):
+    """
+    Runs one API call and returns ´{"status": "ok" | "missing" | "error", ...}´.
+    """
+    try:
+        response = getattr(s3_client, api_call)(Bucket=bucket_name)
+        return {"status": "ok", "response": response}
+    except ClientError as e:
+        code = e.response['Error']['Code']
+        status = "missing" if code in API_CALLS[api_call] else "error"
+        return {"status": status, "error": code}
+    except Exception as e:
+        # Connection/timeout errors only fail this call, not the whole pass over the buckets.
+        return {"status": "error", "error": str(e)}
+
+def required_api_calls(check_names):
+    """Returns the distinct API calls needed by the checks, in first-use order"""
+    api_calls = []
+    for check_name in check_names:
+        for api_call in CHECKS[check_name]["api_calls"]:
+            if api_call not in api_calls:
+                api_calls.append(api_call)
+    return api_calls
+
+def fetch_api_calls(s3_client, bucket_name, api_calls):
+    """
+    Runs the API calls for one bucket, all of them at the same time, and returns
+    ´{api_call: result}´ (see ´_call_api_logic´).
+    """
+    if len(api_calls) <= 1:
+        return {api_call: _call_api_logic(s3_client, api_call, bucket_name) for api_call in api_calls}
+    with ThreadPoolExecutor(max_workers=len(api_calls)) as executor:
+        futures = {api_call: executor.submit(_call_api_logic, s3_client, api_call, bucket_name) for api_call in api_calls}
+        return {api_call: future.result() for api_call, future in futures.items()}
+
+def run_bucket_check_set(s3_client, bucket_name, check_names, context=None):
+    """
+    Runs the checks for one bucket and returns ´{check_name: value}´.
+
+    Every distinct API call is made once, all of them at the same time, and each
+    response is shared by every check that needs it, so adding a check that reuses
+    a call costs nothing and a new call does not add a sequential round trip.
+    """
+    context = context or {}
+    responses = fetch_api_calls(s3_client, bucket_name, required_api_calls(check_names))
+    return {check_name: CHECKS[check_name]["evaluate"](responses, context) for check_name in check_names}
@@ -0,0 +1,164 @@
+import json
+from scripts.bucket_s3.bucket_checks import fetch_api_calls
+from scripts.bucket_s3.public_access import PUBLIC_ACCESS_BLOCK_FLAGS
+
+# ---- Initialization and Global Variables ----
+# A facet is one piece of bucket configuration managed from a manifest:
+# ´{"api_call", "current": (response) -> value, "desired": (spec value, current) -> value,
+#   "describe": (current, desired) -> [change, ...], "write": (s3_client, bucket, desired) -> None}´.
+# ´current´ returns None when the configuration does not exist.
+
+FACET_ORDER = ["tags", "public_access_block", "cors", "lifecycle", "policy"]
+
+# ---- 1. Facets ----
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True)
+
+def _describe_items(current, desired, id_key, label):
+    """Describes the changes of a list of rules/statements, matched by ´id_key´ (else by position)"""
+    def by_id(items):
+        return {item.get(id_key) or "{} {}".format(label, index): item for index, item in enumerate(items or [], start=1)}
+
+    current_items, desired_items = by_id(current), by_id(desired)
+    changes = ["+{}".format(name) for name in desired_items if name not in current_items]
+    changes.extend("-{}".format(name) for name in current_items if name not in desired_items)
+    changes.extend(
+        "~{}".format(name) for name in desired_items
+        if name in current_items and _canonical(current_items[name]) != _canonical(desired_items[name])
+    )
+    return changes or ["{} order".format(label)]
+
+# -- Tags: tags not in the manifest (set by hand or by other tools) are kept --
+
+def _current_tags(response):
+    return {tag['Key']: tag['Value'] for tag in response.get('TagSet', [])}
+
+def _desired_tags(tags, current):
+    return dict(current or {}, **tags)
+
+def _describe_tags(current, desired):
+    current = current or {}
+    return [
+        "+{}={}".format(key, value) if key not in current else "~{}: {} -> {}".format(key, current[key], value)
+        for key, value in sorted(desired.items()) if current.get(key) != value
+    ]
+
+def _write_tags(s3_client, bucket_name, tags):
+    s3_client.put_bucket_tagging(
+        Bucket=bucket_name,
+        Tagging={'TagSet': [{'Key': key, 'Value': value} for key, value in sorted(tags.items())]}
+    )
+
+# -- Public Access Block --
+
+def _current_public_access_block(response):
+    config = response['PublicAccessBlockConfiguration']
+    return {flag: bool(config.get(flag)) for flag in PUBLIC_ACCESS_BLOCK_FLAGS}
+
+def _describe_public_access_block(current, desired):
+    current = current or {}
+    return [
+        "~{}: {} -> {}".format(flag, current.get(flag, False), desired[flag])
+        for flag in PUBLIC_ACCESS_BLOCK_FLAGS if current.get(flag, False) != desired[flag]
+    ]
+
+def _write_public_access_block(s3_client, bucket_name, config):
+    s3_client.put_public_access_block(Bucket=bucket_name, PublicAccessBlockConfiguration=config)
+
+# -- CORS, lifecycle and policy: the manifest value replaces the whole configuration --
+
+def _write_cors(s3_client, bucket_name, rules):
+    s3_client.put_bucket_cors(Bucket=bucket_name, CORSConfiguration={'CORSRules': rules})
+
+def _write_lifecycle(s3_client, bucket_name, rules):
+    s3_client.put_bucket_lifecycle_configuration(Bucket=bucket_name, LifecycleConfiguration={'Rules': rules})
+
+def _describe_policy(current, desired):
+    current = current or {}
+    changes = _describe_items(current.get("Statement"), desired.get("Statement"), "Sid", "statement")
+    if current and current.get("Version") != desired.get("Version"):
+        changes.append("~Version")
+    return changes
+
+def _write_policy(s3_client, bucket_name, policy):
+    s3_client.put_bucket_policy(Bucket=bucket_name, Policy=json.dumps(policy))
+
+def _replace(value, current):
+    return value
+
+FACETS = {
+    "tags": {
+        "api_call": "get_bucket_tagging",
+        "current": _current_tags,
+        "desired": _desired_tags,
+        "describe": _describe_tags,
+        "write": _write_tags
+    },
+    "public_access_block": {
+        "api_call": "get_public_access_block",
+        "current": _current_public_access_block,
+        "desired": _replace,
+        "describe": _describe_public_access_block,
+        "write": _write_public_access_block
+    },
+    "cors": {
+        "api_call": "get_bucket_cors",
+        "current": lambda response: response.get('CORSRules', []),
+        "desired": _replace,
+        "describe": lambda current, desired: _describe_items(current, desired, "ID", "rule"),
+        "write": _write_cors
+    },
+    "lifecycle": {
+        "api_call": "get_bucket_lifecycle_configuration",
+        "current": lambda response: response.get('Rules', []),
+        "desired": _replace,
+        "describe": lambda current, desired: _describe_items(current, desired, "ID", "rule"),
+        "write": _write_lifecycle
+    },
+    "policy": {
+        "api_call": "get_bucket_policy",
+        "current": lambda response: json.loads(response['Policy']),
+        "desired": _replace,
+        "describe": _describe_policy,
+        "write": _write_policy
+    }
+}
+
+# ---- 2. Read, Diff and Write ----
+
+def managed_facets(spec):
+    """Returns the facets the spec manages (a facet set to None is left as it is), in apply order"""
+    return [facet for facet in FACET_ORDER if spec.get(facet) is not None]
+
+def read_bucket_state(s3_client, bucket_name, facets):
+    """
+    Reads the current configuration of the facets, all API calls at the same time.
+    Returns ´{facet: {"status": "ok" | "missing" | "error", "value": ..., "error": code}}´.
+    """
+    responses = fetch_api_calls(s3_client, bucket_name, [FACETS[facet]["api_call"] for facet in facets])
+    state = {}
+    for facet in facets:
+        result = responses[FACETS[facet]["api_call"]]
+        if result["status"] == "ok":
+            state[facet] = {"status": "ok", "value": FACETS[facet]["current"](result["response"])}
+        else:
+            state[facet] = {"status": result["status"], "value": None, "error": result.get("error")}
+    return state
+
+def diff_facet(facet, spec_value, current):
+    """
+    Returns None when the bucket already matches, else
+    ´{"action": "create" | "update", "desired": ..., "changes": [...]}´.
+    """
+    desired = FACETS[facet]["desired"](spec_value, current)
+    if current is not None and _canonical(current) == _canonical(desired):
+        return None
+    return {
+        "action": "create" if current is None else "update",
+        "desired": desired,
+        "changes": FACETS[facet]["describe"](current, desired)
+    }
+
+def write_facet(s3_client, bucket_name, facet, desired):
+    FACETS[facet]["write"](s3_client, bucket_name, desired)
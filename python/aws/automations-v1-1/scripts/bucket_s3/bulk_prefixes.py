@@ -0,0 +1,194 @@
+import argparse
+import csv
+import sys
+import time
+from urllib.parse import urlencode
+from scripts.bucket_s3.check_executor import iter_bucket_checks
+from scripts.bucket_s3.region_pool import resolve_bucket_regions
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_CREATE_WORKERS = 32
+PROGRESS_INTERVAL_SECONDS = 5.0
+ERROR_SAMPLE_SIZE = 20
+
+# ---- 1. Markers ----
+
+def normalize_marker(prefix):
+    """´/clientes/acme´ -> ´clientes/acme/´ (the key of the folder marker)"""
+    prefix = prefix.strip().lstrip("/")
+    return prefix if prefix.endswith("/") else prefix + "/"
+
+def _add_marker(markers, prefix, tags, parents):
+    marker = normalize_marker(prefix)
+    parts = marker.split("/")[:-1]
+    keys = ["/".join(parts[:depth]) + "/" for depth in range(1, len(parts))] if parents else []
+    for key in keys + [marker]:
+        # A marker shared by several rows (a parent) only keeps the tags they all agree on.
+        if key in markers:
+            markers[key] = {name: value for name, value in markers[key].items() if tags.get(name) == value}
+        else:
+            markers[key] = dict(tags)
+
+def markers_from_list(prefixes, tags=None, parents=False):
+    """Returns ´{marker: tags}´ for a list of prefixes (blank lines and ´#´ comments are skipped)"""
+    markers = {}
+    for prefix in prefixes:
+        if prefix.strip() and not prefix.lstrip().startswith("#"):
+            _add_marker(markers, prefix, dict(tags or {}), parents)
+    return markers
+
+def markers_from_template(template, rows, tags=None, parents=False):
+    """
+    Returns ´{marker: tags}´ with one marker per row of values, e.g. ´clientes/{customer}/{user}/´
+    with rows of ´customer´ and ´user´. Tag values may use the same fields (´customer={customer}´).
+    """
+    markers = {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            _add_marker(markers, template.format(**row),
+                        {key: value.format(**row) for key, value in (tags or {}).items()}, parents)
+        except KeyError as e:
+            raise ValueError("Row {} has no value for {} of the template".format(number, e))
+    return markers
+
+def read_values(path):
+    """Rows of a CSV file with a header naming the template fields"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [{key.strip(): (value or "").strip() for key, value in row.items()} for row in csv.DictReader(f)]
+
+# ---- 2. Pre-check ----
+
+def _list_parent_logic(s3_client, bucket_name, parent):
+    """Direct children of ´parent´ (one level, ´Delimiter="/"´): folder prefixes and object keys"""
+    entries = []
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=parent, Delimiter="/"):
+        entries.extend(entry['Prefix'] for entry in page.get('CommonPrefixes', []))
+        entries.extend(obj['Key'] for obj in page.get('Contents', []))
+    return entries
+
+def existing_markers(s3_client, bucket_name, markers, max_workers=DEFAULT_CREATE_WORKERS):
+    """
+    Finds which ´markers´ already exist by listing each of their parent folders one
+    level deep (´Delimiter="/"´), ´max_workers´ parents at a time: a marker exists when
+    it shows up among the parent's ´CommonPrefixes´ (the folder is there, with or
+    without its marker object) or ´Contents´. Only the direct children of those parents
+    are listed, not every key in between. Returns the set of existing markers and the
+    number of entries listed.
+    """
+    by_parent = {}
+    for marker in markers:
+        by_parent.setdefault(marker[:marker.rstrip("/").rfind("/") + 1], set()).add(marker)
+    found, listed = set(), 0
+    for parent, entries in iter_bucket_checks(
+        lambda parent: _list_parent_logic(s3_client, bucket_name, parent), sorted(by_parent), max_workers
+    ):
+        listed += len(entries)
+        found.update(by_parent[parent].intersection(entries))
+    return found, listed
+
+# ---- 3. Creation ----
+
+def _create_marker_logic(job):
+    s3_client = get_client('s3', job["region"], job["profile_name"])
+    try:
+        arguments = {"Bucket": job["bucket"], "Key": job["marker"], "Body": b""}
+        if job["tags"]:
+            arguments["Tagging"] = urlencode(job["tags"])
+        s3_client.put_object(**arguments)
+        return None
+    except Exception as e:
+        return str(e)
+
+def create_prefixes(bucket_name, markers, max_workers=DEFAULT_CREATE_WORKERS, profile_name=None, dry_run=False):
+    """
+    Creates the folder markers of ´markers´ (´{marker: tags}´) that do not exist yet,
+    ´max_workers´ ´put_object´ calls at a time. Returns the stats.
+    """
+    region = resolve_bucket_regions(get_client('s3', profile_name=profile_name), [{'Name': bucket_name}]).get(bucket_name)
+    s3_client = get_client('s3', region, profile_name)
+    stats = {"requested": len(markers), "existing": 0, "listed": 0, "to_create": 0, "created": 0,
+             "failed": 0, "error_sample": [], "dry_run": dry_run}
+
+    started = time.perf_counter()
+    found, stats["listed"] = existing_markers(s3_client, bucket_name, markers, max_workers)
+    stats["existing"] = len(found)
+    stats["check_seconds"] = time.perf_counter() - started
+    missing = [marker for marker in sorted(markers) if marker not in found]
+    stats["to_create"] = len(missing)
+
+    started = last_print = time.perf_counter()
+    if not dry_run:
+        jobs = (
+            {"bucket": bucket_name, "region": region, "profile_name": profile_name, "marker": marker, "tags": markers[marker]}
+            for marker in missing
+        )
+        for job, error in iter_bucket_checks(_create_marker_logic, jobs, max_workers):
+            if error is None:
+                stats["created"] += 1
+            else:
+                stats["failed"] += 1
+                if len(stats["error_sample"]) < ERROR_SAMPLE_SIZE:
+                    stats["error_sample"].append("{}: {}".format(job["marker"], error))
+            if time.perf_counter() - last_print >= PROGRESS_INTERVAL_SECONDS:
+                print("\tcreated {:,}/{:,} ({:,.0f}/s)".format(
+                    stats["created"], len(missing), stats["created"] / (time.perf_counter() - started)))
+                last_print = time.perf_counter()
+    stats["create_seconds"] = time.perf_counter() - started
+    stats["per_second"] = stats["created"] / stats["create_seconds"] if stats["create_seconds"] else 0.0
+    return stats
+
+def print_prefix_summary(bucket_name, stats):
+    print("\n{:,} prefix(es) requested in '{}': {:,} already exist (checked with {:,} listed key(s)/folder(s) in {:.1f}s), {:,} missing.".format(
+        stats["requested"], bucket_name, stats["existing"], stats["listed"], stats["check_seconds"], stats["to_create"]))
+    if stats["dry_run"]:
+        return
+    print("Created {:,} in {:.1f}s ({:,.0f}/s); {:,} failed.".format(
+        stats["created"], stats["create_seconds"], stats["per_second"], stats["failed"]))
+    for error in stats["error_sample"]:
+        print("\t{}".format(error), file=sys.stderr)
+
+def _parse_tags(values):
+    tags = {}
+    for value in values or []:
+        key, separator, tag_value = value.partition("=")
+        if not separator or not key:
+            raise ValueError("Tags must look like key=value, got '{}'".format(value))
+        tags[key] = tag_value
+    return tags
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Creates many folder (prefix) markers at once, from a list or a template such as clientes/{customer}/{user}/."
+    )
+    parser.add_argument("bucket", help="Name of the bucket")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--prefixes", help="Text file with one prefix per line.")
+    source.add_argument("--template", help="Prefix template with {fields} filled from --values.")
+    parser.add_argument("--values", help="CSV file whose header names the template fields (one prefix per row).")
+    parser.add_argument("--tag", action="append", help="Tag of the created markers, key=value (values may use {fields}); repeatable.")
+    parser.add_argument("--parents", action="store_true", help="Also create the markers of every parent prefix.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_CREATE_WORKERS,
+                        help="Number of put_object calls at the same time (default: {}).".format(DEFAULT_CREATE_WORKERS))
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--dry-run", action="store_true", help="Only check which prefixes are missing.")
+    args = parser.parse_args()
+
+    try:
+        tags = _parse_tags(args.tag)
+        if args.template:
+            if not args.values:
+                raise ValueError("--template needs --values")
+            wanted = markers_from_template(args.template, read_values(args.values), tags, args.parents)
+        else:
+            with open(args.prefixes, 'r', encoding='utf-8') as f:
+                wanted = markers_from_list(f, tags, args.parents)
+    except (OSError, ValueError) as e:
+        print("Error reading prefixes: {}".format(e), file=sys.stderr)
+        sys.exit(1)
+
+    result = create_prefixes(args.bucket, wanted, args.workers, args.profile, args.dry_run)
+    print_prefix_summary(args.bucket, result)
+    sys.exit(1 if result["failed"] else 0)
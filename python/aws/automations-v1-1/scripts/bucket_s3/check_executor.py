@@ -0,0 +1,65 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from scripts.common.clients import get_client, get_resource
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_CHECK_WORKERS = 16
+
+# ---- 1. Per-thread Clients ----
+
+def create_thread_clients(profile_name=None):
+    """
+    Returns the client store of an audit: one client/resource per thread for the
+    profile (None: default credentials), built by the shared factory of ´scripts.common.clients´.
+    """
+    return {
+        "profile_name": profile_name
+    }
+
+def thread_client(clients, service_name, region_name=None):
+    """GETs the calling thread's client for the service (and region, when given)"""
+    return get_client(service_name, region_name, clients["profile_name"])
+
+def thread_resource(clients, service_name, region_name=None):
+    """GETs the calling thread's resource for the service (and region, when given)"""
+    return get_resource(service_name, region_name, clients["profile_name"])
+
+# ---- 2. Bounded Fan-out ----
+
+def run_bucket_checks(check, bucket_names, max_workers=DEFAULT_CHECK_WORKERS):
+    """
+    Runs ´check(bucket_name)´ for every bucket using at most ´max_workers´ threads.
+
+    Results come back in the same order as ´bucket_names´, so reports built from
+    them are identical to a serial run. ´max_workers <= 1´ runs serially.
+    """
+    return [result for _, result in iter_bucket_checks(check, bucket_names, max_workers)]
+
+def iter_bucket_checks(check, bucket_names, max_workers=DEFAULT_CHECK_WORKERS):
+    """
+    Yields ´(bucket_name, result)´ in the order of ´bucket_names´ as soon as each result is ready.
+
+    At most ´2 * max_workers´ checks are in flight or waiting to be consumed, so
+    results can be written out while the rest is still running. ´bucket_names´ may
+    be any iterable (e.g. a generator of work items): it is only read as the window
+    frees up, so an unbounded stream runs in bounded memory.
+    """
+    if max_workers <= 1 or (isinstance(bucket_names, (list, tuple)) and len(bucket_names) <= 1):
+        for bucket_name in bucket_names:
+            yield bucket_name, check(bucket_name)
+        return
+
+    window = 2 * max_workers
+    # Threads are only started as work is submitted, so short lists do not spawn ´max_workers´ threads.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for bucket_name in bucket_names:
+            in_flight.append((bucket_name, executor.submit(check, bucket_name)))
+            if len(in_flight) >= window:
+                done_name, future = in_flight.popleft()
+                yield done_name, future.result()
+
+        while in_flight:
+            done_name, future = in_flight.popleft()
+            yield done_name, future.result()
@@ -0,0 +1,313 @@
+import argparse
+import heapq
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from scripts.bucket_s3.check_executor import DEFAULT_CHECK_WORKERS
+from scripts.bucket_s3.inventory import (
+    current_object_batches,
+    local_inventory_files,
+    local_inventory_opener,
+    string_column_list
+)
+from scripts.bucket_s3.region_pool import resolve_bucket_regions
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+# Objects held in memory before the join spills to disk partitions (about 200 bytes each).
+DEFAULT_MEMORY_ENTRIES = 2_000_000
+DEFAULT_PARTITIONS = 64
+# Same-size objects with different ETags are only reported as candidates from this size
+# on: below it, equal sizes are too common to mean anything.
+DEFAULT_CANDIDATE_MIN_SIZE = 64 * 1024 ** 2
+DEFAULT_TOP_GROUPS = 20
+# Listing pages waiting for the join, across all sources.
+QUEUED_PAGES = 64
+# How often a listing thread blocked on a full queue checks that the join still wants pages.
+QUEUE_PUT_TIMEOUT_SECONDS = 1.0
+MAX_PAIR_BUCKETS = 10
+GB = 1024 ** 3
+INVENTORY_SCHEMA = "Bucket, Key, Size, LastModifiedDate, ETag, StorageClass"
+
+# ---- 1. Sources ----
+
+def normalize_etag(etag):
+    """´"ABC-3"´ -> ´abc-3´"""
+    return (etag or "").strip('"').lower()
+
+def is_multipart_etag(etag):
+    """
+    Multipart ETags (´<md5 of part md5s>-<parts>´) depend on the part size used by
+    the uploader, so the same content can have several ETags, never a plain MD5.
+    """
+    return "-" in etag
+
+def parse_source(source):
+    """´bucket´, ´bucket/prefix´ or ´s3://bucket/prefix´ -> ´(bucket, prefix)´"""
+    bucket_name, _, prefix = source[len("s3://"):].partition("/") if source.startswith("s3://") else source.partition("/")
+    return bucket_name, prefix
+
+def _list_source_logic(s3_client, bucket_name, prefix, put):
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=prefix):
+        if not put([(bucket_name, obj['Key'], obj['Size'], normalize_etag(obj.get('ETag'))) for obj in page.get('Contents', [])]):
+            return
+
+def iter_bucket_objects(sources, max_workers=DEFAULT_CHECK_WORKERS, profile_name=None, errors=None):
+    """
+    Yields ´(bucket, key, size, etag)´ of every object of the ´(bucket, prefix)´ sources,
+    listing up to ´max_workers´ sources at a time. Pages go through a bounded queue,
+    so memory does not depend on the size of the buckets. Listing errors are appended to ´errors´.
+    """
+    regions = resolve_bucket_regions(get_client('s3', profile_name=profile_name), [{'Name': name} for name, _ in sources])
+    pages = queue.Queue(maxsize=QUEUED_PAGES)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # Gives up once the consumer is gone, instead of blocking forever on a full queue.
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=QUEUE_PUT_TIMEOUT_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def list_source(bucket_name, prefix):
+        if stop.is_set():
+            return
+        try:
+            _list_source_logic(get_client('s3', regions.get(bucket_name), profile_name), bucket_name, prefix, put)
+        except Exception as e:
+            put("Error listing 's3://{}/{}': {}".format(bucket_name, prefix, e))
+        put(done)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for bucket_name, prefix in sources:
+            executor.submit(list_source, bucket_name, prefix)
+        try:
+            finished = 0
+            while finished < len(sources):
+                page = pages.get()
+                if page is done:
+                    finished += 1
+                elif isinstance(page, str):
+                    print(page, file=sys.stderr)
+                    if errors is not None:
+                        errors.append(page)
+                else:
+                    yield from page
+        finally:
+            # The consumer may stop early (an exception, ´close()´): release the listing
+            # threads so leaving the executor does not wait on a full queue.
+            stop.set()
+            while True:
+                try:
+                    pages.get_nowait()
+                except queue.Empty:
+                    break
+
+def iter_inventory_objects(path, schema=INVENTORY_SCHEMA):
+    """
+    Yields ´(bucket, key, size, etag)´ of an S3 Inventory with an ETag column: a
+    ´manifest.json´ (CSV, ORC or Parquet files) or a single CSV file (optionally gzipped)
+    with ´schema´, read by ´inventory.current_object_batches´. Delete markers and
+    noncurrent versions are skipped.
+    """
+    for data_root, key, file_format, file_schema in local_inventory_files(path, schema):
+        for columns in current_object_batches(local_inventory_opener(data_root), key, file_format, file_schema):
+            if "e_tag" not in columns:
+                raise ValueError("The inventory of '{}' has no ETag column".format(path))
+            yield from zip(
+                string_column_list(columns["bucket"]),
+                string_column_list(columns["key"]),
+                columns["size"].tolist(),
+                map(normalize_etag, string_column_list(columns["e_tag"]))
+            )
+
+# ---- 2. Partitioned Hash Join ----
+
+def _partition(size, partitions):
+    # By size only, so the same-size candidates of the multipart pass land together too.
+    return zlib.crc32(str(size).encode('ascii')) % partitions
+
+def _spill(files, entries, partitions):
+    for size, etag, bucket_name, key in entries:
+        files[_partition(size, partitions)].write(json.dumps([size, etag, bucket_name, key], ensure_ascii=False) + "\n")
+
+def _join_groups(entries, candidate_min_size):
+    """
+    Groups ´(size, etag, bucket, key)´ entries of one partition. Returns the duplicate
+    groups (same size and ETag, more than one distinct object) and the candidate groups
+    (same large size, several ETags of which one is multipart).
+    """
+    by_etag, by_size = {}, {}
+    for size, etag, bucket_name, key in entries:
+        by_etag.setdefault((size, etag), set()).add((bucket_name, key))
+        if size >= candidate_min_size:
+            by_size.setdefault(size, set()).add(etag)
+    duplicates = [
+        {"size": size, "etag": etag, "objects": sorted(objects)}
+        for (size, etag), objects in by_etag.items() if len(objects) > 1
+    ]
+    candidates = [
+        {"size": size, "etags": sorted(etags), "objects": sorted(obj for etag in etags for obj in by_etag[(size, etag)])}
+        for size, etags in by_size.items()
+        if len(etags) > 1 and any(is_multipart_etag(etag) for etag in etags)
+    ]
+    return duplicates, candidates
+
+def iter_partition_groups(objects, memory_entries=DEFAULT_MEMORY_ENTRIES, partitions=DEFAULT_PARTITIONS,
+                          candidate_min_size=DEFAULT_CANDIDATE_MIN_SIZE, stats=None):
+    """
+    Hash-joins ´(bucket, key, size, etag)´ objects on (size, ETag) and yields
+    ´(duplicate_groups, candidate_groups)´ per partition. Up to ´memory_entries´ objects
+    are joined in memory; past that, every object is spilled to one of ´partitions´ JSON
+    lines files (chosen by size) and each file is joined on its own, so memory is
+    bounded by the largest partition. Empty objects (folder markers) are skipped.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(objects=0, bytes=0, spilled=False)
+    entries = []
+    with tempfile.TemporaryDirectory() as directory:
+        files = None
+        for bucket_name, key, size, etag in objects:
+            if not size:
+                continue
+            stats["objects"] += 1
+            stats["bytes"] += size
+            entries.append((size, etag, bucket_name, key))
+            if len(entries) >= memory_entries:
+                if files is None:
+                    files = [open(os.path.join(directory, str(number)), 'w', encoding='utf-8') for number in range(partitions)]
+                    stats["spilled"] = True
+                _spill(files, entries, partitions)
+                entries = []
+        if files is None:
+            yield _join_groups(entries, candidate_min_size)
+            return
+        _spill(files, entries, partitions)
+        entries = []
+        for f in files:
+            f.close()
+        for number in range(partitions):
+            with open(os.path.join(directory, str(number)), 'r', encoding='utf-8') as f:
+                yield _join_groups((tuple(json.loads(line)) for line in f), candidate_min_size)
+
+# ---- 3. Report ----
+
+def find_duplicates(objects, top=DEFAULT_TOP_GROUPS, output_file=None, **join_options):
+    """
+    Runs the join over ´objects´ and summarizes it: reclaimable bytes (every copy but
+    one of each group), the ´top´ groups by reclaimable bytes, duplicated bytes per pair
+    of buckets and the candidate groups. Every group is written to ´output_file´ (NDJSON).
+    """
+    started = time.perf_counter()
+    stats = {}
+    summary = {"groups": 0, "duplicate_objects": 0, "reclaimable_bytes": 0, "multipart_groups": 0,
+               "candidate_groups": 0, "candidate_bytes": 0, "pairs": {}, "top": []}
+    out = open(output_file, 'w', encoding='utf-8') if output_file else None
+    try:
+        for duplicates, candidates in iter_partition_groups(objects, stats=stats, **join_options):
+            for group in duplicates:
+                group["reclaimable_bytes"] = group["size"] * (len(group["objects"]) - 1)
+                summary["groups"] += 1
+                summary["duplicate_objects"] += len(group["objects"])
+                summary["reclaimable_bytes"] += group["reclaimable_bytes"]
+                summary["multipart_groups"] += is_multipart_etag(group["etag"])
+                buckets = sorted({bucket_name for bucket_name, _ in group["objects"]})
+                if 1 < len(buckets) <= MAX_PAIR_BUCKETS:
+                    for index, first in enumerate(buckets):
+                        for second in buckets[index + 1:]:
+                            pair = "{} <-> {}".format(first, second)
+                            summary["pairs"][pair] = summary["pairs"].get(pair, 0) + group["size"]
+                entry = (group["reclaimable_bytes"], group["size"], group["etag"])
+                if len(summary["top"]) < top:
+                    heapq.heappush(summary["top"], entry + (group,))
+                elif entry > summary["top"][0][:3]:
+                    heapq.heapreplace(summary["top"], entry + (group,))
+                if out:
+                    out.write(json.dumps(dict(group, type="duplicate"), ensure_ascii=False) + "\n")
+            for group in candidates:
+                summary["candidate_groups"] += 1
+                # Copies with the same ETag are already counted in the duplicate groups.
+                summary["candidate_bytes"] += group["size"] * (len(group["etags"]) - 1)
+                if out:
+                    out.write(json.dumps(dict(group, type="candidate"), ensure_ascii=False) + "\n")
+    finally:
+        if out:
+            out.close()
+    summary["top"] = [item[3] for item in sorted(summary["top"], key=lambda item: item[:3], reverse=True)]
+    summary.update(objects=stats.get("objects", 0), bytes=stats.get("bytes", 0), spilled=stats.get("spilled", False),
+                   seconds=time.perf_counter() - started)
+    return summary
+
+def print_duplicate_report(summary):
+    print("\n{:,} object(s), {:,.2f} GB scanned in {:.1f}s{}.".format(
+        summary["objects"], summary["bytes"] / GB, summary["seconds"], " (spilled to disk partitions)" if summary["spilled"] else ""))
+    print("{:,} duplicate group(s) with {:,} object(s): {:,.2f} GB reclaimable ({:,} group(s) with multipart ETags).".format(
+        summary["groups"], summary["duplicate_objects"], summary["reclaimable_bytes"] / GB, summary["multipart_groups"]))
+    for group in summary["top"]:
+        print("\t{:,.3f} GB reclaimable, {:,} x {:,} bytes, ETag {}".format(
+            group["reclaimable_bytes"] / GB, len(group["objects"]), group["size"], group["etag"]))
+        for bucket_name, key in group["objects"][:5]:
+            print("\t\ts3://{}/{}".format(bucket_name, key))
+        if len(group["objects"]) > 5:
+            print("\t\t... {:,} more".format(len(group["objects"]) - 5))
+    if summary["pairs"]:
+        print("\nDuplicated GB between buckets:")
+        for pair, size in sorted(summary["pairs"].items(), key=lambda item: item[1], reverse=True)[:20]:
+            print("\t{:>12,.3f}  {}".format(size / GB, pair))
+    if summary["candidate_groups"]:
+        print("\n{:,} candidate group(s) ({:,.2f} GB) have the same size but different ETags, at least one multipart:\n"
+              "the same content uploaded with another part size. Compare their checksums before deleting.".format(
+                  summary["candidate_groups"], summary["candidate_bytes"] / GB))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Finds objects duplicated within and across buckets by joining listings on (size, ETag)."
+    )
+    parser.add_argument("sources", nargs="*", help="Buckets to list: bucket, bucket/prefix or s3://bucket/prefix")
+    parser.add_argument("--inventory", action="append", help="S3 Inventory manifest.json, or one CSV file (.csv or .csv.gz), with an ETag column; repeatable.")
+    parser.add_argument("--schema", default=INVENTORY_SCHEMA, help="fileSchema of the inventories (default: '{}').".format(INVENTORY_SCHEMA))
+    parser.add_argument("--memory-entries", type=int, default=DEFAULT_MEMORY_ENTRIES,
+                        help="Objects joined in memory before spilling to disk partitions (default: {:,}).".format(DEFAULT_MEMORY_ENTRIES))
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS,
+                        help="Disk partitions used when spilling (default: {}).".format(DEFAULT_PARTITIONS))
+    parser.add_argument("--candidate-min-mb", type=float, default=DEFAULT_CANDIDATE_MIN_SIZE / 1024 ** 2,
+                        help="Minimum size of same-size/different-ETag candidates (default: {:.0f}).".format(DEFAULT_CANDIDATE_MIN_SIZE / 1024 ** 2))
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_GROUPS, help="Groups printed (default: {}).".format(DEFAULT_TOP_GROUPS))
+    parser.add_argument("--workers", type=int, default=DEFAULT_CHECK_WORKERS,
+                        help="Number of buckets listed at the same time (default: {}).".format(DEFAULT_CHECK_WORKERS))
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--output", help="NDJSON file with every duplicate and candidate group.")
+    args = parser.parse_args()
+
+    if not args.sources and not args.inventory:
+        parser.error("give at least one bucket or --inventory")
+
+    def all_objects():
+        for path in args.inventory or []:
+            yield from iter_inventory_objects(path, args.schema)
+        if args.sources:
+            yield from iter_bucket_objects([parse_source(source) for source in args.sources], args.workers, args.profile)
+
+    try:
+        result = find_duplicates(
+            all_objects(), args.top, args.output, memory_entries=args.memory_entries, partitions=args.partitions,
+            candidate_min_size=int(args.candidate_min_mb * 1024 ** 2)
+        )
+    except (OSError, ValueError) as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        sys.exit(1)
+    print_duplicate_report(result)
+    if args.output:
+        print("Every group saved to '{}'".format(args.output))
@@ -0,0 +1,263 @@
+import argparse
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from botocore.exceptions import ClientError
+from scripts.bucket_s3.region_pool import resolve_bucket_regions
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+DELETE_BATCH_SIZE = 1000  # Maximum keys of one DeleteObjects call
+DEFAULT_DELETE_WORKERS = 8
+# Listed batches waiting for a delete worker; bounds memory to about
+# (workers + this) * 1000 keys whatever the size of the bucket.
+QUEUE_BATCHES_PER_WORKER = 2
+PROGRESS_INTERVAL_SECONDS = 5.0
+# How often a listing blocked on a full queue checks that a delete worker is still alive.
+QUEUE_PUT_TIMEOUT_SECONDS = 1.0
+# Per-key errors of DeleteObjects worth trying again.
+RETRYABLE_KEY_ERRORS = {"SlowDown", "InternalError", "ServiceUnavailable", "RequestTimeout"}
+MAX_KEY_ATTEMPTS = 3
+ERROR_SAMPLE_SIZE = 20
+
+# ---- 1. Listing Stage ----
+
+def iter_version_batches(s3_client, bucket_name, prefix=''):
+    """
+    Pages through ´list_object_versions´ (object versions and delete markers) and
+    yields ´(batch, size_bytes)´ with up to 1000 ´{"Key", "VersionId"}´ each.
+    """
+    paginator = s3_client.get_paginator('list_object_versions')
+    batch, batch_bytes = [], 0
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, PaginationConfig={"PageSize": DELETE_BATCH_SIZE}):
+        for entry in page.get('Versions', []) + page.get('DeleteMarkers', []):
+            batch.append({"Key": entry['Key'], "VersionId": entry['VersionId']})
+            batch_bytes += entry.get('Size', 0)
+            if len(batch) == DELETE_BATCH_SIZE:
+                yield batch, batch_bytes
+                batch, batch_bytes = [], 0
+    if batch:
+        yield batch, batch_bytes
+
+# ---- 2. Delete Stage ----
+
+def _new_progress(error_report=None):
+    return {
+        "lock": threading.Lock(),
+        "listed": 0,
+        "listed_bytes": 0,
+        "deleted": 0,
+        "deleted_bytes": 0,
+        "errors": 0,
+        "error_codes": {},
+        "error_sample": [],
+        "error_file": open(error_report, 'w', encoding='utf-8') if error_report else None,
+        "started": time.perf_counter()
+    }
+
+def _record_errors(progress, errors):
+    with progress["lock"]:
+        for error in errors:
+            progress["errors"] += 1
+            progress["error_codes"][error["Code"]] = progress["error_codes"].get(error["Code"], 0) + 1
+            if len(progress["error_sample"]) < ERROR_SAMPLE_SIZE:
+                progress["error_sample"].append(error)
+            if progress["error_file"]:
+                progress["error_file"].write(json.dumps(error, ensure_ascii=False) + "\n")
+
+def _delete_objects_call(s3_client, bucket_name, objects):
+    try:
+        response = s3_client.delete_objects(Bucket=bucket_name, Delete={"Objects": objects, "Quiet": True})
+    except ClientError as e:
+        error = e.response.get('Error', {})
+        return [dict(obj, Code=error.get('Code'), Message=error.get('Message')) for obj in objects]
+    except Exception as e:
+        # Connection/timeout errors (e.g. once the retry budget is spent) fail the whole batch.
+        return [dict(obj, Code=type(e).__name__, Message=str(e)) for obj in objects]
+    return [
+        {"Key": error['Key'], "VersionId": error.get('VersionId'), "Code": error.get('Code'), "Message": error.get('Message')}
+        for error in response.get('Errors', [])
+    ]
+
+def _delete_batch_logic(s3_client, bucket_name, batch):
+    """
+    Deletes one batch with ´delete_objects´ (Quiet: only failures come back), retrying
+    the keys that failed with a transient error. Returns the keys that still failed.
+    """
+    pending, failed = batch, []
+    for attempt in range(1, MAX_KEY_ATTEMPTS + 1):
+        errors = _delete_objects_call(s3_client, bucket_name, pending)
+        retryable = [error for error in errors if error["Code"] in RETRYABLE_KEY_ERRORS]
+        failed.extend(error for error in errors if error["Code"] not in RETRYABLE_KEY_ERRORS)
+        if not retryable or attempt == MAX_KEY_ATTEMPTS:
+            return failed + retryable
+        pending = [{"Key": error["Key"], "VersionId": error["VersionId"]} for error in retryable]
+        time.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+    return failed
+
+def _delete_worker(bucket_name, region, profile_name, batches, progress):
+    s3_client = get_client('s3', region, profile_name)
+    while True:
+        item = batches.get()
+        if item is None:
+            return
+        batch, batch_bytes = item
+        try:
+            failed = _delete_batch_logic(s3_client, bucket_name, batch)
+            if failed:
+                _record_errors(progress, failed)
+        except Exception as e:
+            # The worker must outlive any batch, or the listing would block on a full queue.
+            print("Error deleting a batch of '{}': {}".format(bucket_name, e), file=sys.stderr)
+            failed = batch
+            with progress["lock"]:
+                progress["errors"] += len(batch)
+        with progress["lock"]:
+            progress["deleted"] += len(batch) - len(failed)
+            # Sizes are per batch, so bytes of failed keys are estimated proportionally.
+            progress["deleted_bytes"] += batch_bytes * (len(batch) - len(failed)) // len(batch)
+
+# ---- 3. Pipeline ----
+
+def _put_batch(batches, item, workers):
+    """Queues ´item´ for the delete stage; returns False when no delete worker is left to take it"""
+    while any(worker.is_alive() for worker in workers):
+        try:
+            batches.put(item, timeout=QUEUE_PUT_TIMEOUT_SECONDS)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _print_progress(progress, dry_run):
+    with progress["lock"]:
+        elapsed = time.perf_counter() - progress["started"]
+        if dry_run:
+            print("\tlisted {:,} version(s) ({:,.1f} MB) in {:.0f}s".format(
+                progress["listed"], progress["listed_bytes"] / 1024 ** 2, elapsed))
+            return
+        print("\tlisted {:,}, deleted {:,} ({:,.0f}/s), {:,} error(s), {:.0f}s".format(
+            progress["listed"], progress["deleted"], progress["deleted"] / elapsed if elapsed else 0,
+            progress["errors"], elapsed))
+
+def empty_bucket(bucket_name, prefix='', max_workers=DEFAULT_DELETE_WORKERS, profile_name=None,
+                 dry_run=False, error_report=None, delete_bucket=False):
+    """
+    Deletes every object version and delete marker of the bucket (under ´prefix´).
+
+    Listing and deleting run as pipelined stages: the listing feeds 1,000-key batches
+    into a bounded queue, and ´max_workers´ threads each run ´delete_objects´ on them.
+    Per-key errors go to ´error_report´ (NDJSON) when given. Returns the summary.
+    """
+    region = resolve_bucket_regions(get_client('s3', profile_name=profile_name), [{'Name': bucket_name}]).get(bucket_name)
+    s3_client = get_client('s3', region, profile_name)
+    progress = _new_progress(error_report)
+    batches = queue.Queue(maxsize=max(1, max_workers) * QUEUE_BATCHES_PER_WORKER)
+    workers = [] if dry_run else [
+        threading.Thread(target=_delete_worker, args=(bucket_name, region, profile_name, batches, progress), daemon=True)
+        for _ in range(max(1, max_workers))
+    ]
+    for worker in workers:
+        worker.start()
+
+    print("{} 's3://{}/{}' ({})...".format("Counting" if dry_run else "Emptying", bucket_name, prefix, region))
+    listing_error = None
+    last_print = time.perf_counter()
+    try:
+        for batch, batch_bytes in iter_version_batches(s3_client, bucket_name, prefix):
+            with progress["lock"]:
+                progress["listed"] += len(batch)
+                progress["listed_bytes"] += batch_bytes
+            # Blocks while the delete stage is behind.
+            if not dry_run and not _put_batch(batches, (batch, batch_bytes), workers):
+                raise RuntimeError("every delete worker stopped")
+            if time.perf_counter() - last_print >= PROGRESS_INTERVAL_SECONDS:
+                _print_progress(progress, dry_run)
+                last_print = time.perf_counter()
+    except Exception as e:
+        listing_error = str(e)
+        print("Error listing versions of '{}': {}".format(bucket_name, e), file=sys.stderr)
+
+    for _ in workers:
+        if not _put_batch(batches, None, workers):
+            break
+    for worker in workers:
+        while worker.is_alive():
+            worker.join(PROGRESS_INTERVAL_SECONDS)
+            if worker.is_alive():
+                _print_progress(progress, dry_run)
+    _print_progress(progress, dry_run)
+    if progress["error_file"]:
+        progress["error_file"].close()
+
+    summary = {
+        "bucket": bucket_name,
+        "prefix": prefix,
+        "dry_run": dry_run,
+        "listed_versions": progress["listed"],
+        "listed_bytes": progress["listed_bytes"],
+        "deleted_versions": progress["deleted"],
+        "deleted_bytes": progress["deleted_bytes"],
+        "errors": progress["errors"],
+        "error_codes": progress["error_codes"],
+        "error_sample": progress["error_sample"],
+        "listing_error": listing_error,
+        "seconds": round(time.perf_counter() - progress["started"], 1),
+        "bucket_deleted": False
+    }
+
+    clean = not dry_run and not listing_error and not progress["errors"]
+    if delete_bucket and clean and not prefix:
+        try:
+            s3_client.delete_bucket(Bucket=bucket_name)
+            summary["bucket_deleted"] = True
+        except ClientError as e:
+            print("Error deleting bucket '{}': {}".format(bucket_name, e), file=sys.stderr)
+    return summary
+
+def print_empty_summary(summary, error_report=None):
+    if summary["dry_run"]:
+        print("\n{:,} version(s)/delete marker(s), {:,.1f} MB would be deleted from '{}'.".format(
+            summary["listed_versions"], summary["listed_bytes"] / 1024 ** 2, summary["bucket"]))
+        return
+    print("\nDeleted {:,} of {:,} version(s)/delete marker(s) ({:,.1f} MB) from '{}' in {}s.".format(
+        summary["deleted_versions"], summary["listed_versions"], summary["deleted_bytes"] / 1024 ** 2,
+        summary["bucket"], summary["seconds"]))
+    if summary["errors"]:
+        print("{:,} key(s) could not be deleted: {}".format(
+            summary["errors"], ", ".join("{} {}".format(count, code) for code, count in sorted(summary["error_codes"].items()))))
+        for error in summary["error_sample"]:
+            print("\t{} ({}): {} {}".format(error["Key"], error["VersionId"], error["Code"], error["Message"]))
+        if error_report:
+            print("Every failed key is listed in '{}'".format(error_report))
+    if summary["bucket_deleted"]:
+        print("Bucket '{}' deleted.".format(summary["bucket"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deletes every object version and delete marker of an S3 bucket.")
+    parser.add_argument("bucket", help="Name of the bucket")
+    parser.add_argument("--prefix", default="", help="Only delete keys under this prefix.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_DELETE_WORKERS,
+                        help="Number of DeleteObjects calls running at the same time (default: {}).".format(DEFAULT_DELETE_WORKERS))
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted.")
+    parser.add_argument("--error-report", help="NDJSON file listing every key that could not be deleted.")
+    parser.add_argument("--delete-bucket", action="store_true", help="Delete the bucket itself once it is empty.")
+    parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation.")
+    args = parser.parse_args()
+
+    if not args.dry_run and not args.yes:
+        answer = input("Every version under 's3://{}/{}' will be deleted. Type the bucket name to confirm: ".format(args.bucket, args.prefix))
+        if answer.strip() != args.bucket:
+            print("Nothing deleted.")
+            sys.exit(1)
+
+    summary = empty_bucket(args.bucket, args.prefix, args.workers, args.profile,
+                           args.dry_run, args.error_report, args.delete_bucket)
+    print_empty_summary(summary, args.error_report)
+    sys.exit(0 if not summary["errors"] and not summary["listing_error"] else 1)
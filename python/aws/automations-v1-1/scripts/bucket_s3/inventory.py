@@ -0,0 +1,495 @@
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import unquote_plus
+from botocore.exceptions import ClientError
+from scripts.bucket_s3.object_stats import (
+    DEFAULT_SAMPLE_SIZE,
+    add_object,
+    merge_object_stats,
+    new_object_stats,
+    object_stats_report
+)
+from scripts.bucket_s3.parallel_listing import DEFAULT_LIST_WORKERS, parallel_object_stats
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_INVENTORY_WORKERS = 4
+# Rows per batch of ´inventory_column_batches´.
+DEFAULT_BATCH_ROWS = 1_000_000
+# Typed columns of ´inventory_column_batches´; boolean columns are filled with their default when empty.
+INT_COLUMNS = {"size"}
+DATETIME_COLUMNS = {"last_modified_date"}
+BOOL_COLUMNS = {"is_latest": True, "is_delete_marker": False}
+NUMPY_COLUMNS = INT_COLUMNS | DATETIME_COLUMNS | set(BOOL_COLUMNS)
+MANIFEST_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}-\d{2}Z$")
+
+# ---- 1. Inventory Discovery ----
+
+def get_inventory_destination(s3_client, bucket):
+    """
+    Returns the destination of the first enabled inventory configuration of the bucket, or None.
+    """
+    arguments = {"Bucket": bucket}
+    while True:
+        try:
+            response = s3_client.list_bucket_inventory_configurations(**arguments)
+        except ClientError as e:
+            print("Error reading inventory configuration of bucket '{}': {}".format(bucket, e), file=sys.stderr)
+            return None
+
+        for config in response.get('InventoryConfigurationList', []):
+            if not config.get('IsEnabled'):
+                continue
+            destination = config['Destination']['S3BucketDestination']
+            return {
+                "id": config['Id'],
+                "bucket": destination['Bucket'].split(':::')[-1],
+                "prefix": destination.get('Prefix', '').strip('/'),
+                "format": destination['Format']
+            }
+        # Up to 100 configurations per page.
+        if not response.get('IsTruncated') or not response.get('NextContinuationToken'):
+            return None
+        arguments["ContinuationToken"] = response['NextContinuationToken']
+
+def find_latest_manifest_key(s3_client, destination, source_bucket):
+    """
+    Returns the key of the most recent ´manifest.json´ delivered for the configuration, or None.
+    """
+    base = "/".join(part for part in (destination["prefix"], source_bucket, destination["id"]) if part) + "/"
+
+    dates = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=destination["bucket"], Prefix=base, Delimiter='/'):
+        for common_prefix in page.get('CommonPrefixes', []):
+            folder = common_prefix['Prefix'][len(base):].rstrip('/')
+            if MANIFEST_DATE_PATTERN.match(folder):
+                dates.append(folder)
+
+    if not dates:
+        return None
+    return "{}{}/manifest.json".format(base, max(dates))
+
+# ---- 2. File Openers (S3 or Local Disk) ----
+
+def s3_file_opener(s3_client, destination_bucket):
+    """Returns an opener that reads inventory files from the destination bucket"""
+    def opener(key):
+        return s3_client.get_object(Bucket=destination_bucket, Key=key)['Body']
+    return opener
+
+def local_file_opener(data_root):
+    """
+    Returns an opener that reads inventory files from a local copy of the destination bucket.
+
+    A manifest key is looked up under ´data_root´ first and then by file name in
+    the ´data/´ folders S3 delivers (next to or one level above the manifest) and
+    in ´data_root´ itself, so partial copies of a delivery also work.
+    """
+    def opener(key):
+        file_name = os.path.basename(key)
+        candidates = [
+            os.path.join(data_root, key),
+            os.path.join(data_root, 'data', file_name),
+            os.path.join(data_root, os.pardir, 'data', file_name),
+            os.path.join(data_root, file_name)
+        ]
+        for path in candidates[:-1]:
+            if os.path.exists(path):
+                return open(path, 'rb')
+        return open(candidates[-1], 'rb')
+    return opener
+
+def load_manifest(opener, manifest_key):
+    """READs and parses a manifest.json"""
+    with opener(manifest_key) as f:
+        return json.load(f)
+
+def local_inventory_files(path, schema=None):
+    """
+    Data files of an inventory on local disk as ´(data_root, key, file_format, file_schema)´:
+    every file of a ´manifest.json´ (in its own format and schema, looked up like
+    ´local_file_opener´), or a single CSV file (optionally gzipped) with ´schema´.
+    """
+    if os.path.basename(path) == "manifest.json":
+        manifest = load_manifest(lambda key: open(path, 'rb'), path)
+        data_root = os.path.dirname(os.path.abspath(path))
+        return [(data_root, entry['key'], manifest.get('fileFormat', 'CSV'), manifest.get('fileSchema'))
+                for entry in manifest.get('files', [])]
+    return [(None, path, 'CSV', schema)]
+
+def local_inventory_opener(data_root):
+    """Opener of the files of ´local_inventory_files´ (plain paths when ´data_root´ is None)"""
+    return local_file_opener(data_root) if data_root else (lambda key: open(key, 'rb'))
+
+# ---- 3. Row Readers ----
+
+def _column_name(name):
+    """Normalizes CSV schema names (´LastModifiedDate´) to the ORC/Parquet ones (´last_modified_date´)."""
+    name = name.strip()
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower() if not name.islower() else name
+
+def _parse_bool(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    return value.strip().lower() == 'true'
+
+def _parse_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _csv_rows(opener, key, schema):
+    columns = [_column_name(column) for column in schema.split(',')]
+    with opener(key) as raw, gzip.open(raw, 'rt', encoding='utf-8', newline='') as f:
+        for values in csv.reader(f):
+            row = dict(zip(columns, values))
+            row['key'] = unquote_plus(row.get('key', ''))
+            yield row
+
+def _columnar_rows(opener, key, file_format):
+    try:
+        import pyarrow.orc as orc
+        import pyarrow.parquet as parquet
+    except ImportError:
+        raise RuntimeError("pyarrow is required to read {} inventory files".format(file_format))
+
+    # Columnar readers need a seekable file; S3 bodies are spooled to disk first.
+    with opener(key) as raw, tempfile.TemporaryFile() as spool:
+        if raw.seekable():
+            source = raw
+        else:
+            for chunk in iter(lambda: raw.read(1024 * 1024), b''):
+                spool.write(chunk)
+            spool.seek(0)
+            source = spool
+
+        if file_format == 'Parquet':
+            batches = parquet.ParquetFile(source).iter_batches()
+        else:
+            reader = orc.ORCFile(source)
+            batches = (reader.read_stripe(i) for i in range(reader.nstripes))
+
+        for batch in batches:
+            yield from batch.to_pylist()
+
+def _unquote_joined(joined):
+    """´unquote_plus´ of newline-joined keys, or None when it need not be applied key by key"""
+    decoded = None
+    if joined.isascii() and "\\" not in joined:
+        # Same result as ´unquote_plus´, in C: ´%XX´ -> ´\xXX´ for the unicode_escape codec, then UTF-8.
+        try:
+            decoded = joined.replace("+", " ").replace("%", "\\x").encode("latin-1").decode("unicode_escape") \
+                .encode("latin-1").decode("utf-8", "replace")
+        except UnicodeDecodeError:  # a malformed escape such as ´%zz´
+            pass
+    return decoded if decoded is not None else unquote_plus(joined)
+
+def decode_keys(keys):
+    """URL-decodes CSV inventory keys like ´_csv_rows´ (´unquote_plus´), with one call per batch"""
+    keys = list(keys)
+    joined = "\n".join(keys)
+    if "%" not in joined and "+" not in joined:
+        return keys
+    decoded = _unquote_joined(joined).split("\n")
+    # A key with an encoded newline (%0A) shifts the split: decode that batch key by key.
+    return decoded if len(decoded) == len(keys) else [unquote_plus(key) for key in keys]
+
+def _decode_arrow_keys(keys):
+    """´decode_keys´ for a pyarrow string array, without one Python string per key"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    keys = keys.fill_null("")
+    joined = pc.binary_join(pa.ListArray.from_arrays(pa.array([0, len(keys)], pa.int32()), keys), "\n")[0].as_py()
+    if "%" not in joined and "+" not in joined:
+        return keys
+    decoded = pc.split_pattern(pa.array([_unquote_joined(joined)], pa.large_string()), "\n").flatten()
+    return decoded if len(decoded) == len(keys) else pa.array(decode_keys(keys.to_pylist()), pa.string())
+
+def string_column_startswith(values, prefix):
+    """NumPy mask of the values of a string column (list or pyarrow array) starting with ´prefix´"""
+    import numpy as np
+    if isinstance(values, (list, tuple)):
+        return np.fromiter(map(str.startswith, values, itertools.repeat(prefix)), dtype=bool, count=len(values))
+    import pyarrow.compute as pc
+    return pc.starts_with(values, prefix).fill_null(False).to_numpy(zero_copy_only=False)
+
+def string_column_codes(values, codes, default=0, dtype="int8"):
+    """NumPy array of ´codes[value]´ (´default´ for others) for a string column (list or pyarrow array)"""
+    import numpy as np
+    if isinstance(values, (list, tuple)):
+        return np.fromiter(map(codes.get, values, itertools.repeat(default)), dtype=dtype, count=len(values))
+    encoded = values.fill_null("").dictionary_encode()
+    lookup = np.array([codes.get(value, default) for value in encoded.dictionary.to_pylist()], dtype=dtype)
+    return lookup[encoded.indices.to_numpy(zero_copy_only=False)]
+
+def string_column_compress(values, keep):
+    """The values of a string column (list or pyarrow array) where the NumPy mask ´keep´ is set"""
+    if isinstance(values, (list, tuple)):
+        return list(itertools.compress(values, keep))
+    return values.filter(keep)
+
+def string_column_list(values):
+    """The values of a string column (list or pyarrow array) as a list"""
+    return list(values) if isinstance(values, (list, tuple)) else values.to_pylist()
+
+def _typed_csv_column(name, values):
+    import numpy as np
+    if name in INT_COLUMNS:
+        values = np.array(values)
+        values[values == ""] = "0"
+        return values.astype(np.int64)
+    if name in DATETIME_COLUMNS:
+        # NumPy parses ´2024-01-01T00:00:00.000Z´ as UTC only without the zone designator.
+        values = np.array(values)
+        width = values.dtype.itemsize // 4
+        if len(values) and values.dtype.kind == "U" and \
+                (values.view(np.uint32).reshape(len(values), width)[:, -1] == ord("Z")).all():
+            return values.astype("U{}".format(width - 1)).astype("datetime64[ms]")
+        return np.array([value[:-1] if value.endswith("Z") else value for value in values.tolist()], dtype="datetime64[ms]")
+    if name in BOOL_COLUMNS:
+        values = np.array(values)
+        return values == "true" if BOOL_COLUMNS[name] is False else values != "false"
+    return decode_keys(values) if name == "key" else values
+
+def _split_csv_block(block, width):
+    """
+    Splits complete CSV lines into ´width´ column lists, or returns None. S3 writes every
+    field quoted and keys URL-encoded, so no field holds a quote: one ´str.split´ does it.
+    """
+    rows = block.count("\n")
+    if block.count('"') != 2 * width * rows:
+        return None
+    fields = block.replace('"\n"', '","')[1:-2].split('","')
+    if len(fields) != width * rows:
+        return None
+    return [fields[column::width] for column in range(width)]
+
+def _csv_text_batches(text, columns, batch_rows, skipped):
+    """
+    Column batches of CSV text, about ´batch_rows´ rows at a time (see ´_split_csv_block´).
+    Rows without one field per column are skipped and counted in ´skipped["rows"]´.
+    """
+    remainder = ""
+    while True:
+        chunk = text.read(batch_rows * 128)
+        if chunk:
+            block, newline, remainder = (remainder + chunk).rpartition("\n")
+            if not newline:  # a line longer than the chunk
+                continue
+            block += "\n"
+        elif remainder:  # last line without a newline
+            block, remainder = remainder + "\n", ""
+        else:
+            return
+        split = _split_csv_block(block, len(columns))
+        if split is None:
+            # Not the shape S3 writes (e.g. quoted newlines): the csv module reads the rest of the file.
+            reader = csv.reader(itertools.chain(io.StringIO(block + remainder), text))
+            for rows in iter(lambda: list(itertools.islice(reader, batch_rows)), []):
+                complete = [row for row in rows if len(row) == len(columns)]
+                skipped["rows"] += len(rows) - len(complete)
+                if complete:
+                    yield {name: _typed_csv_column(name, list(values)) for name, values in zip(columns, zip(*complete))}
+            return
+        yield {name: _typed_csv_column(name, values) for name, values in zip(columns, split)}
+
+def _csv_column_batches(opener, key, schema, batch_rows):
+    columns = [_column_name(column) for column in schema.split(',')]
+    skipped = {"rows": 0}
+    try:
+        yield from _csv_file_batches(opener, key, columns, batch_rows, skipped)
+    finally:
+        if skipped["rows"]:
+            print("Skipped {:,} malformed row(s) of '{}'".format(skipped["rows"], key), file=sys.stderr)
+
+def _skip_row(skipped):
+    def handler(row):
+        skipped["rows"] += 1
+        return 'skip'
+    return handler
+
+def _csv_file_batches(opener, key, columns, batch_rows, skipped):
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pyarrow_csv
+    except ImportError:
+        pyarrow_csv = None
+
+    with opener(key) as raw:
+        if pyarrow_csv is None:
+            text = gzip.open(raw, 'rt', encoding='utf-8', newline='') if key.endswith('.gz') else \
+                io.TextIOWrapper(raw, encoding='utf-8', newline='')
+            with text:
+                yield from _csv_text_batches(text, columns, batch_rows, skipped)
+            return
+
+        # pyarrow decompresses, parses and converts the file on several threads.
+        types = {name: pa.int64() for name in columns if name in INT_COLUMNS}
+        types.update({name: pa.timestamp('ms', tz='UTC') for name in columns if name in DATETIME_COLUMNS})
+        types.update({name: pa.bool_() for name in columns if name in BOOL_COLUMNS})
+        types.update({name: pa.string() for name in columns if name not in types})
+        stream = pa.input_stream(raw, compression='gzip' if key.endswith('.gz') else None)
+        reader = pyarrow_csv.open_csv(
+            stream,
+            read_options=pyarrow_csv.ReadOptions(column_names=columns, block_size=64 * 1024 * 1024),
+            parse_options=pyarrow_csv.ParseOptions(invalid_row_handler=_skip_row(skipped)),
+            convert_options=pyarrow_csv.ConvertOptions(column_types=types)
+        )
+        for batch in reader:
+            yield _arrow_columns(batch, decode=True)
+
+def _arrow_columns(batch, decode):
+    columns = {}
+    for name, column in zip(batch.schema.names, batch.columns):
+        name = _column_name(name)
+        if name in INT_COLUMNS:
+            columns[name] = column.fill_null(0).to_numpy()
+        elif name in DATETIME_COLUMNS:
+            columns[name] = column.to_numpy(zero_copy_only=False).astype("datetime64[ms]")
+        elif name in BOOL_COLUMNS:
+            columns[name] = column.fill_null(BOOL_COLUMNS[name]).to_numpy(zero_copy_only=False)
+        else:
+            columns[name] = _decode_arrow_keys(column) if decode and name == "key" else column
+    return columns
+
+def inventory_column_batches(opener, key, file_format='CSV', schema=None, batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    Yields an inventory data file in batches of columns (´{column: values}´, normalized
+    names) instead of one dict per row: ´size´ as int64, ´last_modified_date´ as UTC
+    datetime64, ´is_latest´ / ´is_delete_marker´ as booleans (NumPy arrays) and the
+    other columns as string columns, with keys decoded like ´inventory_rows´. CSV files
+    are parsed by pyarrow when installed (several times faster), otherwise ´batch_rows´
+    at a time. String columns are lists, or pyarrow arrays when pyarrow read the file:
+    ´string_column_startswith´ / ´_codes´ / ´_compress´ work on both.
+    """
+    if file_format == 'CSV':
+        yield from _csv_column_batches(opener, key, schema, batch_rows)
+        return
+    try:
+        import pyarrow.orc as orc
+        import pyarrow.parquet as parquet
+    except ImportError:
+        raise RuntimeError("pyarrow is required to read {} inventory files".format(file_format))
+    with opener(key) as raw, tempfile.TemporaryFile() as spool:
+        for chunk in iter(lambda: raw.read(1024 * 1024), b''):
+            spool.write(chunk)
+        spool.seek(0)
+        if file_format == 'Parquet':
+            batches = parquet.ParquetFile(spool).iter_batches(batch_size=batch_rows)
+        else:
+            reader = orc.ORCFile(spool)
+            batches = (reader.read_stripe(i) for i in range(reader.nstripes))
+        for batch in batches:
+            yield _arrow_columns(batch, decode=False)
+
+def current_object_batches(opener, key, file_format='CSV', schema=None, batch_rows=DEFAULT_BATCH_ROWS):
+    """´inventory_column_batches´ without the noncurrent versions and delete markers of versioned inventories"""
+    for columns in inventory_column_batches(opener, key, file_format, schema, batch_rows):
+        keep = None
+        if "is_latest" in columns:
+            keep = columns["is_latest"]
+        if "is_delete_marker" in columns:
+            keep = ~columns["is_delete_marker"] if keep is None else keep & ~columns["is_delete_marker"]
+        if keep is not None and not keep.all():
+            columns = {
+                name: string_column_compress(values, keep) if name not in NUMPY_COLUMNS else values[keep]
+                for name, values in columns.items()
+            }
+        yield columns
+
+def inventory_rows(opener, file_entry, manifest):
+    """Yields every row of an inventory data file as a dict with normalized column names"""
+    file_format = manifest.get('fileFormat', 'CSV')
+    if file_format == 'CSV':
+        return _csv_rows(opener, file_entry['key'], manifest['fileSchema'])
+    return _columnar_rows(opener, file_entry['key'], file_format)
+
+# ---- 4. Statistics ----
+
+def _file_stats(opener, file_entry, manifest, sample_size):
+    stats = new_object_stats(sample_size)
+    for row in inventory_rows(opener, file_entry, manifest):
+        # Versioned inventories also list noncurrent versions and delete markers.
+        if _parse_bool(row.get('is_latest')) is False or _parse_bool(row.get('is_delete_marker')):
+            continue
+        size = row.get('size')
+        add_object(
+            stats,
+            row['key'],
+            int(size) if size not in (None, '') else 0,
+            row.get('storage_class'),
+            _parse_datetime(row.get('last_modified_date'))
+        )
+    return stats
+
+def inventory_object_stats(opener, manifest, sample_size=DEFAULT_SAMPLE_SIZE, max_workers=DEFAULT_INVENTORY_WORKERS):
+    """
+    Computes the object statistics of a bucket from its inventory files.
+
+    Files are streamed and processed in parallel; results are merged in manifest order.
+    """
+    files = manifest.get('files', [])
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files) or 1))) as executor:
+        results = list(executor.map(lambda entry: _file_stats(opener, entry, manifest, sample_size), files))
+
+    stats = new_object_stats(sample_size)
+    for file_stats in results:
+        merge_object_stats(stats, file_stats)
+    return stats
+
+def inventory_stats_from_local(manifest_path, data_root=None, sample_size=DEFAULT_SAMPLE_SIZE, max_workers=DEFAULT_INVENTORY_WORKERS):
+    """
+    Computes the object statistics from an inventory copied to local disk.
+    """
+    data_root = data_root or os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'rb') as f:
+        manifest = json.load(f)
+    return inventory_object_stats(local_file_opener(data_root), manifest, sample_size, max_workers)
+
+def bucket_object_stats(s3_client, bucket, sample_size=DEFAULT_SAMPLE_SIZE, max_workers=DEFAULT_INVENTORY_WORKERS, list_workers=DEFAULT_LIST_WORKERS):
+    """
+    Returns ´(stats, source)´ for the bucket, reading its latest S3 Inventory when one is
+    configured and delivered, and falling back to a live listing (sharded over
+    ´list_workers´ threads) otherwise.
+    """
+    destination = get_inventory_destination(s3_client, bucket)
+    if destination is not None:
+        try:
+            manifest_key = find_latest_manifest_key(s3_client, destination, bucket)
+            if manifest_key:
+                opener = s3_file_opener(s3_client, destination["bucket"])
+                manifest = load_manifest(opener, manifest_key)
+                return inventory_object_stats(opener, manifest, sample_size, max_workers), "inventory"
+            print("No inventory delivered yet for bucket '{}', listing it instead.".format(bucket))
+        except Exception as e:
+            print("Error reading inventory of bucket '{}', listing it instead: {}".format(bucket, e), file=sys.stderr)
+
+    return parallel_object_stats(s3_client, bucket, sample_size=sample_size, max_workers=list_workers), "listing"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Object statistics from an S3 Inventory manifest on local disk.")
+    parser.add_argument("manifest", help="Path to manifest.json")
+    parser.add_argument("--data-root", help="Local copy of the destination bucket (default: the manifest folder).")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_INVENTORY_WORKERS)
+    args = parser.parse_args()
+
+    stats = inventory_stats_from_local(args.manifest, args.data_root, args.sample_size, args.workers)
+    report = {"object_count": stats["count"], "object_key": stats["sample_keys"]}
+    report.update(object_stats_report(stats))
+    print(json.dumps(report, indent=4, ensure_ascii=False))
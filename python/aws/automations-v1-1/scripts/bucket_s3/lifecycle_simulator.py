@@ -0,0 +1,419 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
+from scripts.bucket_s3.inventory import (
+    current_object_batches,
+    local_inventory_files,
+    local_inventory_opener,
+    string_column_codes,
+    string_column_startswith
+)
+from scripts.bucket_s3.listing_snapshot import close_snapshot, iter_snapshot, open_snapshot
+from scripts.bucket_s3.region_pool import resolve_bucket_regions
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+# In lifecycle waterfall order: a transition only moves objects to a class further down.
+STORAGE_CLASSES = [
+    "STANDARD", "REDUCED_REDUNDANCY", "STANDARD_IA", "INTELLIGENT_TIERING",
+    "ONEZONE_IA", "GLACIER_IR", "GLACIER", "DEEP_ARCHIVE"
+]
+STORAGE_CLASS_CODES = {name: code for code, name in enumerate(STORAGE_CLASSES)}
+# us-east-1 list prices (USD). INTELLIGENT_TIERING is priced at its frequent access tier.
+PRICES_PER_GB_MONTH = {
+    "STANDARD": 0.023, "REDUCED_REDUNDANCY": 0.024, "STANDARD_IA": 0.0125, "INTELLIGENT_TIERING": 0.023,
+    "ONEZONE_IA": 0.01, "GLACIER_IR": 0.004, "GLACIER": 0.0036, "DEEP_ARCHIVE": 0.00099
+}
+TRANSITION_PRICES_PER_1000 = {
+    "STANDARD_IA": 0.01, "INTELLIGENT_TIERING": 0.01, "ONEZONE_IA": 0.01,
+    "GLACIER_IR": 0.02, "GLACIER": 0.03, "DEEP_ARCHIVE": 0.05
+}
+GB = 1024 ** 3
+DAYS_PER_MONTH = 30
+DEFAULT_MONTHS = 12
+# Without a size filter, S3 does not transition objects smaller than 128 KB.
+MIN_TRANSITION_SIZE = 128 * 1024
+MAX_RULE_PREFIXES = 64  # one bit per prefix in the ´prefix_mask´ column
+INVENTORY_SCHEMA = "Bucket, Key, Size, LastModifiedDate, StorageClass"
+# Rows per column batch built from a listing or snapshot.
+ROW_BATCH_SIZE = 100_000
+# Inventory data files parsed at the same time, one process each.
+DEFAULT_LOAD_WORKERS = os.cpu_count() or 1
+LISTING_COLUMNS = {"size": np.int64, "mtime": np.float64, "storage_class": np.int8, "prefix_mask": np.uint64}
+# Capacity added when the listing columns are full (a fraction of their length).
+LISTING_GROWTH = 1.25
+
+# ---- 1. Listing Columns ----
+
+def rule_prefixes(rules):
+    """Distinct non-empty prefixes of the rules (´Filter.Prefix´, ´Filter.And.Prefix´ or legacy ´Prefix´)"""
+    prefixes = sorted({_rule_filter(rule).get("Prefix") or "" for rule in rules} - {""})
+    if len(prefixes) > MAX_RULE_PREFIXES:
+        raise ValueError("At most {} distinct rule prefixes can be simulated".format(MAX_RULE_PREFIXES))
+    return prefixes
+
+def pack_batch(batch, prefixes=()):
+    """
+    Packs one column batch (´{"key", "size", "mtime", "storage_class"}´, see
+    ´iter_row_batches´ / ´iter_inventory_batches´) into the NumPy columns of a listing:
+    size, mtime (epoch seconds), storage class code and a bit mask of the ´prefixes´
+    each key starts with. Keys themselves are not kept.
+    """
+    keys = batch["key"]
+    mask = np.zeros(len(keys), dtype=np.uint64)
+    for bit, prefix in enumerate(prefixes):
+        mask[string_column_startswith(keys, prefix)] |= np.uint64(1 << bit)
+    return {
+        "size": np.asarray(batch["size"], dtype=np.int64),
+        "mtime": np.asarray(batch["mtime"], dtype=np.float64),
+        # Empty or unknown classes count as STANDARD (code 0).
+        "storage_class": string_column_codes(batch["storage_class"], STORAGE_CLASS_CODES, 0, np.int8),
+        "prefix_mask": mask
+    }
+
+def concatenate_packed(chunks):
+    """
+    Joins packed chunks into one array per column as they come. Each chunk is copied
+    and dropped right away, and the columns grow in place (´ndarray.resize´ reallocates
+    without copying large arrays), so memory stays near the final columns plus one
+    chunk instead of twice the columns.
+    """
+    columns = {name: np.empty(0, dtype=dtype) for name, dtype in LISTING_COLUMNS.items()}
+    used = 0
+    for chunk in chunks:
+        rows = len(chunk["size"])
+        if used + rows > len(columns["size"]):
+            capacity = max(used + rows, int(len(columns["size"]) * LISTING_GROWTH))
+            for values in columns.values():
+                values.resize(capacity, refcheck=False)
+        for name, values in chunk.items():
+            columns[name][used:used + rows] = values
+        used += rows
+    for values in columns.values():
+        values.resize(used, refcheck=False)
+    return columns
+
+def build_listing(batches, prefixes=()):
+    """
+    Packs column batches (see ´pack_batch´) into the columns of one listing, 100M
+    rows in about 2.5 GB. ´batches´ may also yield chunks already packed.
+    """
+    started = time.perf_counter()
+    listing = concatenate_packed(batch if "prefix_mask" in batch else pack_batch(batch, prefixes) for batch in batches)
+    listing["prefixes"] = list(prefixes)
+    listing["load_seconds"] = time.perf_counter() - started
+    return listing
+
+def iter_row_batches(rows, batch_size=ROW_BATCH_SIZE):
+    """Groups ´(key, size, last_modified, storage_class)´ rows into the column batches of ´build_listing´"""
+    rows = iter(rows)
+    for chunk in iter(lambda: list(itertools.islice(rows, batch_size)), []):
+        keys, sizes, modified, classes = zip(*chunk)
+        yield {"key": keys, "size": sizes, "mtime": [value.timestamp() for value in modified], "storage_class": classes}
+
+def iter_bucket_rows(s3_client, bucket_name, prefix=''):
+    """Current objects of the bucket as listing rows, page by page"""
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            yield obj['Key'], obj['Size'], obj['LastModified'], obj.get('StorageClass')
+
+def iter_file_batches(data_root, key, file_format='CSV', file_schema=INVENTORY_SCHEMA):
+    """
+    Column batches of one inventory data file (see ´inventory.local_inventory_files´),
+    read in bulk by ´inventory.current_object_batches´: noncurrent versions and delete
+    markers are skipped.
+    """
+    for columns in current_object_batches(local_inventory_opener(data_root), key, file_format, file_schema):
+        yield {
+            "key": columns["key"],
+            "size": columns["size"],
+            "mtime": columns["last_modified_date"].astype(np.int64) / 1000,
+            "storage_class": columns["storage_class"] if "storage_class" in columns else [None] * len(columns["size"])
+        }
+
+def iter_inventory_batches(path, schema=INVENTORY_SCHEMA):
+    """
+    Column batches of every data file of an S3 Inventory (a ´manifest.json´ or a single
+    CSV file with ´schema´, see ´inventory.local_inventory_files´), one file after another.
+    """
+    for data_root, key, file_format, file_schema in local_inventory_files(path, schema):
+        yield from iter_file_batches(data_root, key, file_format, file_schema)
+
+def _pack_file_logic(job):
+    data_root, key, file_format, file_schema, prefixes = job
+    return concatenate_packed([pack_batch(batch, prefixes) for batch in iter_file_batches(data_root, key, file_format, file_schema)])
+
+def iter_packed_inventory(path, prefixes=(), schema=INVENTORY_SCHEMA, max_workers=DEFAULT_LOAD_WORKERS):
+    """
+    Packed chunks (see ´pack_batch´) of every data file of an S3 Inventory, in manifest
+    order. Up to ´max_workers´ files are parsed at the same time, each in its own
+    process, so large inventories (100M rows are split across many files) load on every core.
+    """
+    jobs = [entry + (list(prefixes),) for entry in local_inventory_files(path, schema)]
+    if len(jobs) < 2 or max_workers <= 1:
+        for job in jobs:
+            yield _pack_file_logic(job)
+        return
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        yield from executor.map(_pack_file_logic, jobs)
+
+def iter_snapshot_rows(path):
+    """Rows of a listing snapshot (see ´listing_snapshot´), without listing the bucket again"""
+    snapshot = open_snapshot(path)
+    try:
+        for key, size, mtime, storage_class in iter_snapshot(snapshot):
+            yield key, size, datetime.fromtimestamp(mtime, timezone.utc), storage_class
+    finally:
+        close_snapshot(snapshot)
+
+# ---- 2. Rules ----
+
+def _rule_filter(rule):
+    if "Filter" not in rule:
+        return {"Prefix": rule.get("Prefix", "")}
+    return rule["Filter"].get("And") or rule["Filter"] or {}
+
+def rule_steps(rules):
+    """
+    Returns the transition/expiration steps of the enabled rules, in the order S3 applies
+    them: by day, expiration before transition, cheaper class before dearer. Also returns
+    notes about the parts of the rules the simulation does not cover.
+    """
+    steps, notes = [], []
+    for index, rule in enumerate(rules):
+        rule_id = rule.get("ID") or rule.get("Id") or "rule {}".format(index + 1)
+        if rule.get("Status") != "Enabled":
+            notes.append("{}: disabled, not simulated".format(rule_id))
+            continue
+        rule_filter = _rule_filter(rule)
+        if "Tag" in rule_filter or "Tags" in rule_filter:
+            notes.append("{}: tag filters cannot be evaluated from a listing, not simulated".format(rule_id))
+            continue
+        for action in ("NoncurrentVersionTransitions", "NoncurrentVersionExpiration", "AbortIncompleteMultipartUpload"):
+            if rule.get(action):
+                notes.append("{}: {} does not act on current objects, not simulated".format(rule_id, action))
+        actions = [(transition, transition.get("StorageClass")) for transition in rule.get("Transitions", [])]
+        if rule.get("Expiration"):
+            actions.append((rule["Expiration"], None))
+        for action, storage_class in actions:
+            if "Days" not in action:
+                notes.append("{}: only day-based actions are simulated".format(rule_id))
+                continue
+            if storage_class is not None and storage_class not in STORAGE_CLASS_CODES:
+                raise ValueError("{}: unknown storage class '{}'".format(rule_id, storage_class))
+            steps.append({
+                "rule": rule_id,
+                "filter": rule_filter,
+                "days": int(action["Days"]),
+                "storage_class": storage_class
+            })
+    steps.sort(key=lambda step: (step["days"], step["storage_class"] is not None,
+                                 -STORAGE_CLASS_CODES.get(step["storage_class"], 0)))
+    return steps, notes
+
+def _filter_mask(listing, rule_filter, transition):
+    """Objects matched by the prefix and size filters of a rule, as a boolean column"""
+    size = listing["size"]
+    mask = np.ones(len(size), dtype=bool)
+    prefix = rule_filter.get("Prefix") or ""
+    if prefix:
+        bit = np.uint64(1 << listing["prefixes"].index(prefix))
+        mask &= (listing["prefix_mask"] & bit) != 0
+    if "ObjectSizeGreaterThan" in rule_filter:
+        mask &= size > int(rule_filter["ObjectSizeGreaterThan"])
+    if "ObjectSizeLessThan" in rule_filter:
+        mask &= size < int(rule_filter["ObjectSizeLessThan"])
+    if transition and "ObjectSizeGreaterThan" not in rule_filter and "ObjectSizeLessThan" not in rule_filter:
+        mask &= size >= MIN_TRANSITION_SIZE
+    return mask
+
+# ---- 3. Simulation ----
+
+def simulate_lifecycle(rules, listing, months=DEFAULT_MONTHS, as_of=None, prices=None):
+    """
+    Projects ´rules´ over the listing for ´months´ months, with whole-column NumPy operations.
+
+    Each step runs once over every object: the objects it affects are those matched by
+    its rule, not yet expired, still in a dearer class and reaching its age within the
+    horizon. The month each object is affected in comes from its age, and bytes moved
+    per (month, class) are accumulated with ´bincount´, so the cost of every month
+    follows from cumulative sums instead of re-running the rules per month.
+    """
+    prices = dict(PRICES_PER_GB_MONTH, **(prices or {}))
+    price_vector = np.array([prices[name] for name in STORAGE_CLASSES])
+    classes_count = len(STORAGE_CLASSES)
+    as_of = (as_of or datetime.now(timezone.utc)).timestamp()
+    started = time.perf_counter()
+
+    size = listing["size"]
+    age = ((as_of - listing["mtime"]) / 86400).astype(np.float32)
+    storage_class = listing["storage_class"].copy()
+    expired = np.zeros(len(size), dtype=bool)
+    horizon = months * DAYS_PER_MONTH
+    # Bytes/objects entering (+) and leaving (-) each class, per month of the horizon.
+    bytes_delta = np.zeros((months + 1, classes_count))
+    objects_delta = np.zeros((months + 1, classes_count), dtype=np.int64)
+    initial_bytes = np.bincount(storage_class, weights=size, minlength=classes_count)
+    initial_objects = np.bincount(storage_class, minlength=classes_count)
+
+    steps, notes = rule_steps(rules)
+    results = []
+    for step in steps:
+        transition = step["storage_class"] is not None
+        mask = _filter_mask(listing, step["filter"], transition) & ~expired & (age + horizon >= step["days"])
+        if transition:
+            target = STORAGE_CLASS_CODES[step["storage_class"]]
+            mask &= storage_class < target
+        affected = np.flatnonzero(mask)
+        month = np.clip(np.ceil((step["days"] - age[affected]) / DAYS_PER_MONTH), 0, months).astype(np.int64)
+        moved = size[affected].astype(np.float64)
+
+        cells = month * classes_count + storage_class[affected]
+        bytes_delta -= np.bincount(cells, weights=moved, minlength=bytes_delta.size).reshape(bytes_delta.shape)
+        objects_delta -= np.bincount(cells, minlength=objects_delta.size).reshape(objects_delta.shape)
+        if transition:
+            bytes_delta[:, target] += np.bincount(month, weights=moved, minlength=months + 1)
+            objects_delta[:, target] += np.bincount(month, minlength=months + 1)
+            storage_class[affected] = target
+        else:
+            expired[affected] = True
+
+        due_now = month == 0
+        results.append({
+            "rule": step["rule"],
+            "days": step["days"],
+            "action": "transition to {}".format(step["storage_class"]) if transition else "expire",
+            "objects": int(len(affected)),
+            "bytes": int(moved.sum()),
+            "objects_due_now": int(np.count_nonzero(due_now)),
+            "bytes_due_now": int(moved[due_now].sum()),
+            "request_cost": len(affected) / 1000 * TRANSITION_PRICES_PER_1000.get(step["storage_class"], 0.0)
+        })
+
+    bytes_by_month = initial_bytes + np.cumsum(bytes_delta, axis=0)
+    objects_by_month = initial_objects + np.cumsum(objects_delta, axis=0)
+    baseline_cost = float(initial_bytes / GB @ price_vector)
+    projection = [
+        {
+            "month": month,
+            "objects": int(objects_by_month[month].sum()),
+            "bytes": int(bytes_by_month[month].sum()),
+            "cost": float(bytes_by_month[month] / GB @ price_vector),
+            "bytes_by_class": {name: int(value) for name, value in zip(STORAGE_CLASSES, bytes_by_month[month]) if value}
+        }
+        for month in range(months + 1)
+    ]
+    return {
+        "objects": int(len(size)),
+        "bytes": int(size.sum()),
+        "baseline_cost": baseline_cost,
+        "steps": results,
+        "projection": projection,
+        "notes": notes,
+        "load_seconds": listing.get("load_seconds", 0.0),
+        "seconds": time.perf_counter() - started
+    }
+
+def simulate_bucket(bucket_name, rules, months=DEFAULT_MONTHS, profile_name=None, inventory=None,
+                    schema=INVENTORY_SCHEMA, prices=None, snapshot=None, load_workers=DEFAULT_LOAD_WORKERS):
+    """Loads the current listing of the bucket (or an inventory / snapshot) and simulates ´rules´ over it"""
+    prefixes = rule_prefixes(rules)
+    if snapshot:
+        batches = iter_row_batches(iter_snapshot_rows(snapshot))
+    elif inventory:
+        batches = iter_packed_inventory(inventory, prefixes, schema, load_workers)
+    else:
+        region = resolve_bucket_regions(get_client('s3', profile_name=profile_name), [{'Name': bucket_name}]).get(bucket_name)
+        # Only keys under the common prefix of the rules can match ("" when a rule covers the whole bucket).
+        common = os.path.commonprefix([_rule_filter(rule).get("Prefix") or "" for rule in rules]) if rules else ""
+        batches = iter_row_batches(iter_bucket_rows(get_client('s3', region, profile_name), bucket_name, common))
+    listing = build_listing(batches, prefixes)
+    return simulate_lifecycle(rules, listing, months, prices=prices)
+
+# ---- 4. Report ----
+
+def _print_table(header, rows):
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    print(" | ".join(cell.ljust(width) for cell, width in zip(header, widths)))
+    print("-+-".join("-" * width for width in widths))
+    for row in rows:
+        print(" | ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+def print_simulation(simulation):
+    print("\nLoaded {:,} object(s), {:,.2f} GB in {:.2f}s; simulated in {:.2f}s. Current cost: ${:,.2f}/month.\n".format(
+        simulation["objects"], simulation["bytes"] / GB, simulation["load_seconds"], simulation["seconds"],
+        simulation["baseline_cost"]))
+    _print_table(
+        ["DAY", "RULE", "ACTION", "OBJECTS", "GB", "DUE NOW", "GB NOW", "REQUESTS $"],
+        [
+            [str(step["days"]), step["rule"], step["action"], "{:,}".format(step["objects"]),
+             "{:,.2f}".format(step["bytes"] / GB), "{:,}".format(step["objects_due_now"]),
+             "{:,.2f}".format(step["bytes_due_now"] / GB), "{:,.2f}".format(step["request_cost"])]
+            for step in simulation["steps"]
+        ]
+    )
+    print()
+    _print_table(
+        ["MONTH", "OBJECTS", "STORED GB", "COST $", "SAVED $"],
+        [
+            [str(month["month"]), "{:,}".format(month["objects"]), "{:,.2f}".format(month["bytes"] / GB),
+             "{:,.2f}".format(month["cost"]), "{:,.2f}".format(simulation["baseline_cost"] - month["cost"])]
+            for month in simulation["projection"]
+        ]
+    )
+    for step in simulation["steps"]:
+        if not step["objects"]:
+            print("Warning: '{}' ({} at day {}) affects no object; check its prefix.".format(
+                step["rule"], step["action"], step["days"]))
+    for note in simulation["notes"]:
+        print("Note: {}".format(note))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulates lifecycle rules over a bucket listing or inventory: objects/bytes per step and monthly cost."
+    )
+    parser.add_argument("bucket", help="Name of the bucket")
+    parser.add_argument("rules", help="JSON file with a lifecycle configuration ({\"Rules\": [...]}) or a list of rules")
+    parser.add_argument("--inventory", help="S3 Inventory manifest.json, or one CSV file (.csv or .csv.gz), to use instead of listing the bucket.")
+    parser.add_argument("--snapshot", help="Listing snapshot (see listing_snapshot) to use instead of listing the bucket.")
+    parser.add_argument("--schema", default=INVENTORY_SCHEMA, help="fileSchema of the inventory (default: '{}').".format(INVENTORY_SCHEMA))
+    parser.add_argument("--load-workers", type=int, default=DEFAULT_LOAD_WORKERS,
+                        help="Inventory data files parsed at the same time (default: {}, the number of CPUs).".format(DEFAULT_LOAD_WORKERS))
+    parser.add_argument("--months", type=int, default=DEFAULT_MONTHS, help="Months projected (default: {}).".format(DEFAULT_MONTHS))
+    parser.add_argument("--prices", help="JSON file overriding the USD per GB-month of storage classes.")
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--output", help="JSON file for the simulation.")
+    args = parser.parse_args()
+
+    try:
+        with open(args.rules, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        prices = None
+        if args.prices:
+            with open(args.prices, 'r', encoding='utf-8') as f:
+                prices = json.load(f)
+    except (OSError, ValueError) as e:
+        print("Error reading '{}': {}".format(args.rules, e), file=sys.stderr)
+        sys.exit(1)
+    rules = rules.get("Rules", []) if isinstance(rules, dict) else rules
+
+    try:
+        result = simulate_bucket(args.bucket, rules, args.months, args.profile, args.inventory, args.schema, prices, args.snapshot,
+                                 args.load_workers)
+    except Exception as e:
+        print("Error simulating lifecycle rules of '{}': {}".format(args.bucket, e), file=sys.stderr)
+        sys.exit(1)
+    print_simulation(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=4)
+        print("Simulation saved to '{}'".format(args.output))
@@ -0,0 +1,359 @@
+import argparse
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime, timezone
+from scripts.bucket_s3.region_pool import resolve_bucket_regions
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+# File layout: a fixed header, then 8-byte aligned sections (offsets are in the header):
+#   keys        sorted UTF-8 keys, front-coded in blocks of ´block_size´ keys
+#   blocks      uint64 offset of each block in ´keys´ (the first key of a block is stored whole)
+#   size        int64 per key
+#   mtime       int64 per key (epoch seconds)
+#   class       uint8 per key (index into the ´storage_classes´ of the metadata)
+#   cumulative  int64 per key + 1: bytes of all keys before it (the prefix index)
+#   metadata    JSON (bucket, prefix, created, storage_classes)
+MAGIC = b"S3SNAP01"
+HEADER = struct.Struct("<8s16Q")
+SECTIONS = ["keys", "blocks", "size", "mtime", "class", "cumulative", "metadata"]
+COLUMN_FORMATS = {"blocks": "Q", "size": "q", "mtime": "q", "class": "B", "cumulative": "q"}
+DEFAULT_BLOCK_SIZE = 32
+FLUSH_ROWS = 65536
+MB = 1024 ** 2
+
+# ---- 1. Writing ----
+
+def _encode_varint(value):
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+def _read_varint(buffer, offset):
+    value = shift = 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def _shared_length(previous, key):
+    limit = min(len(previous), len(key))
+    shared = 0
+    while shared < limit and previous[shared] == key[shared]:
+        shared += 1
+    return shared
+
+def write_snapshot(path, rows, metadata=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Writes ´(key, size, mtime, storage_class)´ rows, sorted by key as S3 lists them, to
+    a snapshot file. Sections are streamed to temporary files and joined at the end, so
+    memory does not grow with the listing. Returns the number of keys written.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    storage_classes = {}
+    count = keys_length = total = 0
+    previous = None
+    with tempfile.TemporaryDirectory(dir=directory) as parts:
+        files = {name: open(os.path.join(parts, name), 'wb') for name in SECTIONS[:-1]}
+        columns = {name: array(fmt) for name, fmt in COLUMN_FORMATS.items()}
+
+        def flush():
+            for name, column in columns.items():
+                column.tofile(files[name])
+                del column[:]
+
+        for key, size, mtime, storage_class in rows:
+            key = key.encode('utf-8')
+            if previous is not None and key <= previous:
+                raise ValueError("Keys must be unique and sorted: '{}' after '{}'".format(
+                    key.decode('utf-8'), previous.decode('utf-8')))
+            if count % block_size == 0:
+                columns["blocks"].append(keys_length)
+                record = _encode_varint(len(key)) + key
+            else:
+                shared = _shared_length(previous, key)
+                record = _encode_varint(shared) + _encode_varint(len(key) - shared) + key[shared:]
+            files["keys"].write(record)
+            keys_length += len(record)
+            columns["size"].append(size)
+            columns["mtime"].append(int(mtime))
+            columns["class"].append(storage_classes.setdefault(storage_class or "STANDARD", len(storage_classes)))
+            columns["cumulative"].append(total)
+            total += size
+            previous = key
+            count += 1
+            if count % FLUSH_ROWS == 0:
+                flush()
+        columns["cumulative"].append(total)
+        flush()
+
+        metadata = dict(metadata or {}, storage_classes=list(storage_classes))
+        files["metadata"] = open(os.path.join(parts, "metadata"), 'wb')
+        files["metadata"].write(json.dumps(metadata, ensure_ascii=False).encode('utf-8'))
+        for f in files.values():
+            f.close()
+
+        offsets, position = [], HEADER.size
+        for name in SECTIONS:
+            position += -position % 8
+            length = os.path.getsize(os.path.join(parts, name))
+            offsets.extend([position, length])
+            position += length
+
+        temporary = path + ".tmp"
+        with open(temporary, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, count, block_size, *offsets))
+            for name, offset in zip(SECTIONS, offsets[::2]):
+                out.write(b"\0" * (offset - out.tell()))
+                with open(os.path.join(parts, name), 'rb') as section:
+                    shutil.copyfileobj(section, out, MB)
+        os.replace(temporary, path)
+    return count
+
+def snapshot_bucket(bucket_name, path, prefix='', profile_name=None):
+    """Lists the bucket (under ´prefix´) once and writes the snapshot. Returns the number of keys."""
+    region = resolve_bucket_regions(get_client('s3', profile_name=profile_name), [{'Name': bucket_name}]).get(bucket_name)
+    s3_client = get_client('s3', region, profile_name)
+
+    def rows():
+        for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key'], obj['Size'], obj['LastModified'].timestamp(), obj.get('StorageClass')
+
+    metadata = {"bucket": bucket_name, "prefix": prefix, "created": datetime.now(timezone.utc).isoformat()}
+    return write_snapshot(path, rows(), metadata)
+
+# ---- 2. Reading ----
+
+def open_snapshot(path):
+    """
+    Maps the snapshot read-only. Columns are ´memoryview´s over the mapping, so opening
+    costs the same for any size and only the pages touched by a query are read.
+    """
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header = HEADER.unpack_from(mapping, 0)
+    if header[0] != MAGIC:
+        mapping.close()
+        raise ValueError("'{}' is not a listing snapshot".format(path))
+    count, block_size, offsets = header[1], header[2], header[3:]
+    view = memoryview(mapping)
+    sections = {
+        name: view[offset:offset + length]
+        for name, offset, length in zip(SECTIONS, offsets[::2], offsets[1::2])
+    }
+    snapshot = {
+        "path": path,
+        "mapping": mapping,
+        "views": [view] + list(sections.values()),
+        "count": count,
+        "block_size": block_size,
+        "keys": sections["keys"],
+        "metadata": json.loads(bytes(sections["metadata"]).decode('utf-8'))
+    }
+    for name, fmt in COLUMN_FORMATS.items():
+        snapshot[name] = sections[name].cast(fmt)
+        snapshot["views"].append(snapshot[name])
+    return snapshot
+
+def close_snapshot(snapshot):
+    for view in reversed(snapshot["views"]):
+        view.release()
+    snapshot["mapping"].close()
+
+def _block_head(snapshot, block):
+    keys = snapshot["keys"]
+    length, offset = _read_varint(keys, snapshot["blocks"][block])
+    return bytes(keys[offset:offset + length])
+
+def _iter_keys(snapshot, start=0):
+    """Yields ´(index, key_bytes)´ from key ´start´ on, decoding from the start of its block"""
+    keys, block_size, count = snapshot["keys"], snapshot["block_size"], snapshot["count"]
+    index = start - start % block_size
+    offset = snapshot["blocks"][index // block_size] if index < count else 0
+    key = b""
+    while index < count:
+        if index % block_size == 0:
+            length, offset = _read_varint(keys, offset)
+            key = bytes(keys[offset:offset + length])
+        else:
+            shared, offset = _read_varint(keys, offset)
+            length, offset = _read_varint(keys, offset)
+            key = key[:shared] + bytes(keys[offset:offset + length])
+        offset += length
+        if index >= start:
+            yield index, key
+        index += 1
+
+def _lower_bound(snapshot, target):
+    """Index of the first key >= ´target´ (bytes): binary search over block heads, then one block scan"""
+    low, high = 0, len(snapshot["blocks"])
+    while low < high:
+        middle = (low + high) // 2
+        if _block_head(snapshot, middle) <= target:
+            low = middle + 1
+        else:
+            high = middle
+    if low == 0:
+        return 0
+    start = (low - 1) * snapshot["block_size"]
+    for index, key in _iter_keys(snapshot, start):
+        if key >= target or index >= start + snapshot["block_size"]:
+            return index
+    return snapshot["count"]
+
+def prefix_range(snapshot, prefix):
+    """´(first, end)´ indexes of the keys starting with ´prefix´, in O(log n)"""
+    prefix = prefix.encode('utf-8')
+    if not prefix:
+        return 0, snapshot["count"]
+    successor = prefix.rstrip(b"\xff")
+    successor = successor[:-1] + bytes([successor[-1] + 1]) if successor else None
+    first = _lower_bound(snapshot, prefix)
+    return first, _lower_bound(snapshot, successor) if successor else snapshot["count"]
+
+def prefix_summary(snapshot, prefix):
+    """Objects and bytes under ´prefix´, from two binary searches and the cumulative column"""
+    first, end = prefix_range(snapshot, prefix)
+    cumulative = snapshot["cumulative"]
+    return {"prefix": prefix, "objects": end - first, "bytes": cumulative[end] - cumulative[first]}
+
+def prefix_children(snapshot, prefix='', delimiter="/"):
+    """
+    Summaries of the "folders" right under ´prefix´ (like a listing with a delimiter),
+    plus one entry for the objects directly under it. Skips each folder with one
+    binary search, so the cost grows with the number of folders, not of keys.
+    """
+    first, end = prefix_range(snapshot, prefix)
+    children, direct = [], {"prefix": prefix + "(objects)", "objects": 0, "bytes": 0}
+    index = first
+    while index < end:
+        _, key = next(_iter_keys(snapshot, index))
+        rest = key.decode('utf-8')[len(prefix):]
+        cut = rest.find(delimiter)
+        if cut < 0:
+            direct["objects"] += 1
+            direct["bytes"] += snapshot["size"][index]
+            index += 1
+            continue
+        child = prefix_summary(snapshot, prefix + rest[:cut + len(delimiter)])
+        children.append(child)
+        index += child["objects"]
+    return children + ([direct] if direct["objects"] else [])
+
+def iter_snapshot(snapshot, prefix=''):
+    """Yields ´(key, size, mtime, storage_class)´ of every key under ´prefix´, in key order"""
+    first, end = prefix_range(snapshot, prefix)
+    storage_classes = snapshot["metadata"]["storage_classes"]
+    for index, key in _iter_keys(snapshot, first):
+        if index >= end:
+            return
+        yield (key.decode('utf-8'), snapshot["size"][index], snapshot["mtime"][index],
+               storage_classes[snapshot["class"][index]])
+
+# ---- 3. Diff ----
+
+def diff_snapshots(old, new, prefix=''):
+    """
+    Merge-joins the keys of two snapshots under ´prefix´ and yields
+    ´(key, old_row, new_row)´ for keys added (old_row None), removed (new_row None)
+    or changed (size, mtime or storage class).
+    """
+    old_rows, new_rows = iter_snapshot(old, prefix), iter_snapshot(new, prefix)
+    old_row, new_row = next(old_rows, None), next(new_rows, None)
+    while old_row is not None or new_row is not None:
+        if new_row is None or (old_row is not None and old_row[0] < new_row[0]):
+            yield old_row[0], old_row, None
+            old_row = next(old_rows, None)
+        elif old_row is None or new_row[0] < old_row[0]:
+            yield new_row[0], None, new_row
+            new_row = next(new_rows, None)
+        else:
+            if old_row[1:] != new_row[1:]:
+                yield old_row[0], old_row, new_row
+            old_row, new_row = next(old_rows, None), next(new_rows, None)
+
+def diff_summary(old, new, prefix='', changes_file=None):
+    """Counts and bytes of the diff; every change is written to ´changes_file´ (NDJSON) when given"""
+    summary = {"added": 0, "added_bytes": 0, "removed": 0, "removed_bytes": 0, "changed": 0, "changed_bytes_delta": 0}
+    out = open(changes_file, 'w', encoding='utf-8') if changes_file else None
+    try:
+        for key, old_row, new_row in diff_snapshots(old, new, prefix):
+            if old_row is None:
+                change = "added"
+                summary["added"] += 1
+                summary["added_bytes"] += new_row[1]
+            elif new_row is None:
+                change = "removed"
+                summary["removed"] += 1
+                summary["removed_bytes"] += old_row[1]
+            else:
+                change = "changed"
+                summary["changed"] += 1
+                summary["changed_bytes_delta"] += new_row[1] - old_row[1]
+            if out:
+                out.write(json.dumps({"key": key, "change": change, "old": old_row and list(old_row[1:]),
+                                      "new": new_row and list(new_row[1:])}, ensure_ascii=False) + "\n")
+    finally:
+        if out:
+            out.close()
+    new_total = prefix_summary(new, prefix)
+    summary["unchanged"] = new_total["objects"] - summary["added"] - summary["changed"]
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact, memory-mapped snapshots of bucket listings.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="List a bucket once and write its snapshot.")
+    create.add_argument("bucket", help="Name of the bucket")
+    create.add_argument("snapshot", help="Snapshot file to write")
+    create.add_argument("--prefix", default="", help="Only keys under this prefix.")
+    create.add_argument("--profile", help="AWS profile (default: default credentials).")
+    du = commands.add_parser("du", help="Objects and bytes under a prefix.")
+    du.add_argument("snapshot", help="Snapshot file")
+    du.add_argument("prefix", nargs="?", default="", help="Prefix (default: whole snapshot)")
+    du.add_argument("--children", action="store_true", help="One line per folder right under the prefix.")
+    diff = commands.add_parser("diff", help="Keys added, removed and changed between two snapshots.")
+    diff.add_argument("old", help="Older snapshot file")
+    diff.add_argument("new", help="Newer snapshot file")
+    diff.add_argument("--prefix", default="", help="Only keys under this prefix.")
+    diff.add_argument("--output", help="NDJSON file listing every change.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        if args.command == "create":
+            count = snapshot_bucket(args.bucket, args.snapshot, args.prefix, args.profile)
+            print("{:,} key(s) of '{}' written to '{}' ({:,.1f} MB) in {:.1f}s".format(
+                count, args.bucket, args.snapshot, os.path.getsize(args.snapshot) / MB, time.perf_counter() - started))
+        elif args.command == "du":
+            snapshot = open_snapshot(args.snapshot)
+            summaries = prefix_children(snapshot, args.prefix) if args.children else [prefix_summary(snapshot, args.prefix)]
+            for summary in summaries:
+                print("{:>14,} {:>14,.1f} MB  {}".format(summary["objects"], summary["bytes"] / MB, summary["prefix"]))
+            close_snapshot(snapshot)
+        else:
+            old, new = open_snapshot(args.old), open_snapshot(args.new)
+            result = diff_summary(old, new, args.prefix, args.output)
+            print("{added:,} added ({added_bytes:,} bytes), {removed:,} removed ({removed_bytes:,} bytes), "
+                  "{changed:,} changed ({changed_bytes_delta:+,} bytes), {unchanged:,} unchanged".format(**result))
+            close_snapshot(old)
+            close_snapshot(new)
+    except (OSError, ValueError) as e:
+        print("Error: {}".format(e), file=sys.stderr)
+        sys.exit(1)
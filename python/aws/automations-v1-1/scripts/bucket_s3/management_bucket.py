@@ -1,7 +1,14 @@
 import json
-import boto3
+from scripts.common.clients import get_client
+from scripts.bucket_s3.bulk_prefixes import create_prefixes, markers_from_template, print_prefix_summary, read_values
+from scripts.bucket_s3.duplicate_finder import find_duplicates, iter_bucket_objects, parse_source, print_duplicate_report
+from scripts.bucket_s3.empty_bucket import empty_bucket, print_empty_summary
+from scripts.bucket_s3.multipart_janitor import clean_multipart_uploads, list_account_buckets, print_janitor_report
+from scripts.bucket_s3.provision_buckets import DEFAULT_PROVISION_WORKERS, run_manifest
+from scripts.bucket_s3.sync_directory import print_directory_sync_summary, sync_directory
+from scripts.bucket_s3.sync_s3 import print_sync_summary, sync_s3
+from scripts.bucket_s3.transfer import transfer
 
-s3_client = boto3.client('s3')
 
 def show_menu_bucket():
     print("""
@@ -9,10 +16,19 @@ def show_menu_bucket():
 | 1. Create S3 Bucket                        |
 | 2. Create Object (Folder) in Bucket        |
 | 3. Configure Bucket Policy                 |
+| 4. Provision Buckets from Manifest         |
 | 5. Configure CORS                          |
 | 6. Configure Lifecycle Rules               |
 | 7. Back to Main Menu                       |
 | 8. Exit                                    |
+| 9. Empty Bucket (all versions)             |
+| 10. Upload Files / Directory               |
+| 11. Download Files / Prefix                |
+| 12. Sync S3 Prefixes (server side)         |
+| 13. Sync Directory to S3                   |
+| 14. Bulk Create Folders (template)         |
+| 15. Clean Incomplete Multipart Uploads     |
+| 16. Find Duplicate Objects Across Buckets  |
 ----------------------------------------------
 """)
     choice = input("Enter your choice: ")
@@ -22,7 +38,7 @@ def create_s3_bucket():
     print("Creating a new S3 bucket...")
     bucket_name = input("Enter the bucket name: ")
     try:
-        s3_client.create_bucket(Bucket=bucket_name)
+        get_client('s3').create_bucket(Bucket=bucket_name)
         print(f"Bucket '{bucket_name}' created successfully!")
     except Exception as e:
         print(f"Error creating bucket: {e}")
@@ -33,7 +49,7 @@ def create_s3_object():
     bucket_name = input("Enter the bucket name: ")
     folder_name = input("Enter the folder name: ")
     try:
-        s3_client.put_object(
+        get_client('s3').put_object(
             Bucket=bucket_name,
             Key=(folder_name + "/")
         )
@@ -143,7 +159,7 @@ def _create_policy_logic(policy_document, bucket_name):
         ]
     }
     try:
-        s3_client.put_bucket_policy(
+        get_client('s3').put_bucket_policy(
             Bucket=bucket_name,
             Policy=json.dumps(policy_document)
         )
@@ -186,7 +202,7 @@ def configure_cors():
         }
     }
     try:
-        s3_client.put_bucket_cors(
+        get_client('s3').put_bucket_cors(
             Bucket=bucket_name,
             CORSConfiguration=cors_configuration["CorsConfiguration"]
         )
@@ -285,7 +301,7 @@ def get_lifecycle_rules():
         }
     }
     match choice:
-        case 1:
+        case '1':
             object = input ("Enter the object name (e.g., /* for all objects): ")
             first_days = input(" Enter the firts date for transition (e.g., 30, 60 or 180 days): ")
             first_storage_class = input("Enter the first storage class for transition (e.g., STANDARD_IA, GLACIER): ").upper()
@@ -299,7 +315,7 @@ def get_lifecycle_rules():
             transition_actions['Transitions'][1]['StorageClass'] = second_storage_class
 
             return transition_actions
-        case 2:
+        case '2':
             object = input ("Enter the object name (e.g., /* for all objects): ")
             expiration_days_current =  input("Enter the date for expiration (e.g., 30, 60 or 180 days):")
             expirantion_days_noncurrent = input("Enter the date for noncurrent expiration (e.g., 30, 60 or 180 days): ")
@@ -310,7 +326,7 @@ def get_lifecycle_rules():
             expiration_actions['NoncurrentVersionExpiration']['NoncurrentDays'] = expirantion_days_noncurrent  
             expiration_actions['AbortIncompleteMultipartUpload']['DaysAfterInitiation'] = abort_incomplete_upload
             return expiration_actions
-        case 3:
+        case '3':
             object = input ("Enter the object name (e.g., /* for all objects): ")
             first_days = input(" Enter the firts date for transition (e.g., 30, 60 or 180 days): ")
             first_storage_class = input("Enter the first storage class for transition (e.g., STANDARD_IA, GLACIER): ").upper()
@@ -330,15 +346,33 @@ def get_lifecycle_rules():
             expiration_transition_actions['AbortIncompleteMultipartUpload']['DaysAfterInitiation'] = abort_incomplete_upload
 
             return expiration_transition_actions
-        case 4:
+        case '4':
             show_menu_bucket()
-        case 5:
+        case '5':
             exit()
 
+def preview_lifecycle_rules(bucket_name, rules):
+    """Simulates the rules over the current listing of the bucket and asks before applying them"""
+    try:
+        from scripts.bucket_s3.lifecycle_simulator import print_simulation, simulate_bucket
+    except ImportError:
+        print("numpy is not installed; the rules cannot be simulated before being applied.")
+        return input("Apply the lifecycle rules anyway? (y/n): ").strip().lower() == "y"
+    try:
+        print_simulation(simulate_bucket(bucket_name, rules))
+    except Exception as e:
+        print(f"Error simulating lifecycle rules: {e}")
+    return input("Apply these lifecycle rules? (y/n): ").strip().lower() == "y"
+
 def _configure_lifecycle_rules(bucket_name):
     lifecycle_rules = get_lifecycle_rules()
+    if not isinstance(lifecycle_rules, dict):
+        return
+    if not preview_lifecycle_rules(bucket_name, [lifecycle_rules]):
+        print("Lifecycle rules not applied.")
+        return
     try:
-        s3_client.put_bucket_lifecycle_configuration(
+        get_client('s3').put_bucket_lifecycle_configuration(
             Bucket=bucket_name,
             LifecycleConfiguration={
                 'Rules': [lifecycle_rules]
@@ -353,6 +387,92 @@ def configure_lifecycle_rules():
     bucket_name = input("Enter the bucket name: ")
     _configure_lifecycle_rules(bucket_name)
 
+def provision_from_manifest():
+    print("Provisioning buckets from a manifest...")
+    manifest_path = input("Enter the manifest path (.yaml or .csv): ")
+    workers = input("Enter the number of buckets provisioned at the same time (default: {}): ".format(DEFAULT_PROVISION_WORKERS)).strip()
+    if not workers.isdigit() or int(workers) < 1:
+        if workers:
+            print("Invalid number of buckets '{}', using {}.".format(workers, DEFAULT_PROVISION_WORKERS))
+        workers = DEFAULT_PROVISION_WORKERS
+    run_manifest(manifest_path, int(workers))
+
+def empty_s3_bucket():
+    print("Emptying a bucket (every object version and delete marker)...")
+    bucket_name = input("Enter the bucket name: ")
+    prefix = input("Enter the prefix to empty (leave blank for the whole bucket): ")
+    confirmation = input("Every version under 's3://{}/{}' will be deleted. Type the bucket name to confirm: ".format(bucket_name, prefix))
+    if confirmation.strip() != bucket_name:
+        print("Nothing deleted.")
+        return
+    summary = empty_bucket(bucket_name, prefix)
+    print_empty_summary(summary)
+
+def transfer_files(direction):
+    if direction == "upload":
+        source = input("Enter the local file or directory: ")
+        destination = input("Enter the destination (s3://bucket/prefix/): ")
+    else:
+        source = input("Enter the source (s3://bucket/key or s3://bucket/prefix/): ")
+        destination = input("Enter the local file or directory: ")
+    auto_tune = input("Auto-tune the part size from file size and link speed? (y/n): ").strip().lower() == "y"
+    transfer(direction, source, destination, auto_tune=auto_tune)
+
+def sync_s3_prefixes():
+    source = input("Enter the source (s3://bucket/prefix/): ")
+    destination = input("Enter the destination (s3://bucket/prefix/): ")
+    dry_run = input("Only compare, without copying? (y/n): ").strip().lower() == "y"
+    try:
+        stats = sync_s3(source, destination, dry_run=dry_run)
+    except ValueError as e:
+        print(e)
+        return
+    print_sync_summary(stats)
+
+def sync_local_directory():
+    source = input("Enter the local directory: ")
+    destination = input("Enter the destination (s3://bucket/prefix/): ")
+    delete = input("Delete objects of files removed locally? (y/n): ").strip().lower() == "y"
+    try:
+        stats = sync_directory(source, destination, delete=delete)
+    except Exception as e:
+        print("Error syncing '{}': {}".format(source, e))
+        return
+    print_directory_sync_summary(stats, delete=delete)
+
+def bulk_create_folders():
+    bucket_name = input("Enter the bucket name: ")
+    template = input("Enter the folder template (e.g., clientes/{customer}/{user}/): ")
+    values_file = input("Enter the CSV file with the template values: ")
+    tag_customer = input("Enter the customer tag value (e.g., {customer}, empty for none): ").strip()
+    try:
+        markers = markers_from_template(template, read_values(values_file), {"customer": tag_customer} if tag_customer else None)
+    except (OSError, ValueError) as e:
+        print(f"Error reading the template values: {e}")
+        return
+    print_prefix_summary(bucket_name, create_prefixes(bucket_name, markers))
+
+def clean_incomplete_uploads():
+    days = input("Abort uploads older than how many days? (default 7): ").strip()
+    dry_run = input("Only report, without aborting? (y/n): ").strip().lower() == "y"
+    try:
+        reports = clean_multipart_uploads(list_account_buckets(), float(days) if days else 7, dry_run)
+    except Exception as e:
+        print(f"Error cleaning multipart uploads: {e}")
+        return
+    print_janitor_report(reports, dry_run)
+
+def find_duplicate_objects():
+    sources = input("Enter the buckets to compare, separated by commas (bucket or bucket/prefix): ")
+    output_file = input("Enter the file for every duplicate group (NDJSON, empty for none): ").strip()
+    try:
+        objects = iter_bucket_objects([parse_source(source.strip()) for source in sources.split(",") if source.strip()])
+        summary = find_duplicates(objects, output_file=output_file or None)
+    except Exception as e:
+        print(f"Error finding duplicates: {e}")
+        return
+    print_duplicate_report(summary)
+
 def handle_bucket_choice(choice):
     match choice:
         case '1':
@@ -361,6 +481,8 @@ def handle_bucket_choice(choice):
             create_s3_object()
         case '3':
             configure_bucket_policy()
+        case '4':
+            provision_from_manifest()
         case '5':
             configure_cors()
         case '6':
@@ -369,8 +491,24 @@ def handle_bucket_choice(choice):
             return
         case '8':
             exit()
+        case '9':
+            empty_s3_bucket()
+        case '10':
+            transfer_files("upload")
+        case '11':
+            transfer_files("download")
+        case '12':
+            sync_s3_prefixes()
+        case '13':
+            sync_local_directory()
+        case '14':
+            bulk_create_folders()
+        case '15':
+            clean_incomplete_uploads()
+        case '16':
+            find_duplicate_objects()
         case _:
-            print("Invalid choice. Please select a valid option (1-8).")
+            print("Invalid choice. Please select a valid option (1-16).")
 
 def main():
     while True:
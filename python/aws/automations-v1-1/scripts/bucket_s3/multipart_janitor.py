@@ -0,0 +1,211 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import ClientError
+from scripts.bucket_s3.check_executor import DEFAULT_CHECK_WORKERS, iter_bucket_checks
+from scripts.bucket_s3.region_pool import resolve_bucket_regions
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_OLDER_THAN_DAYS = 7
+DEFAULT_UPLOAD_WORKERS = 32
+GB = 1024 ** 3
+# Parts of incomplete uploads are billed like objects of their storage class (us-east-1 STANDARD here).
+STANDARD_PRICE_PER_GB_MONTH = 0.023
+
+# ---- 1. Discovery ----
+
+def list_account_buckets(profile_name=None, bucket_prefix=''):
+    """ListBuckets entries (with ´BucketRegion´ when returned) whose name starts with ´bucket_prefix´"""
+    paginator = get_client('s3', profile_name=profile_name).get_paginator('list_buckets')
+    buckets = []
+    for page in paginator.paginate(Prefix=bucket_prefix) if bucket_prefix else paginator.paginate():
+        buckets.extend(bucket for bucket in page.get('Buckets', []) if bucket['Name'].startswith(bucket_prefix))
+    return buckets
+
+def _has_abort_rule(s3_client, bucket_name):
+    try:
+        rules = s3_client.get_bucket_lifecycle_configuration(Bucket=bucket_name).get('Rules', [])
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'NoSuchLifecycleConfiguration':
+            return False
+        return None
+    return any(rule.get('Status') == 'Enabled' and rule.get('AbortIncompleteMultipartUpload') for rule in rules)
+
+def _list_uploads_logic(job):
+    """
+    Lists the incomplete multipart uploads of one bucket (every page). For buckets
+    with uploads, also checks for an ´AbortIncompleteMultipartUpload´ lifecycle rule.
+    """
+    s3_client = get_client('s3', job["region"], job["profile_name"])
+    result = {"uploads": [], "has_abort_rule": None, "error": None}
+    try:
+        for page in s3_client.get_paginator('list_multipart_uploads').paginate(Bucket=job["bucket"]):
+            result["uploads"].extend(
+                {"key": upload['Key'], "upload_id": upload['UploadId'], "initiated": upload['Initiated']}
+                for upload in page.get('Uploads', [])
+            )
+        if result["uploads"]:
+            result["has_abort_rule"] = _has_abort_rule(s3_client, job["bucket"])
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+# ---- 2. Inspect and Abort ----
+
+def _inspect_upload_logic(job):
+    """Sums the parts of one upload with ´list_parts´ and aborts it when it is stale (and not a dry run)"""
+    s3_client = get_client('s3', job["region"], job["profile_name"])
+    upload = job["upload"]
+    result = {"bytes": 0, "parts": 0, "stale": job["stale"], "aborted": False, "error": None}
+    try:
+        pages = s3_client.get_paginator('list_parts').paginate(
+            Bucket=job["bucket"], Key=upload["key"], UploadId=upload["upload_id"]
+        )
+        for page in pages:
+            for part in page.get('Parts', []):
+                result["parts"] += 1
+                result["bytes"] += part['Size']
+        if job["stale"] and not job["dry_run"]:
+            s3_client.abort_multipart_upload(Bucket=job["bucket"], Key=upload["key"], UploadId=upload["upload_id"])
+            result["aborted"] = True
+    except ClientError as e:
+        # Completed or aborted by someone else since it was listed.
+        if e.response.get('Error', {}).get('Code') != 'NoSuchUpload':
+            result["error"] = str(e)
+    except Exception as e:
+        # Connection/timeout errors only fail this upload, not the whole bucket.
+        result["error"] = str(e)
+    return result
+
+def _new_report(bucket_name, region):
+    return {
+        "bucket": bucket_name,
+        "region": region,
+        "uploads": 0,
+        "orphaned_bytes": 0,
+        "stale_uploads": 0,
+        "stale_bytes": 0,
+        "aborted": 0,
+        "reclaimed_bytes": 0,
+        "has_abort_rule": None,
+        "errors": []
+    }
+
+def clean_multipart_uploads(buckets, older_than_days=DEFAULT_OLDER_THAN_DAYS, dry_run=False, profile_name=None,
+                            bucket_workers=DEFAULT_CHECK_WORKERS, upload_workers=DEFAULT_UPLOAD_WORKERS):
+    """
+    Finds the incomplete multipart uploads of every bucket (´bucket_workers´ buckets
+    listed at a time), sums their parts and aborts the ones initiated more than
+    ´older_than_days´ ago (´upload_workers´ uploads at a time). Both stages are
+    pipelined: parts are summed while other buckets are still being listed.
+    Returns one report per bucket, in bucket order.
+    """
+    regions = resolve_bucket_regions(get_client('s3', profile_name=profile_name), buckets)
+    reports = {bucket['Name']: _new_report(bucket['Name'], regions.get(bucket['Name'])) for bucket in buckets}
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    bucket_jobs = [
+        {"bucket": bucket['Name'], "region": regions.get(bucket['Name']), "profile_name": profile_name}
+        for bucket in buckets
+    ]
+
+    def upload_jobs():
+        for job, listing in iter_bucket_checks(_list_uploads_logic, bucket_jobs, bucket_workers):
+            report = reports[job["bucket"]]
+            report["has_abort_rule"] = listing["has_abort_rule"]
+            if listing["error"]:
+                report["errors"].append(listing["error"])
+            report["uploads"] = len(listing["uploads"])
+            for upload in listing["uploads"]:
+                yield dict(job, upload=upload, stale=upload["initiated"] < cutoff, dry_run=dry_run)
+
+    for job, result in iter_bucket_checks(_inspect_upload_logic, upload_jobs(), upload_workers):
+        report = reports[job["bucket"]]
+        report["orphaned_bytes"] += result["bytes"]
+        if result["stale"]:
+            report["stale_uploads"] += 1
+            report["stale_bytes"] += result["bytes"]
+        if result["aborted"]:
+            report["aborted"] += 1
+            report["reclaimed_bytes"] += result["bytes"]
+        if result["error"]:
+            report["errors"].append("{} ({}): {}".format(job["upload"]["key"], job["upload"]["upload_id"], result["error"]))
+    return list(reports.values())
+
+# ---- 3. Report ----
+
+def print_janitor_report(reports, dry_run=False, seconds=None):
+    rows = [report for report in reports if report["uploads"] or report["errors"]]
+    header = ["BUCKET", "REGION", "UPLOADS", "ORPHANED GB", "STALE", "STALE GB", "ABORTED", "RECLAIMED GB", "ABORT RULE"]
+    table = [
+        [
+            report["bucket"], report["region"] or "-", "{:,}".format(report["uploads"]),
+            "{:,.3f}".format(report["orphaned_bytes"] / GB), "{:,}".format(report["stale_uploads"]),
+            "{:,.3f}".format(report["stale_bytes"] / GB), "{:,}".format(report["aborted"]),
+            "{:,.3f}".format(report["reclaimed_bytes"] / GB),
+            {True: "yes", False: "NO", None: "-"}[report["has_abort_rule"]]
+        ]
+        for report in rows
+    ]
+    if table:
+        widths = [max(len(row[i]) for row in [header] + table) for i in range(len(header))]
+        print("\n" + " | ".join(cell.ljust(width) for cell, width in zip(header, widths)))
+        print("-+-".join("-" * width for width in widths))
+        for row in table:
+            print(" | ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+    for report in rows:
+        for error in report["errors"][:5]:
+            print("Error in bucket '{}': {}".format(report["bucket"], error), file=sys.stderr)
+
+    orphaned = sum(report["orphaned_bytes"] for report in reports)
+    gained = sum(report["stale_bytes" if dry_run else "reclaimed_bytes"] for report in reports)
+    print("\n{} bucket(s){}: {:,} incomplete upload(s) holding {:,.2f} GB; {:,.2f} GB ({:,.2f} USD/month) {}.".format(
+        len(reports), " in {:.1f}s".format(seconds) if seconds is not None else "",
+        sum(report["uploads"] for report in reports), orphaned / GB, gained / GB,
+        gained / GB * STANDARD_PRICE_PER_GB_MONTH, "would be reclaimed" if dry_run else "reclaimed"))
+    missing_rule = [report["bucket"] for report in rows if report["has_abort_rule"] is False]
+    if missing_rule:
+        print("{} bucket(s) with incomplete uploads have no AbortIncompleteMultipartUpload rule: {}".format(
+            len(missing_rule), ", ".join(missing_rule)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Finds incomplete multipart uploads in every bucket, sums their parts and aborts the stale ones."
+    )
+    parser.add_argument("--buckets", nargs="+", help="Only these buckets (default: every bucket of the account).")
+    parser.add_argument("--bucket-prefix", default="", help="Only buckets whose name starts with this prefix.")
+    parser.add_argument("--older-than-days", type=float, default=DEFAULT_OLDER_THAN_DAYS,
+                        help="Abort uploads initiated more than this many days ago (default: {}).".format(DEFAULT_OLDER_THAN_DAYS))
+    parser.add_argument("--dry-run", action="store_true", help="Only report; abort nothing.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_CHECK_WORKERS,
+                        help="Number of buckets listed at the same time (default: {}).".format(DEFAULT_CHECK_WORKERS))
+    parser.add_argument("--upload-workers", type=int, default=DEFAULT_UPLOAD_WORKERS,
+                        help="Number of uploads inspected/aborted at the same time (default: {}).".format(DEFAULT_UPLOAD_WORKERS))
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--output", help="JSON file for the per-bucket report.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        if args.buckets:
+            buckets = [{'Name': name} for name in args.buckets]
+        else:
+            buckets = list_account_buckets(args.profile, args.bucket_prefix)
+    except Exception as e:
+        print("Error listing buckets: {}".format(e), file=sys.stderr)
+        sys.exit(1)
+
+    result = clean_multipart_uploads(buckets, args.older_than_days, args.dry_run, args.profile,
+                                     args.workers, args.upload_workers)
+    print_janitor_report(result, args.dry_run, time.perf_counter() - started)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=4)
+        print("Report saved to '{}'".format(args.output))
+    sys.exit(1 if any(report["errors"] for report in result) else 0)
@@ -0,0 +1,127 @@
+import sys
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_SAMPLE_SIZE = 1000
+LIST_PAGE_SIZE = 1000
+
+# (label, exclusive upper bound in bytes); the last bucket has no upper bound.
+SIZE_HISTOGRAM_BOUNDS = [
+    ("0B", 1),
+    ("<1KB", 1024),
+    ("<1MB", 1024 ** 2),
+    ("<16MB", 16 * 1024 ** 2),
+    ("<128MB", 128 * 1024 ** 2),
+    ("<1GB", 1024 ** 3),
+    ("<5GB", 5 * 1024 ** 3),
+    (">=5GB", None)
+]
+
+# ---- 1. Accumulator Functions ----
+
+def new_object_stats(sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Returns an empty accumulator. Its size does not depend on the number of objects added.
+    """
+    return {
+        "sample_size": sample_size,
+        "count": 0,
+        "total_bytes": 0,
+        "storage_classes": {},
+        "size_histogram": {label: 0 for label, _ in SIZE_HISTOGRAM_BOUNDS},
+        "oldest_last_modified": None,
+        "newest_last_modified": None,
+        "sample_keys": []
+    }
+
+def _size_label(size):
+    for label, upper in SIZE_HISTOGRAM_BOUNDS:
+        if upper is None or size < upper:
+            return label
+
+def add_object(stats, key, size, storage_class, last_modified):
+    """
+    Adds a single object to the accumulator. Only the first ´sample_size´ keys are kept.
+    """
+    size = size or 0
+    storage_class = storage_class or "STANDARD"
+
+    stats["count"] += 1
+    stats["total_bytes"] += size
+    stats["storage_classes"][storage_class] = stats["storage_classes"].get(storage_class, 0) + 1
+    stats["size_histogram"][_size_label(size)] += 1
+
+    if last_modified is not None:
+        if stats["oldest_last_modified"] is None or last_modified < stats["oldest_last_modified"]:
+            stats["oldest_last_modified"] = last_modified
+        if stats["newest_last_modified"] is None or last_modified > stats["newest_last_modified"]:
+            stats["newest_last_modified"] = last_modified
+
+    if len(stats["sample_keys"]) < stats["sample_size"]:
+        stats["sample_keys"].append(key)
+
+def merge_object_stats(stats, other):
+    """
+    Merges ´other´ into ´stats´. Keys of ´stats´ come first in the sample, so merging
+    shards in key order keeps the same sample as a single sequential listing.
+    """
+    stats["count"] += other["count"]
+    stats["total_bytes"] += other["total_bytes"]
+
+    for storage_class, count in other["storage_classes"].items():
+        stats["storage_classes"][storage_class] = stats["storage_classes"].get(storage_class, 0) + count
+    for label, count in other["size_histogram"].items():
+        stats["size_histogram"][label] += count
+
+    for field, pick in (("oldest_last_modified", min), ("newest_last_modified", max)):
+        values = [v for v in (stats[field], other[field]) if v is not None]
+        stats[field] = pick(values) if values else None
+
+    free_slots = stats["sample_size"] - len(stats["sample_keys"])
+    if free_slots > 0:
+        stats["sample_keys"].extend(other["sample_keys"][:free_slots])
+    return stats
+
+def object_stats_report(stats):
+    """
+    Returns the JSON-serializable summary of an accumulator.
+    """
+    return {
+        "total_bytes": stats["total_bytes"],
+        "storage_classes": dict(sorted(stats["storage_classes"].items())),
+        "size_histogram": stats["size_histogram"],
+        "oldest_last_modified": stats["oldest_last_modified"].isoformat() if stats["oldest_last_modified"] else None,
+        "newest_last_modified": stats["newest_last_modified"].isoformat() if stats["newest_last_modified"] else None,
+        "sample_size": stats["sample_size"],
+        "sample_truncated": stats["count"] > len(stats["sample_keys"])
+    }
+
+# ---- 2. Streaming Listing ----
+
+def add_listing_page(stats, page):
+    """
+    Adds every object of a ListObjectsV2 page to the accumulator.
+    """
+    for obj in page.get('Contents', []):
+        add_object(stats, obj['Key'], obj.get('Size'), obj.get('StorageClass'), obj.get('LastModified'))
+
+def stream_object_stats(s3_client, bucket, prefix='', sample_size=DEFAULT_SAMPLE_SIZE, stats=None):
+    """
+    Lists the bucket (or prefix) page by page with ListObjectsV2 and computes its
+    statistics in a single pass. Memory stays flat no matter how many objects exist.
+    """
+    if stats is None:
+        stats = new_object_stats(sample_size)
+
+    try:
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(
+            Bucket=bucket,
+            Prefix=prefix,
+            PaginationConfig={'PageSize': LIST_PAGE_SIZE}
+        ):
+            add_listing_page(stats, page)
+
+    except Exception as e:
+        print("Error listing objects in bucket '{}': {}".format(bucket, e), file=sys.stderr)
+    return stats
@@ -0,0 +1,187 @@
+import argparse
+import json
+import sys
+from scripts.bucket_s3.check_executor import iter_bucket_checks
+from scripts.common.clients import get_client
+from scripts.bucket_s3.object_stats import (
+    DEFAULT_SAMPLE_SIZE,
+    LIST_PAGE_SIZE,
+    add_listing_page,
+    merge_object_stats,
+    new_object_stats,
+    object_stats_report,
+    stream_object_stats
+)
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_LIST_WORKERS = 1
+DEFAULT_DELIMITER = "/"
+# How many levels of the key space can be split (´clientes/<cliente>/´ needs 2).
+DEFAULT_MAX_DEPTH = 2
+# Shards wanted per worker before discovery stops splitting deeper.
+SHARDS_PER_WORKER = 4
+
+# ---- 1. Consumers ----
+# A consumer tells the lister how to accumulate and merge the listing of a shard:
+# ´{"new": () -> acc, "add_page": (acc, page) -> None, "merge": (acc, other) -> acc}´
+
+def object_stats_consumer(sample_size=DEFAULT_SAMPLE_SIZE):
+    """Accumulates the same statistics as the streaming listing of the audit"""
+    return {
+        "new": lambda: new_object_stats(sample_size),
+        "add_page": add_listing_page,
+        "merge": merge_object_stats
+    }
+
+def _add_keys_page(keys, page):
+    keys.extend(obj['Key'] for obj in page.get('Contents', []))
+
+def _merge_keys(keys, other):
+    keys.extend(other)
+    return keys
+
+def key_list_consumer():
+    """Keeps every object key, like ´bucket.objects.all()´"""
+    return {
+        "new": list,
+        "add_page": _add_keys_page,
+        "merge": _merge_keys
+    }
+
+# ---- 2. Shard Discovery ----
+
+def _split_prefix_logic(s3_client, bucket, consumer, prefix, delimiter):
+    """
+    Lists one level of ´prefix´ with ´Delimiter´ and returns its units in key order.
+
+    Each common prefix becomes a ´{"prefix": ...}´ shard still to be listed; objects
+    sitting directly at this level are accumulated right away into ´{"result": ...}´
+    units, one per run of consecutive objects. When the listing fails, the whole
+    ´prefix´ is returned as one shard, so it is listed again instead of dropped.
+    """
+    units = []
+    try:
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(
+            Bucket=bucket,
+            Prefix=prefix,
+            Delimiter=delimiter,
+            PaginationConfig={'PageSize': LIST_PAGE_SIZE}
+        ):
+            # Contents and CommonPrefixes come in separate lists, both in key order.
+            entries = [(obj['Key'], obj) for obj in page.get('Contents', [])]
+            entries += [(common['Prefix'], None) for common in page.get('CommonPrefixes', [])]
+            entries.sort(key=lambda entry: entry[0])
+
+            run = []
+            for key, obj in entries:
+                if obj is not None:
+                    run.append(obj)
+                    continue
+                if run:
+                    units.append(_objects_unit(consumer, run))
+                    run = []
+                units.append({"prefix": key})
+            if run:
+                units.append(_objects_unit(consumer, run))
+
+    except Exception as e:
+        print("Error splitting prefix '{}' of bucket '{}', listing it as one shard: {}".format(prefix, bucket, e), file=sys.stderr)
+        return [{"prefix": prefix}]
+    return units
+
+def _objects_unit(consumer, objects):
+    result = consumer["new"]()
+    consumer["add_page"](result, {'Contents': objects})
+    return {"result": result}
+
+def discover_shards(s3_client, bucket, consumer, prefix='', max_workers=DEFAULT_LIST_WORKERS,
+                    delimiter=DEFAULT_DELIMITER, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    Splits the key space under ´prefix´ into units that can be listed independently, in key order.
+
+    Discovery goes one delimiter level deeper at a time (splitting every prefix of a
+    level concurrently) until there are ´SHARDS_PER_WORKER´ shards per worker or
+    ´max_depth´ levels were split.
+    """
+    units = [{"prefix": prefix}]
+    for _ in range(max_depth):
+        pending = [unit["prefix"] for unit in units if "prefix" in unit]
+        if not pending or len(pending) >= SHARDS_PER_WORKER * max_workers:
+            break
+
+        split = dict(iter_bucket_checks(
+            lambda shard_prefix: _split_prefix_logic(s3_client, bucket, consumer, shard_prefix, delimiter),
+            pending,
+            max_workers
+        ))
+        units = [child for unit in units for child in (split[unit["prefix"]] if "prefix" in unit else [unit])]
+    return units
+
+# ---- 3. Parallel Listing ----
+
+def _list_unit_logic(s3_client, bucket, consumer, unit):
+    if "result" in unit:
+        return unit["result"]
+
+    result = consumer["new"]()
+    try:
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(
+            Bucket=bucket,
+            Prefix=unit["prefix"],
+            PaginationConfig={'PageSize': LIST_PAGE_SIZE}
+        ):
+            consumer["add_page"](result, page)
+
+    except Exception as e:
+        print("Error listing prefix '{}' of bucket '{}': {}".format(unit["prefix"], bucket, e), file=sys.stderr)
+    return result
+
+def parallel_list(s3_client, bucket, consumer, prefix='', max_workers=DEFAULT_LIST_WORKERS,
+                  delimiter=DEFAULT_DELIMITER, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    Lists the bucket (or prefix) with up to ´max_workers´ shards in flight and feeds them to ´consumer´.
+
+    Shards are merged in key order, so the result is the same as one sequential
+    listing. ´max_workers <= 1´ lists sequentially without any discovery call.
+    """
+    if max_workers <= 1:
+        return _list_unit_logic(s3_client, bucket, consumer, {"prefix": prefix})
+
+    units = discover_shards(s3_client, bucket, consumer, prefix, max_workers, delimiter, max_depth)
+
+    result = consumer["new"]()
+    for _, unit_result in iter_bucket_checks(
+        lambda unit: _list_unit_logic(s3_client, bucket, consumer, unit),
+        units,
+        max_workers
+    ):
+        result = consumer["merge"](result, unit_result)
+    return result
+
+def parallel_object_stats(s3_client, bucket, prefix='', sample_size=DEFAULT_SAMPLE_SIZE, max_workers=DEFAULT_LIST_WORKERS):
+    """Same as ´stream_object_stats()´, listing the shards of the bucket concurrently"""
+    if max_workers <= 1:
+        return stream_object_stats(s3_client, bucket, prefix, sample_size)
+    return parallel_list(s3_client, bucket, object_stats_consumer(sample_size), prefix, max_workers)
+
+def parallel_list_keys(s3_client, bucket, prefix='', max_workers=DEFAULT_LIST_WORKERS):
+    """Returns every object key of the bucket (or prefix), listing its shards concurrently"""
+    return parallel_list(s3_client, bucket, key_list_consumer(), prefix, max_workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Computes the object statistics of a bucket with a prefix-sharded parallel listing.")
+    parser.add_argument("bucket", help="Name of the bucket")
+    parser.add_argument("--prefix", default="", help="Only list keys under this prefix, e.g. ´clientes/´")
+    parser.add_argument("--workers", type=int, default=16, help="Number of shards listed at the same time (default: 16).")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help="Maximum number of object keys kept (default: {}).".format(DEFAULT_SAMPLE_SIZE))
+    args = parser.parse_args()
+
+    stats = parallel_object_stats(get_client('s3'), args.bucket, args.prefix, args.sample_size, args.workers)
+    report = object_stats_report(stats)
+    report["object_count"] = stats["count"]
+    print(json.dumps(report, indent=4, ensure_ascii=False))
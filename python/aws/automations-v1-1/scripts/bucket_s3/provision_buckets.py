@@ -0,0 +1,449 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from botocore.exceptions import ClientError
+from scripts.bucket_s3.bucket_state import FACET_ORDER, diff_facet, managed_facets, read_bucket_state, write_facet
+from scripts.bucket_s3.check_executor import DEFAULT_CHECK_WORKERS, iter_bucket_checks
+from scripts.bucket_s3.public_access import PUBLIC_ACCESS_BLOCK_FLAGS
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_PROVISION_WORKERS = DEFAULT_CHECK_WORKERS
+DEFAULT_REGION = "us-east-1"
+DEFAULT_ENVIRONMENT = "prd"
+STEPS = ["create"] + FACET_ORDER
+STEP_LABELS = {"public_access_block": "PAB"}
+MANIFEST_FIELDS = ["bucket", "customer", "region", "environment", "tags", "public_access_block", "cors", "lifecycle", "policy"]
+# Manifest value that turns a step off for a bucket, even when the defaults set it.
+NONE_VALUES = ("", "none", "-")
+
+# Same rule as ´criacao-buckets-s3.py´ (´default´) and ´configure_cors()´ (´open´).
+CORS_TEMPLATES = {
+    "default": [
+        {
+            "AllowedHeaders": ["Authorization"],
+            "AllowedMethods": ["GET", "PUT"],
+            "AllowedOrigins": ["*"],
+            "ExposeHeaders": ["ETag", "x-amz-request-id"],
+            "MaxAgeSeconds": 3000
+        }
+    ],
+    "open": [
+        {
+            "AllowedHeaders": ["*"],
+            "AllowedMethods": ["GET", "PUT", "POST", "DELETE"],
+            "AllowedOrigins": ["*"],
+            "MaxAgeSeconds": 3000
+        }
+    ]
+}
+
+LIFECYCLE_TEMPLATES = {
+    "abort_incomplete_uploads": [
+        {
+            "ID": "AbortIncompleteUploads",
+            "Filter": {"Prefix": ""},
+            "Status": "Enabled",
+            "AbortIncompleteMultipartUpload": {"DaysAfterInitiation": 7}
+        }
+    ],
+    "archive": [
+        {
+            "ID": "MoveData",
+            "Filter": {"Prefix": ""},
+            "Status": "Enabled",
+            "Transitions": [
+                {"Days": 30, "StorageClass": "STANDARD_IA"},
+                {"Days": 90, "StorageClass": "GLACIER"}
+            ],
+            "NoncurrentVersionExpiration": {"NoncurrentDays": 30},
+            "AbortIncompleteMultipartUpload": {"DaysAfterInitiation": 7}
+        }
+    ]
+}
+
+# Same scopes as ´get_scope_policy()´; the ´:<argument>´ of the manifest fills ´{arg}´.
+POLICY_TEMPLATES = {
+    "cross_account": {
+        "Sid": "AllowCrossAccountReadOnly",
+        "Effect": "Allow",
+        "Principal": {"AWS": "arn:aws:iam::{arg}:root"},
+        "Action": ["s3:GetObject", "s3:ListBucket"],
+        "Resource": ["{bucket_arn}", "{bucket_arn}/*"]
+    },
+    "require_https": {
+        "Sid": "DenyUnsecureConnections",
+        "Effect": "Deny",
+        "Principal": "*",
+        "Action": "s3:*",
+        "Resource": ["{bucket_arn}", "{bucket_arn}/*"],
+        "Condition": {"Bool": {"aws:SecureTransport": "false"}}
+    },
+    "read_access_ip": {
+        "Sid": "AcessoFromSpecificIP",
+        "Effect": "Allow",
+        "Principal": "*",
+        "Action": ["s3:GetObject", "s3:ListBucket"],
+        "Resource": ["{bucket_arn}", "{bucket_arn}/*"],
+        "Condition": {"IpAddress": {"aws:SourceIp": "{arg}"}}
+    },
+    "enforce_encryption": {
+        "Sid": "DenyUnencryptedPutObjects",
+        "Effect": "Deny",
+        "Principal": "*",
+        "Action": "s3:PutObject",
+        "Resource": "{bucket_arn}/*",
+        "Condition": {"Null": {"s3:x-amz-server-side-encryption": "true"}}
+    }
+}
+POLICY_TEMPLATE_ARGUMENTS = {"cross_account": "AWS account ID", "read_access_ip": "IP block (CIDR)"}
+
+# ---- 1. Manifest ----
+
+def _is_none(value):
+    return value is None or (isinstance(value, str) and value.strip().lower() in NONE_VALUES)
+
+def _parse_cell(value):
+    """CSV cells holding JSON (´[...]´ / ´{...}´) are decoded, anything else is a template name"""
+    value = value.strip()
+    if value[:1] in ("[", "{"):
+        return json.loads(value)
+    return value
+
+def _read_yaml_manifest(path):
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as f:
+        document = yaml.safe_load(f) or {}
+    if isinstance(document, list):
+        return {}, document
+    return document.get("defaults") or {}, document.get("buckets") or []
+
+def _read_csv_manifest(path):
+    entries = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            entry = {}
+            for field, value in row.items():
+                if field is None or value is None:
+                    continue
+                field = field.strip().lower()
+                value = value.strip()
+                if field in ("tags", "public_access_block", "cors", "lifecycle", "policy") and value[:1] in ("[", "{"):
+                    value = _parse_cell(value)
+                entry[field] = value
+            # Empty cells fall back to the defaults; use ´none´ to turn a step off.
+            entries.append({field: value for field, value in entry.items() if value != ""})
+    return {}, entries
+
+def _resolve_template(value, templates, kind):
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        return [value]
+    if value not in templates:
+        raise ValueError("unknown {} template '{}' (choose from: {})".format(kind, value, ", ".join(sorted(templates))))
+    return json.loads(json.dumps(templates[value]))
+
+def _fill_template(value, replacements):
+    if isinstance(value, str):
+        for name, replacement in replacements.items():
+            value = value.replace("{" + name + "}", replacement)
+        return value
+    if isinstance(value, list):
+        return [_fill_template(item, replacements) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill_template(item, replacements) for key, item in value.items()}
+    return value
+
+def build_bucket_policy(bucket_name, policy):
+    """
+    Builds the policy document of a bucket from template names (´require_https´,
+    ´cross_account:<account id>´, ...), raw statements or a complete policy document.
+    """
+    if isinstance(policy, dict) and "Statement" in policy:
+        return policy
+
+    statements = []
+    for item in policy if isinstance(policy, list) else [policy]:
+        if isinstance(item, dict):
+            statements.append(item)
+            continue
+        name, _, argument = str(item).partition(":")
+        name = name.strip()
+        if name not in POLICY_TEMPLATES:
+            raise ValueError("unknown policy template '{}' (choose from: {})".format(name, ", ".join(sorted(POLICY_TEMPLATES))))
+        if name in POLICY_TEMPLATE_ARGUMENTS and not argument.strip():
+            raise ValueError("policy template '{}' needs an argument: '{}:<{}>'".format(name, name, POLICY_TEMPLATE_ARGUMENTS[name]))
+        statements.append(_fill_template(POLICY_TEMPLATES[name], {
+            "arg": argument.strip(),
+            "bucket_arn": "arn:aws:s3:::{}".format(bucket_name)
+        }))
+    return {"Version": "2012-10-17", "Statement": statements}
+
+def public_access_block_config(value):
+    """
+    ´true´ / ´false´ set the four Public Access Block flags, a mapping sets each flag
+    (flags not given are ´false´).
+    """
+    if isinstance(value, str):
+        if value.strip().lower() not in ("true", "false"):
+            raise ValueError("'public_access_block' must be true, false or a mapping of flags")
+        value = value.strip().lower() == "true"
+    if isinstance(value, bool):
+        return {flag: value for flag in PUBLIC_ACCESS_BLOCK_FLAGS}
+    if not isinstance(value, dict):
+        raise ValueError("'public_access_block' must be true, false or a mapping of flags")
+    unknown = set(value) - set(PUBLIC_ACCESS_BLOCK_FLAGS)
+    if unknown:
+        raise ValueError("unknown Public Access Block flags: {}".format(", ".join(sorted(unknown))))
+    return {flag: bool(value.get(flag, False)) for flag in PUBLIC_ACCESS_BLOCK_FLAGS}
+
+def bucket_spec(entry, defaults=None):
+    """
+    Turns one manifest entry (plus the manifest defaults) into the desired state of the bucket:
+    ´{"bucket", "region", "tags", "public_access_block", "cors", "lifecycle", "policy"}´.
+    A step set to None is skipped.
+    """
+    values = dict(defaults or {})
+    values.update(entry)
+    unknown = set(values) - set(MANIFEST_FIELDS)
+    if unknown:
+        raise ValueError("unknown fields: {}".format(", ".join(sorted(unknown))))
+
+    bucket_name = str(values.get("bucket") or "").strip().lower()
+    if not bucket_name:
+        raise ValueError("'bucket' is required")
+
+    tags = {"Environment": str(values.get("environment") or DEFAULT_ENVIRONMENT), "Name": bucket_name}
+    if not _is_none(values.get("customer")):
+        tags["Customer"] = str(values["customer"]).strip().lower()
+    extra_tags = values.get("tags") or {}
+    if not isinstance(extra_tags, dict):
+        raise ValueError("'tags' must be a mapping of tag name to value")
+    tags.update({str(key): str(value) for key, value in extra_tags.items()})
+
+    public_access_block = values.get("public_access_block")
+    cors = values.get("cors")
+    lifecycle = values.get("lifecycle")
+    policy = values.get("policy")
+    return {
+        "bucket": bucket_name,
+        "region": str(values.get("region") or DEFAULT_REGION).strip(),
+        "tags": tags,
+        "public_access_block": None if _is_none(public_access_block) else public_access_block_config(public_access_block),
+        "cors": None if _is_none(cors) else _resolve_template(cors, CORS_TEMPLATES, "CORS"),
+        "lifecycle": None if _is_none(lifecycle) else _resolve_template(lifecycle, LIFECYCLE_TEMPLATES, "lifecycle"),
+        "policy": None if _is_none(policy) else build_bucket_policy(bucket_name, policy)
+    }
+
+def read_manifest(path):
+    """Returns the raw ´(defaults, entries)´ of a YAML or CSV manifest"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".yaml", ".yml"):
+        return _read_yaml_manifest(path)
+    if extension == ".csv":
+        return _read_csv_manifest(path)
+    raise ValueError("Unsupported manifest '{}': use .yaml, .yml or .csv".format(path))
+
+def load_manifest(path, defaults=None):
+    """
+    Reads a YAML (´defaults´ + ´buckets´ list) or CSV (one bucket per row) manifest and
+    returns the spec of every bucket. Raises ´ValueError´ listing every invalid entry.
+    """
+    manifest_defaults, entries = read_manifest(path)
+    merged_defaults = dict(defaults or {})
+    merged_defaults.update(manifest_defaults)
+
+    specs, errors, seen = [], [], set()
+    for number, entry in enumerate(entries, start=1):
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError("expected a mapping, got {}".format(type(entry).__name__))
+            spec = bucket_spec(entry, merged_defaults)
+            if spec["bucket"] in seen:
+                raise ValueError("bucket '{}' appears more than once".format(spec["bucket"]))
+        except (ValueError, TypeError) as e:
+            errors.append("entry {}: {}".format(number, e))
+            continue
+        seen.add(spec["bucket"])
+        specs.append(spec)
+
+    if errors:
+        raise ValueError("Invalid manifest '{}':\n\t{}".format(path, "\n\t".join(errors)))
+    return specs
+
+# ---- 2. Pipeline Steps ----
+# Every step reads the current configuration first and only writes when it differs,
+# so running the same manifest again changes nothing. Steps return ´(status, message)´.
+
+def _error_code(error):
+    return error.response.get('Error', {}).get('Code')
+
+def _create_bucket_logic(s3_client, spec):
+    bucket_name = spec["bucket"]
+    try:
+        s3_client.head_bucket(Bucket=bucket_name)
+        return "exists", ""
+    except ClientError as e:
+        if _error_code(e) not in ("404", "NoSuchBucket", "NotFound"):
+            if _error_code(e) in ("403", "AccessDenied"):
+                return "error", "bucket name is taken or not accessible"
+            raise
+
+    params = {"Bucket": bucket_name}
+    # us-east-1 rejects an explicit LocationConstraint.
+    if spec["region"] != "us-east-1":
+        params["CreateBucketConfiguration"] = {"LocationConstraint": spec["region"]}
+    try:
+        s3_client.create_bucket(**params)
+    except ClientError as e:
+        if _error_code(e) == "BucketAlreadyOwnedByYou":
+            return "exists", ""
+        raise
+    # The next steps must not hit the bucket before it is visible.
+    s3_client.get_waiter('bucket_exists').wait(Bucket=bucket_name, WaiterConfig={"Delay": 1, "MaxAttempts": 30})
+    return "created", spec["region"]
+
+def _configure_facet_logic(s3_client, spec, facet, current):
+    if current["status"] == "error":
+        return "error", "could not read the current {}: {}".format(facet, current["error"])
+    change = diff_facet(facet, spec[facet], current["value"])
+    if change is None:
+        return "unchanged", ""
+    write_facet(s3_client, spec["bucket"], facet, change["desired"])
+    return "updated", ", ".join(change["changes"])
+
+def provision_bucket(spec, profile_name=None):
+    """
+    Runs the pipeline of one bucket (create -> tags -> PAB -> CORS -> lifecycle -> policy).
+    A failed step does not stop the next ones, except ´create´: without the bucket
+    there is nothing to configure.
+    """
+    started = time.perf_counter()
+    s3_client = get_client('s3', spec["region"], profile_name)
+    steps = {}
+
+    try:
+        status, message = _create_bucket_logic(s3_client, spec)
+    except Exception as e:
+        status, message = "error", str(e)
+    steps["create"] = {"status": status, "message": message}
+
+    facets = managed_facets(spec)
+    # The current configuration of every facet is read in one round trip.
+    state = read_bucket_state(s3_client, spec["bucket"], facets) if facets and status != "error" else {}
+
+    for facet in FACET_ORDER:
+        if facet not in facets:
+            status, message = "skipped", ""
+        elif steps["create"]["status"] == "error":
+            status, message = "not run", ""
+        else:
+            try:
+                status, message = _configure_facet_logic(s3_client, spec, facet, state[facet])
+            except Exception as e:
+                status, message = "error", str(e)
+        steps[facet] = {"status": status, "message": message}
+
+    return {
+        "bucket": spec["bucket"],
+        "region": spec["region"],
+        "steps": steps,
+        "ok": all(step["status"] not in ("error", "not run") for step in steps.values()),
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+def provision_buckets(specs, max_workers=DEFAULT_PROVISION_WORKERS, profile_name=None):
+    """
+    Provisions every bucket of the manifest, ´max_workers´ buckets at a time, and
+    returns the results in manifest order. Progress is printed as buckets finish.
+    """
+    specs_by_name = {spec["bucket"]: spec for spec in specs}
+    results = []
+    for number, (bucket_name, result) in enumerate(
+        iter_bucket_checks(lambda name: provision_bucket(specs_by_name[name], profile_name), list(specs_by_name), max_workers),
+        start=1
+    ):
+        print("[{}/{}] {}: {}".format(number, len(specs_by_name), bucket_name, "OK" if result["ok"] else "FAILED"))
+        results.append(result)
+    return results
+
+# ---- 3. Result Table ----
+
+def format_results_table(results):
+    """Returns the per-bucket result table (one column per step) as text"""
+    header = ["BUCKET", "REGION"] + [STEP_LABELS.get(step, step.upper()) for step in STEPS] + ["SECONDS"]
+    rows = [
+        [result["bucket"], result["region"]]
+        + [result["steps"][step]["status"] for step in STEPS]
+        + ["{:.2f}".format(result["seconds"])]
+        for result in results
+    ]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    line = "-+-".join("-" * width for width in widths)
+    lines = [" | ".join(cell.ljust(width) for cell, width in zip(header, widths)), line]
+    lines.extend(" | ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+
+    errors = [
+        "{} [{}]: {}".format(result["bucket"], step, result["steps"][step]["message"])
+        for result in results for step in STEPS
+        if result["steps"][step]["status"] == "error"
+    ]
+    if errors:
+        lines.append("")
+        lines.append("Errors:")
+        lines.extend("\t" + error for error in errors)
+    return "\n".join(lines)
+
+def print_summary(results, elapsed):
+    counts = {}
+    for result in results:
+        for step in result["steps"].values():
+            counts[step["status"]] = counts.get(step["status"], 0) + 1
+    failed = sum(1 for result in results if not result["ok"])
+    print("\n{}".format(format_results_table(results)))
+    print("\n{} bucket(s) in {:.1f}s: {} OK, {} failed. Steps: {}".format(
+        len(results), elapsed, len(results) - failed, failed,
+        ", ".join("{} {}".format(count, status) for status, count in sorted(counts.items()))
+    ))
+
+def run_manifest(manifest_path, max_workers=DEFAULT_PROVISION_WORKERS, profile_name=None, defaults=None, output_file=None):
+    """Loads and provisions a manifest. Returns the results, or None when the manifest is invalid."""
+    try:
+        specs = load_manifest(manifest_path, defaults)
+    except (OSError, ValueError) as e:
+        print("Error reading manifest: {}".format(e), file=sys.stderr)
+        return None
+
+    print("Provisioning {} bucket(s) from '{}' with {} worker(s)...".format(len(specs), manifest_path, max_workers))
+    started = time.perf_counter()
+    results = provision_buckets(specs, max_workers, profile_name)
+    print_summary(results, time.perf_counter() - started)
+
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+        print("Results saved to '{}'".format(output_file))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Creates and configures S3 buckets (tags, CORS, lifecycle, policy) from a YAML or CSV manifest. Safe to re-run."
+    )
+    parser.add_argument("manifest", help="YAML (´defaults´ + ´buckets´) or CSV (columns: {}) manifest".format(", ".join(MANIFEST_FIELDS)))
+    parser.add_argument("--workers", type=int, default=DEFAULT_PROVISION_WORKERS,
+                        help="Number of buckets provisioned at the same time (default: {}).".format(DEFAULT_PROVISION_WORKERS))
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--region", help="Region of the buckets that do not set one (default: {}).".format(DEFAULT_REGION))
+    parser.add_argument("--output", help="JSON file for the per-bucket results.")
+    args = parser.parse_args()
+
+    defaults = {"region": args.region} if args.region else None
+    results = run_manifest(args.manifest, args.workers, args.profile, defaults, args.output)
+    sys.exit(0 if results is not None and all(result["ok"] for result in results) else 1)
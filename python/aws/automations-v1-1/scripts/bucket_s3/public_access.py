@@ -0,0 +1,42 @@
+import sys
+from botocore.exceptions import ClientError
+
+# ---- Initialization and Global Variables ----
+
+PUBLIC_ACCESS_BLOCK_FLAGS = [
+    "BlockPublicAcls",
+    "IgnorePublicAcls",
+    "BlockPublicPolicy",
+    "RestrictPublicBuckets"
+]
+
+# ---- 1. Account-level Public Access Block ----
+
+def get_account_public_access_block(s3control_client, account_id):
+    """
+    GETs the account-level Public Access Block configuration, or None when it is not set or cannot be read.
+    """
+    try:
+        response = s3control_client.get_public_access_block(AccountId=account_id)
+        return response['PublicAccessBlockConfiguration']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'NoSuchPublicAccessBlockConfiguration':
+            print("Error getting account Public Access Block for {}: {}".format(account_id, e), file=sys.stderr)
+        return None
+
+# ---- 2. Effective Configuration ----
+
+def merge_public_access_block(account_config, bucket_config):
+    """
+    Returns the effective configuration: S3 applies a flag when either the account or the bucket enables it.
+    """
+    account_config = account_config or {}
+    bucket_config = bucket_config or {}
+    return {
+        flag: bool(account_config.get(flag) or bucket_config.get(flag))
+        for flag in PUBLIC_ACCESS_BLOCK_FLAGS
+    }
+
+def is_fully_blocked(config):
+    """Return ´TRUE´ when every Public Access Block flag is enabled"""
+    return bool(config) and all(config.get(flag) for flag in PUBLIC_ACCESS_BLOCK_FLAGS)
@@ -0,0 +1,207 @@
+import argparse
+import json
+import sys
+import time
+from scripts.bucket_s3.bucket_state import FACET_ORDER, diff_facet, managed_facets, read_bucket_state, write_facet
+from scripts.bucket_s3.check_executor import iter_bucket_checks
+from scripts.bucket_s3.provision_buckets import (
+    DEFAULT_PROVISION_WORKERS,
+    DEFAULT_REGION,
+    bucket_spec,
+    load_manifest,
+    read_manifest
+)
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_RECONCILE_WORKERS = DEFAULT_PROVISION_WORKERS
+ACTION_SYMBOLS = {"create": "+", "update": "~"}
+
+# ---- 1. Desired State ----
+
+def fleet_specs(manifest_path, bucket_prefix="", profile_name=None, defaults=None):
+    """
+    Applies the ´defaults´ of the manifest to every bucket of the account whose name
+    starts with ´bucket_prefix´. Buckets listed in the manifest keep their own entry.
+    """
+    manifest_defaults, _ = read_manifest(manifest_path)
+    defaults = dict(defaults or {}, **manifest_defaults)
+    listed = {spec["bucket"]: spec for spec in load_manifest(manifest_path, defaults)}
+
+    specs = []
+    paginator = get_client('s3', profile_name=profile_name).get_paginator('list_buckets')
+    for page in paginator.paginate(Prefix=bucket_prefix) if bucket_prefix else paginator.paginate():
+        for bucket in page.get('Buckets', []):
+            if bucket['Name'] in listed or not bucket['Name'].startswith(bucket_prefix):
+                continue
+            entry = {"bucket": bucket['Name']}
+            # Buckets already in the right region skip the redirect of their first call.
+            if bucket.get('BucketRegion'):
+                entry["region"] = bucket['BucketRegion']
+            specs.append(bucket_spec(entry, defaults))
+    return list(listed.values()) + sorted(specs, key=lambda spec: spec["bucket"])
+
+# ---- 2. Plan ----
+
+def plan_bucket(spec, facets=None, profile_name=None):
+    """
+    Reads the current configuration of the managed facets of one bucket (all calls
+    at the same time) and returns what has to change to reach ´spec´.
+    """
+    facets = [facet for facet in managed_facets(spec) if facets is None or facet in facets]
+    s3_client = get_client('s3', spec["region"], profile_name)
+    state = read_bucket_state(s3_client, spec["bucket"], facets)
+
+    changes, errors = {}, {}
+    for facet in facets:
+        if state[facet]["status"] == "error":
+            errors[facet] = state[facet]["error"]
+            continue
+        change = diff_facet(facet, spec[facet], state[facet]["value"])
+        if change is not None:
+            changes[facet] = change
+
+    return {
+        "bucket": spec["bucket"],
+        "region": spec["region"],
+        "reads": len(facets),
+        "changes": changes,
+        "errors": errors
+    }
+
+def plan_buckets(specs, facets=None, max_workers=DEFAULT_RECONCILE_WORKERS, profile_name=None):
+    """Plans every bucket, ´max_workers´ buckets at a time. Returns the plans in spec order."""
+    specs_by_name = {spec["bucket"]: spec for spec in specs}
+    return [
+        plan for _, plan in iter_bucket_checks(
+            lambda name: plan_bucket(specs_by_name[name], facets, profile_name), list(specs_by_name), max_workers
+        )
+    ]
+
+def format_plan(plans):
+    """Returns the plan as text: one block per bucket that changes or could not be read"""
+    lines = []
+    for plan in plans:
+        if not plan["changes"] and not plan["errors"]:
+            continue
+        if set(plan["errors"].values()) == {"NoSuchBucket"}:
+            lines.append("! {}: bucket does not exist (create it with provision_buckets)".format(plan["bucket"]))
+            continue
+        lines.append("~ {} ({})".format(plan["bucket"], plan["region"]))
+        for facet in FACET_ORDER:
+            if facet in plan["changes"]:
+                change = plan["changes"][facet]
+                lines.append("\t{} {}: {}".format(ACTION_SYMBOLS[change["action"]], facet, ", ".join(change["changes"])))
+            elif facet in plan["errors"]:
+                lines.append("\t! {}: could not read ({})".format(facet, plan["errors"][facet]))
+    return "\n".join(lines)
+
+def plan_summary(plans):
+    writes = sum(len(plan["changes"]) for plan in plans)
+    return {
+        "buckets": len(plans),
+        "reads": sum(plan["reads"] for plan in plans),
+        "in_sync": sum(1 for plan in plans if not plan["changes"] and not plan["errors"]),
+        "to_change": sum(1 for plan in plans if plan["changes"]),
+        "writes": writes,
+        "errors": sum(1 for plan in plans if plan["errors"])
+    }
+
+# ---- 3. Apply ----
+
+def apply_bucket_plan(plan, profile_name=None):
+    """
+    Issues only the write calls of the plan, in facet order. Returns ´{facet: "applied" | error}´.
+    """
+    s3_client = get_client('s3', plan["region"], profile_name)
+    results = {}
+    for facet in FACET_ORDER:
+        if facet not in plan["changes"]:
+            continue
+        try:
+            write_facet(s3_client, plan["bucket"], facet, plan["changes"][facet]["desired"])
+            results[facet] = "applied"
+        except Exception as e:
+            results[facet] = "error: {}".format(e)
+    return results
+
+def apply_plans(plans, max_workers=DEFAULT_RECONCILE_WORKERS, profile_name=None):
+    """
+    Applies the plans of the buckets that change, ´max_workers´ buckets at a time.
+    Returns ´{bucket: {facet: result}}´.
+    """
+    plans_by_name = {plan["bucket"]: plan for plan in plans if plan["changes"]}
+    results = {}
+    for bucket_name, result in iter_bucket_checks(
+        lambda name: apply_bucket_plan(plans_by_name[name], profile_name), list(plans_by_name), max_workers
+    ):
+        results[bucket_name] = result
+        failed = [facet for facet, status in result.items() if status != "applied"]
+        print("{}: {}".format(bucket_name, "FAILED ({})".format(", ".join(failed)) if failed else "applied"))
+    return results
+
+# ---- 4. Main Execution ----
+
+def reconcile(specs, apply=False, facets=None, max_workers=DEFAULT_RECONCILE_WORKERS, profile_name=None, confirm=True):
+    """
+    Plans every bucket and prints the plan; with ´apply´, issues the writes of the plan.
+    Returns ´{"plans": [...], "summary": {...}, "applied": {...} | None}´.
+    """
+    started = time.perf_counter()
+    plans = plan_buckets(specs, facets, max_workers, profile_name)
+    summary = plan_summary(plans)
+
+    text = format_plan(plans)
+    print(text if text else "Every bucket matches the manifest.")
+    print("\nPlan: {buckets} bucket(s) read with {reads} call(s) in {seconds:.1f}s: {in_sync} in sync, "
+          "{to_change} to change with {writes} write(s), {errors} with errors.".format(
+              seconds=time.perf_counter() - started, **summary))
+
+    applied = None
+    if apply and summary["writes"]:
+        if confirm and input("Apply {} write(s)? (y/n): ".format(summary["writes"])).strip().lower() != "y":
+            print("Nothing applied.")
+        else:
+            applied = apply_plans(plans, max_workers, profile_name)
+            failed = sum(1 for result in applied.values() for status in result.values() if status != "applied")
+            print("\nApplied {} write(s), {} failed.".format(summary["writes"] - failed, failed))
+    return {"plans": plans, "summary": summary, "applied": applied}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compares the tags, PAB, CORS, lifecycle and policy of many buckets with a manifest, "
+                    "prints the plan and, with --apply, writes only what differs."
+    )
+    parser.add_argument("manifest", help="YAML or CSV manifest (same format as provision_buckets)")
+    parser.add_argument("--apply", action="store_true", help="Apply the plan after printing it.")
+    parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation before applying.")
+    parser.add_argument("--all-buckets", action="store_true",
+                        help="Also reconcile every bucket of the account not in the manifest against its ´defaults´.")
+    parser.add_argument("--bucket-prefix", default="", help="With --all-buckets, only buckets whose name starts with this prefix.")
+    parser.add_argument("--facets", nargs="+", choices=FACET_ORDER, help="Only compare these facets (default: all).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_RECONCILE_WORKERS,
+                        help="Number of buckets read/written at the same time (default: {}).".format(DEFAULT_RECONCILE_WORKERS))
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--region", help="Region of the buckets that do not set one (default: {}).".format(DEFAULT_REGION))
+    parser.add_argument("--output", help="JSON file for the plan (and the apply results).")
+    args = parser.parse_args()
+
+    defaults = {"region": args.region} if args.region else None
+    try:
+        if args.all_buckets:
+            specs = fleet_specs(args.manifest, args.bucket_prefix, args.profile, defaults)
+        else:
+            specs = load_manifest(args.manifest, defaults)
+    except (OSError, ValueError) as e:
+        print("Error reading manifest: {}".format(e), file=sys.stderr)
+        sys.exit(1)
+
+    outcome = reconcile(specs, args.apply, args.facets, args.workers, args.profile, confirm=not args.yes)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(outcome, f, indent=4, ensure_ascii=False)
+        print("Plan saved to '{}'".format(args.output))
+    sys.exit(1 if outcome["summary"]["errors"] else 0)
@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+from scripts.bucket_s3.check_executor import (
+    DEFAULT_CHECK_WORKERS,
+    run_bucket_checks,
+    thread_client,
+    thread_resource
+)
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_REGION_CACHE = os.path.join("~", ".cache", "s3_bucket_regions.json")
+
+# Legacy LocationConstraint values returned by GetBucketLocation.
+LEGACY_LOCATIONS = {
+    None: "us-east-1",
+    "": "us-east-1",
+    "EU": "eu-west-1"
+}
+
+_cache_lock = threading.Lock()
+
+# ---- 1. Region Cache on Disk ----
+
+def load_region_cache(cache_path=DEFAULT_REGION_CACHE):
+    """READs the ´{bucket_name: region}´ cache, returning an empty one when missing or unreadable"""
+    path = os.path.expanduser(cache_path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print("Error reading region cache {}: {}".format(path, e), file=sys.stderr)
+        return {}
+
+def update_region_cache(regions, cache_path=DEFAULT_REGION_CACHE):
+    """
+    Merges ´regions´ into the cache file. Writes are atomic and serialized, so
+    several audits running in the same process can share the file.
+    """
+    path = os.path.expanduser(cache_path)
+    with _cache_lock:
+        cache = load_region_cache(cache_path)
+        cache.update(regions)
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=4, sort_keys=True)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print("Error saving region cache {}: {}".format(path, e), file=sys.stderr)
+
+# ---- 2. Region Resolution ----
+
+def _get_bucket_location_logic(s3_client, bucket_name):
+    try:
+        location = s3_client.get_bucket_location(Bucket=bucket_name).get('LocationConstraint')
+        return LEGACY_LOCATIONS.get(location, location)
+    except Exception as e:
+        print("Error getting location of bucket '{}': {}".format(bucket_name, e), file=sys.stderr)
+        return None
+
+def resolve_bucket_regions(s3_client, buckets, cache_path=DEFAULT_REGION_CACHE, max_workers=DEFAULT_CHECK_WORKERS):
+    """
+    Returns ´{bucket_name: region}´ for the ListBuckets entries in ´buckets´.
+
+    Uses the ´BucketRegion´ returned by ListBuckets, then the disk cache, and only
+    calls GetBucketLocation (concurrently) for the buckets still unknown.
+    """
+    cache = load_region_cache(cache_path) if cache_path else {}
+    regions = {}
+    learned = {}
+
+    for b in buckets:
+        bucket_name = b['Name']
+        if b.get('BucketRegion'):
+            regions[bucket_name] = b['BucketRegion']
+            if cache.get(bucket_name) != b['BucketRegion']:
+                learned[bucket_name] = b['BucketRegion']
+        elif bucket_name in cache:
+            regions[bucket_name] = cache[bucket_name]
+
+    unknown = [b['Name'] for b in buckets if b['Name'] not in regions]
+    located = run_bucket_checks(lambda bucket_name: _get_bucket_location_logic(s3_client, bucket_name), unknown, max_workers)
+    for bucket_name, region in zip(unknown, located):
+        if region:
+            regions[bucket_name] = region
+            learned[bucket_name] = region
+
+    if cache_path and learned:
+        update_region_cache(learned, cache_path)
+    return regions
+
+# ---- 3. Regional Clients ----
+
+def bucket_client(clients, bucket_name):
+    """
+    GETs the calling thread's S3 client for the region of the bucket, falling
+    back to the session region when the bucket region is unknown.
+    """
+    region = clients.get("bucket_regions", {}).get(bucket_name)
+    return thread_client(clients, 's3', region)
+
+def bucket_resource(clients, bucket_name):
+    """GETs the calling thread's S3 resource for the region of the bucket"""
+    region = clients.get("bucket_regions", {}).get(bucket_name)
+    return thread_resource(clients, 's3', region)
@@ -0,0 +1,109 @@
+import argparse
+import gzip
+import json
+import sys
+
+# ---- Initialization and Global Variables ----
+
+REPORT_FORMATS = ["json", "ndjson", "ndjson.gz"]
+DETAILS_PLACEHOLDER = "__REPORT_SINK_DETAILS__"
+
+# ---- 1. Streaming Writer ----
+
+def _open_text(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def open_report_sink(path, header_fields, details_key):
+    """
+    Opens an NDJSON report (gzip-compressed when ´path´ ends with ´.gz´) and writes its header.
+
+    ´header_fields´ are the leading fields of the JSON report and ´details_key´ the
+    name of its list of bucket details.
+    """
+    sink = {
+        "path": path,
+        "file": _open_text(path, 'w'),
+        "records": 0
+    }
+    _write_line(sink, {"record_type": "header", "details_key": details_key, "fields": header_fields})
+    return sink
+
+def _write_line(sink, record):
+    sink["file"].write(json.dumps(record, ensure_ascii=False) + "\n")
+    # Flushed per record so everything written so far survives a crash.
+    sink["file"].flush()
+
+def write_report_record(sink, details):
+    """Appends the details of one bucket to the report"""
+    _write_line(sink, {"record_type": "bucket", "data": details})
+    sink["records"] += 1
+
+def close_report_sink(sink, footer_fields):
+    """
+    Writes the summary footer (the fields that come before the details in the JSON report) and closes the file.
+    """
+    footer = {"record_type": "footer", "records": sink["records"], "fields": footer_fields}
+    _write_line(sink, footer)
+    sink["file"].close()
+
+# ---- 2. Reader and JSON Converter ----
+
+def iter_report_records(path):
+    """Yields every record of an NDJSON report, one line at a time"""
+    with _open_text(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _read_header_footer(path):
+    header, footer = None, None
+    for record in iter_report_records(path):
+        if record["record_type"] == "header":
+            header = record
+        elif record["record_type"] == "footer":
+            footer = record
+    return header, footer
+
+def ndjson_to_json(path, output_path):
+    """
+    Converts an NDJSON report into the JSON report written by ´json.dump(..., indent=4)´.
+
+    The bucket details are streamed from the input, so the whole report is never in memory.
+    """
+    header, footer = _read_header_footer(path)
+    if header is None:
+        raise ValueError("{} has no report header".format(path))
+    if footer is None:
+        print("WARNING: {} has no footer, the run did not finish.".format(path), file=sys.stderr)
+        footer = {"fields": {}}
+
+    skeleton = dict(header["fields"])
+    skeleton.update(footer["fields"])
+    skeleton[header["details_key"]] = DETAILS_PLACEHOLDER
+
+    before, after = json.dumps(skeleton, indent=4, ensure_ascii=False).split(json.dumps(DETAILS_PLACEHOLDER))
+
+    with open(output_path, 'w', encoding='utf-8') as out:
+        out.write(before)
+        written = 0
+        for record in iter_report_records(path):
+            if record["record_type"] != "bucket":
+                continue
+            item = json.dumps(record["data"], indent=4, ensure_ascii=False).replace("\n", "\n        ")
+            out.write(("[\n        " if written == 0 else ",\n        ") + item)
+            written += 1
+        out.write("\n    ]" if written else "[]")
+        out.write(after)
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts an NDJSON S3 audit report into the JSON report format.")
+    parser.add_argument("report", help="Path to the .ndjson or .ndjson.gz report")
+    parser.add_argument("output", help="Path of the JSON report to write")
+    args = parser.parse_args()
+
+    ndjson_to_json(args.report, args.output)
+    print("Report saved to '{}'".format(args.output))
@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from scripts.bucket_s3.check_executor import iter_bucket_checks
+from scripts.bucket_s3.empty_bucket import DELETE_BATCH_SIZE
+from scripts.bucket_s3.transfer import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_FILE_WORKERS,
+    DEFAULT_MAX_CONCURRENCY,
+    MB,
+    parse_s3_url,
+    run_transfers
+)
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".s3sync")
+HASH_BLOCK_SIZE = 1 * MB
+# Files handed to a hashing process at a time; large batches amortize the IPC of small files.
+MAX_HASH_CHUNK = 64
+DEFAULT_DELETE_WORKERS = 4
+ERROR_SAMPLE_SIZE = 20
+
+# ---- 1. File-state Index ----
+
+def default_index_path(source, destination_url):
+    """One index per (local directory, destination) pair, under ´~/.s3sync´"""
+    bucket_name, _ = parse_s3_url(destination_url)
+    digest = hashlib.sha1("{}|{}".format(os.path.abspath(source), destination_url).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(INDEX_DIR, "{}-{}.sqlite".format(bucket_name, digest))
+
+def open_index(index_path):
+    """
+    Opens (or creates) the index. A row means the file with that size, mtime and
+    SHA-256 was uploaded to the destination by a previous sync.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    index = sqlite3.connect(index_path)
+    index.execute("PRAGMA journal_mode=WAL")
+    index.execute("PRAGMA synchronous=NORMAL")
+    index.execute(
+        "CREATE TABLE IF NOT EXISTS files ("
+        "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL"
+        ") WITHOUT ROWID"
+    )
+    return index
+
+# ---- 2. Scan and Hash ----
+
+def scan_directory(source, excluded=()):
+    """
+    Yields ´(relative_path, size, mtime_ns)´ of every file under ´source´ with ´/´ separators.
+    Uses ´os.scandir´ so directories are read once and no file is opened.
+    """
+    pending = [""]
+    while pending:
+        relative_dir = pending.pop()
+        with os.scandir(os.path.join(source, relative_dir) if relative_dir else source) as entries:
+            for entry in entries:
+                relative = relative_dir + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(relative + "/")
+                elif entry.is_file() and relative not in excluded:
+                    stat = entry.stat()
+                    yield relative, stat.st_size, stat.st_mtime_ns
+
+def plan_sync(source, index, excluded=()):
+    """
+    Compares the directory with the index. Files with the same size and mtime as their
+    row are unchanged and are neither hashed nor uploaded. Returns ´(unchanged,
+    candidates, missing)´: candidates are ´(path, size, mtime_ns, indexed_sha256)´ and
+    missing are indexed paths no longer on disk.
+    """
+    indexed = {row[0]: row[1:] for row in index.execute("SELECT path, size, mtime_ns, sha256 FROM files")}
+    unchanged, candidates = 0, []
+    for relative, size, mtime_ns in scan_directory(source, excluded):
+        row = indexed.pop(relative, None)
+        if row is not None and row[0] == size and row[1] == mtime_ns:
+            unchanged += 1
+            continue
+        candidates.append((relative, size, mtime_ns, row[2] if row else None))
+    return unchanged, candidates, sorted(indexed)
+
+def _hash_file(path):
+    """SHA-256 of the file, or None when it can no longer be read (removed while syncing)"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def hash_files(paths, max_workers=None):
+    """Hashes ´paths´ in a process pool (one process per CPU by default). Returns the digests in order."""
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1 or len(paths) <= 1:
+        return [_hash_file(path) for path in paths]
+    chunk = max(1, min(MAX_HASH_CHUNK, len(paths) // (max_workers * 4)))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_hash_file, paths, chunksize=chunk))
+
+# ---- 3. Mirrored Deletes ----
+
+def _delete_keys_logic(job):
+    """Deletes one batch of keys. Returns the keys that were deleted and the errors."""
+    s3_client = get_client('s3', job["region"], job["profile_name"])
+    objects = [{"Key": key} for key in job["keys"]]
+    try:
+        response = s3_client.delete_objects(Bucket=job["bucket"], Delete={"Objects": objects, "Quiet": True})
+    except Exception as e:
+        return [], ["{}: {}".format(key, e) for key in job["keys"]]
+    failed = {error['Key']: error.get('Code') for error in response.get('Errors', [])}
+    return [key for key in job["keys"] if key not in failed], ["{}: {}".format(key, code) for key, code in failed.items()]
+
+# ---- 4. Sync ----
+
+def sync_directory(source, destination_url, delete=False, index_path=None, hash_workers=None,
+                   file_workers=DEFAULT_FILE_WORKERS, profile_name=None, region_name=None, dry_run=False, **transfer_options):
+    """
+    Uploads the new and changed files of ´source´ to ´destination_url´ (s3://bucket/prefix/).
+
+    Files whose size and mtime match the index are skipped without being read. The
+    others are hashed in a process pool; only those whose SHA-256 differs from the index
+    are uploaded (´file_workers´ at a time, see ´transfer.run_transfers´). With ´delete´,
+    objects of files removed locally are deleted. The index trusts the destination:
+    objects changed there by other tools are not detected. Returns the stats.
+    """
+    bucket_name, prefix = parse_s3_url(destination_url)
+    if not os.path.isdir(source):
+        raise ValueError("'{}' is not a directory".format(source))
+    prefix = prefix if not prefix or prefix.endswith("/") else prefix + "/"
+    index_path = index_path or default_index_path(source, destination_url)
+    # The index (and its WAL files) may live inside the synced directory.
+    index_relative = os.path.relpath(os.path.abspath(index_path), os.path.abspath(source)).replace(os.sep, "/")
+    excluded = {index_relative + suffix for suffix in ("", "-wal", "-shm", "-journal")}
+
+    stats = {"scanned": 0, "unchanged": 0, "hashed": 0, "touched": 0, "vanished": 0,
+             "to_upload": 0, "to_upload_bytes": 0, "uploaded": 0, "uploaded_bytes": 0, "failed": 0,
+             "missing_locally": 0, "deleted": 0, "delete_failed": 0, "error_sample": [], "timings": {}}
+    started = time.perf_counter()
+    index = open_index(index_path)
+    try:
+        unchanged, candidates, missing = plan_sync(source, index, excluded)
+        stats["timings"]["scan"] = time.perf_counter() - started
+        stats["unchanged"], stats["missing_locally"] = unchanged, len(missing)
+        stats["scanned"] = unchanged + len(candidates)
+
+        step = time.perf_counter()
+        digests = hash_files([os.path.join(source, relative) for relative, _, _, _ in candidates], hash_workers)
+        stats["timings"]["hash"] = time.perf_counter() - step
+        stats["hashed"] = len(candidates)
+
+        touched, to_upload = [], []
+        for (relative, size, mtime_ns, indexed_digest), digest in zip(candidates, digests):
+            if digest is None:
+                stats["vanished"] += 1
+            elif digest == indexed_digest:
+                # Same content with a new mtime (touched, restored from a backup): only the index changes.
+                touched.append((relative, size, mtime_ns, digest))
+            else:
+                to_upload.append((relative, size, mtime_ns, digest))
+        stats["touched"] = len(touched)
+        stats["to_upload"] = len(to_upload)
+        stats["to_upload_bytes"] = sum(size for _, size, _, _ in to_upload)
+
+        if dry_run:
+            return stats
+
+        with index:
+            index.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", touched)
+
+        step = time.perf_counter()
+        if to_upload:
+            files = [(os.path.join(source, relative), prefix + relative, size) for relative, size, _, _ in to_upload]
+            results, _ = run_transfers("upload", bucket_name, files, file_workers, profile_name=profile_name,
+                                       region_name=region_name, **transfer_options)
+            uploaded = [row for row, result in zip(to_upload, results) if result["status"] == "OK"]
+            with index:
+                index.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", uploaded)
+            stats["uploaded"] = len(uploaded)
+            stats["uploaded_bytes"] = sum(size for _, size, _, _ in uploaded)
+            stats["failed"] = len(to_upload) - len(uploaded)
+            stats["error_sample"] = [
+                "{}: {}".format(result["file"], result["error"]) for result in results if result["error"]
+            ][:ERROR_SAMPLE_SIZE]
+        stats["timings"]["upload"] = time.perf_counter() - step
+
+        if delete and missing:
+            step = time.perf_counter()
+            jobs = (
+                {"bucket": bucket_name, "region": region_name, "profile_name": profile_name,
+                 "keys": [prefix + relative for relative in missing[start:start + DELETE_BATCH_SIZE]]}
+                for start in range(0, len(missing), DELETE_BATCH_SIZE)
+            )
+            for _, (deleted_keys, errors) in iter_bucket_checks(_delete_keys_logic, jobs, DEFAULT_DELETE_WORKERS):
+                with index:
+                    index.executemany("DELETE FROM files WHERE path = ?", [(key[len(prefix):],) for key in deleted_keys])
+                stats["deleted"] += len(deleted_keys)
+                stats["delete_failed"] += len(errors)
+                stats["error_sample"].extend(errors[:ERROR_SAMPLE_SIZE - len(stats["error_sample"])])
+            stats["timings"]["delete"] = time.perf_counter() - step
+    finally:
+        index.close()
+        stats["seconds"] = time.perf_counter() - started
+    return stats
+
+def print_directory_sync_summary(stats, dry_run=False, delete=False):
+    print("\n{:,} file(s) scanned: {:,} unchanged, {:,} hashed ({:,} only touched), {:,} {} ({:,.1f} MB).".format(
+        stats["scanned"], stats["unchanged"], stats["hashed"], stats["touched"], stats["to_upload"],
+        "to upload" if dry_run else "new or changed", stats["to_upload_bytes"] / MB))
+    if stats["missing_locally"]:
+        print("{:,} file(s) removed locally{}.".format(
+            stats["missing_locally"], "" if delete else " (kept at the destination; use --delete to mirror)"))
+    if dry_run:
+        return
+    print("Uploaded {:,} file(s), {:,.1f} MB; {:,} failed. Deleted {:,} object(s); {:,} failed.".format(
+        stats["uploaded"], stats["uploaded_bytes"] / MB, stats["failed"], stats["deleted"], stats["delete_failed"]))
+    print("Done in {:.1f}s ({}).".format(
+        stats["seconds"], ", ".join("{} {:.1f}s".format(name, seconds) for name, seconds in stats["timings"].items())))
+    for error in stats["error_sample"]:
+        print("\t{}".format(error), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Syncs a local directory to S3, uploading only new or changed files (tracked in a local SQLite index)."
+    )
+    parser.add_argument("source", help="Local directory")
+    parser.add_argument("destination", help="s3://bucket/prefix/")
+    parser.add_argument("--delete", action="store_true", help="Delete objects of files removed from the directory.")
+    parser.add_argument("--index", help="SQLite index file (default: one per source/destination under {}).".format(INDEX_DIR))
+    parser.add_argument("--hash-workers", type=int, help="Processes hashing changed files (default: CPU count).")
+    parser.add_argument("--file-workers", type=int, default=DEFAULT_FILE_WORKERS,
+                        help="Number of files uploaded at the same time (default: {}).".format(DEFAULT_FILE_WORKERS))
+    parser.add_argument("--chunk-size-mb", type=float, default=DEFAULT_CHUNK_SIZE / MB,
+                        help="Part size of multipart uploads (default: {:.0f}).".format(DEFAULT_CHUNK_SIZE / MB))
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Part threads per file (default: {}).".format(DEFAULT_MAX_CONCURRENCY))
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--region", help="Region of the bucket (default: the profile region).")
+    parser.add_argument("--dry-run", action="store_true", help="Only scan, hash and count what would be uploaded.")
+    args = parser.parse_args()
+
+    try:
+        result = sync_directory(
+            args.source, args.destination, args.delete, args.index, args.hash_workers, args.file_workers,
+            args.profile, args.region, args.dry_run,
+            chunk_size=int(args.chunk_size_mb * MB), max_concurrency=args.max_concurrency
+        )
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print("Error syncing '{}': {}".format(args.source, e), file=sys.stderr)
+        sys.exit(1)
+    print_directory_sync_summary(result, args.dry_run, args.delete)
+    sys.exit(1 if result["failed"] or result["delete_failed"] else 0)
@@ -0,0 +1,294 @@
+import argparse
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from scripts.bucket_s3.check_executor import iter_bucket_checks
+from scripts.bucket_s3.region_pool import resolve_bucket_regions
+from scripts.bucket_s3.transfer import MB, parse_s3_url
+from scripts.common.clients import get_client
+
+# ---- Initialization and Global Variables ----
+
+DEFAULT_COPY_WORKERS = 16
+DEFAULT_PART_WORKERS = 8
+# Largest object CopyObject accepts; bigger objects are always multipart.
+MAX_COPY_OBJECT_SIZE = 5 * 1024 * MB
+# Part size used for single-part sources copied in parts (> 5 GB only)
+DEFAULT_COPY_PART_SIZE = 256 * MB
+# Listing pages fetched ahead of the comparison, per side.
+PREFETCH_PAGES = 4
+# How often a listing thread blocked on a full buffer checks that the comparison still wants pages.
+QUEUE_PUT_TIMEOUT_SECONDS = 1.0
+PROGRESS_INTERVAL_SECONDS = 5.0
+ERROR_SAMPLE_SIZE = 20
+# Headers carried over when a multipart copy re-creates the object.
+COPIED_HEADERS = ["ContentType", "ContentEncoding", "ContentDisposition", "ContentLanguage", "CacheControl", "Metadata"]
+
+# ---- 1. Sorted Listings ----
+
+def _prefetch_pages(pages, max_pages=PREFETCH_PAGES):
+    """
+    Iterates ´pages´ in a background thread, at most ´max_pages´ ahead of the consumer,
+    so both sides of the sync are listed at the same time as they are compared.
+    """
+    buffer = queue.Queue(maxsize=max_pages)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # Gives up once the consumer is gone, instead of blocking forever on a full buffer.
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=QUEUE_PUT_TIMEOUT_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+def iter_listing(s3_client, bucket_name, prefix):
+    """
+    Yields ´(relative_key, size, etag)´ for every object under ´prefix´, in S3 key order
+    (UTF-8 byte order, which is also the order of Python strings). Folder markers are skipped.
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in _prefetch_pages(paginator.paginate(Bucket=bucket_name, Prefix=prefix)):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith("/"):
+                continue
+            yield obj['Key'][len(prefix):], obj['Size'], obj['ETag']
+
+def merge_listings(source, destination):
+    """
+    Merge-joins two sorted listings and yields ´(relative_key, source_entry, destination_entry)´;
+    the entry missing on one side is None. Only the current entry of each side is in memory.
+    """
+    done = (None, None, None)
+    src, dst = next(source, done), next(destination, done)
+    while src is not done or dst is not done:
+        if dst is done or (src is not done and src[0] < dst[0]):
+            yield src[0], src, None
+            src = next(source, done)
+        elif src is done or dst[0] < src[0]:
+            yield dst[0], None, dst
+            dst = next(destination, done)
+        else:
+            yield src[0], src, dst
+            src, dst = next(source, done), next(destination, done)
+
+# ---- 2. Server-side Copies ----
+
+def _is_multipart_etag(etag):
+    return "-" in etag.strip('"')
+
+def _copy_parts_logic(s3_client, source, destination, size, etag, part_workers):
+    """
+    Copies one object with ´upload_part_copy´, ´part_workers´ parts at a time. A multipart
+    source is copied with its own part size, so the copy gets the same ETag as the source.
+    Headers and tags are carried over, as ´copy_object´ does.
+    """
+    source_client = get_client('s3', source["region"], source["profile_name"])
+    head = source_client.head_object(Bucket=source["bucket"], Key=source["key"])
+    part_size = DEFAULT_COPY_PART_SIZE
+    if _is_multipart_etag(etag):
+        part_size = source_client.head_object(Bucket=source["bucket"], Key=source["key"], PartNumber=1)['ContentLength']
+    arguments = {header: head[header] for header in COPIED_HEADERS if head.get(header)}
+    tags = source_client.get_object_tagging(Bucket=source["bucket"], Key=source["key"]).get('TagSet', [])
+    if tags:
+        arguments["Tagging"] = urlencode([(tag['Key'], tag['Value']) for tag in tags])
+
+    upload = s3_client.create_multipart_upload(Bucket=destination["bucket"], Key=destination["key"], **arguments)
+    upload_id = upload['UploadId']
+    copy_source = {"Bucket": source["bucket"], "Key": source["key"]}
+
+    def copy_part(part_number):
+        start = (part_number - 1) * part_size
+        end = min(start + part_size, size) - 1
+        client = get_client('s3', destination["region"], destination["profile_name"])
+        response = client.upload_part_copy(
+            Bucket=destination["bucket"], Key=destination["key"], UploadId=upload_id, PartNumber=part_number,
+            CopySource=copy_source, CopySourceRange="bytes={}-{}".format(start, end),
+            CopySourceIfMatch=etag
+        )
+        return {"PartNumber": part_number, "ETag": response['CopyPartResult']['ETag']}
+
+    try:
+        with ThreadPoolExecutor(max_workers=part_workers) as executor:
+            parts = list(executor.map(copy_part, range(1, -(-size // part_size) + 1)))
+        s3_client.complete_multipart_upload(
+            Bucket=destination["bucket"], Key=destination["key"], UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+    except Exception:
+        s3_client.abort_multipart_upload(Bucket=destination["bucket"], Key=destination["key"], UploadId=upload_id)
+        raise
+
+def copy_object_logic(job):
+    """
+    Copies one object server side: ´copy_object´ for single-part sources up to 5 GB (keeps
+    the ETag, metadata and tags), parts for multipart or bigger sources. Returns None or the error.
+    """
+    source, destination, size, etag = job["source"], job["destination"], job["size"], job["etag"]
+    s3_client = get_client('s3', destination["region"], destination["profile_name"])
+    try:
+        if _is_multipart_etag(etag) or size > MAX_COPY_OBJECT_SIZE:
+            _copy_parts_logic(s3_client, source, destination, size, etag, job["part_workers"])
+        else:
+            s3_client.copy_object(
+                Bucket=destination["bucket"], Key=destination["key"],
+                CopySource={"Bucket": source["bucket"], "Key": source["key"]},
+                CopySourceIfMatch=etag
+            )
+        return None
+    except Exception as e:
+        return str(e)
+
+# ---- 3. Sync ----
+
+def _new_stats():
+    return {
+        "source_objects": 0,
+        "identical": 0,
+        "to_copy": 0,
+        "to_copy_bytes": 0,
+        "copied": 0,
+        "copied_bytes": 0,
+        "failed": 0,
+        "only_at_destination": 0,
+        "error_sample": [],
+        "started": time.perf_counter()
+    }
+
+def _print_progress(stats):
+    elapsed = time.perf_counter() - stats["started"]
+    print("\tcompared {:,}, identical {:,}, copied {:,} ({:,.1f} MB, {:,.1f} MB/s), {:,} failed".format(
+        stats["source_objects"], stats["identical"], stats["copied"], stats["copied_bytes"] / MB,
+        stats["copied_bytes"] / MB / elapsed if elapsed else 0, stats["failed"]))
+
+def sync_s3(source_url, destination_url, max_workers=DEFAULT_COPY_WORKERS, part_workers=DEFAULT_PART_WORKERS,
+            profile_name=None, dry_run=False):
+    """
+    Copies every object of ´source_url´ (s3://bucket/prefix/) missing or different at
+    ´destination_url´, server side and ´max_workers´ objects at a time. Objects with the
+    same size and ETag on both sides are skipped. Returns the stats.
+    """
+    source_bucket, source_prefix = parse_s3_url(source_url)
+    destination_bucket, destination_prefix = parse_s3_url(destination_url)
+    regions = resolve_bucket_regions(
+        get_client('s3', profile_name=profile_name), [{'Name': source_bucket}, {'Name': destination_bucket}]
+    )
+    source_region, destination_region = regions.get(source_bucket), regions.get(destination_bucket)
+    stats = _new_stats()
+
+    source_listing = iter_listing(get_client('s3', source_region, profile_name), source_bucket, source_prefix)
+    destination_listing = iter_listing(get_client('s3', destination_region, profile_name), destination_bucket, destination_prefix)
+
+    def copy_jobs():
+        for relative_key, src, dst in merge_listings(source_listing, destination_listing):
+            if src is None:
+                stats["only_at_destination"] += 1
+                continue
+            stats["source_objects"] += 1
+            if dst is not None and dst[1] == src[1] and dst[2] == src[2]:
+                stats["identical"] += 1
+                continue
+            stats["to_copy"] += 1
+            stats["to_copy_bytes"] += src[1]
+            if dry_run:
+                continue
+            yield {
+                "source": {"bucket": source_bucket, "key": source_prefix + relative_key,
+                           "region": source_region, "profile_name": profile_name},
+                "destination": {"bucket": destination_bucket, "key": destination_prefix + relative_key,
+                                "region": destination_region, "profile_name": profile_name},
+                "size": src[1],
+                "etag": src[2],
+                "part_workers": part_workers
+            }
+
+    print("{} 's3://{}/{}' -> 's3://{}/{}'...".format(
+        "Comparing" if dry_run else "Syncing", source_bucket, source_prefix, destination_bucket, destination_prefix))
+    last_print = time.perf_counter()
+    try:
+        # Jobs are pulled from the merged listings only as copy slots free up.
+        for job, error in iter_bucket_checks(copy_object_logic, copy_jobs(), max_workers):
+            if error is None:
+                stats["copied"] += 1
+                stats["copied_bytes"] += job["size"]
+            else:
+                stats["failed"] += 1
+                if len(stats["error_sample"]) < ERROR_SAMPLE_SIZE:
+                    stats["error_sample"].append({"key": job["source"]["key"], "error": error})
+            if time.perf_counter() - last_print >= PROGRESS_INTERVAL_SECONDS:
+                _print_progress(stats)
+                last_print = time.perf_counter()
+    except Exception as e:
+        print("Error listing '{}' or '{}': {}".format(source_url, destination_url, e), file=sys.stderr)
+        stats["listing_error"] = str(e)
+    finally:
+        # Stops the prefetching threads when the comparison ends early.
+        source_listing.close()
+        destination_listing.close()
+
+    stats["seconds"] = round(time.perf_counter() - stats["started"], 1)
+    stats["dry_run"] = dry_run
+    return stats
+
+def print_sync_summary(stats):
+    print("\n{:,} source object(s): {:,} identical, {:,} to copy ({:,.1f} MB); {:,} only at the destination.".format(
+        stats["source_objects"], stats["identical"], stats["to_copy"], stats["to_copy_bytes"] / MB, stats["only_at_destination"]))
+    if stats["dry_run"]:
+        return
+    print("Copied {:,} object(s), {:,.1f} MB in {}s; {:,} failed.".format(
+        stats["copied"], stats["copied_bytes"] / MB, stats["seconds"], stats["failed"]))
+    for error in stats["error_sample"]:
+        print("\t{}: {}".format(error["key"], error["error"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Server-side sync between two S3 locations: copies objects missing or different (size/ETag) at the destination."
+    )
+    parser.add_argument("source", help="s3://bucket/prefix/")
+    parser.add_argument("destination", help="s3://bucket/prefix/")
+    parser.add_argument("--workers", type=int, default=DEFAULT_COPY_WORKERS,
+                        help="Number of objects copied at the same time (default: {}).".format(DEFAULT_COPY_WORKERS))
+    parser.add_argument("--part-workers", type=int, default=DEFAULT_PART_WORKERS,
+                        help="Parts copied at the same time per multipart object (default: {}).".format(DEFAULT_PART_WORKERS))
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--dry-run", action="store_true", help="Only compare and count what would be copied.")
+    args = parser.parse_args()
+
+    try:
+        parse_s3_url(args.source), parse_s3_url(args.destination)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    result = sync_s3(args.source, args.destination, args.workers, args.part_workers, args.profile, args.dry_run)
+    print_sync_summary(result)
+    sys.exit(1 if result["failed"] or result.get("listing_error") else 0)
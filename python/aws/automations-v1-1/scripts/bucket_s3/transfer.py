@@ -0,0 +1,308 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.s3.transfer import TransferConfig
+from scripts.common.clients import CLIENT_SETTINGS, configure_clients, get_client
+
+# ---- Initialization and Global Variables ----
+
+MB = 1024 ** 2
+# s3transfer defaults
+DEFAULT_MULTIPART_THRESHOLD = 8 * MB
+DEFAULT_CHUNK_SIZE = 8 * MB
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_FILE_WORKERS = 4
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+# S3 multipart limits
+MIN_PART_SIZE = 5 * MB
+MAX_PART_SIZE = 5 * 1024 * MB
+MAX_PARTS = 10000
+# Auto-tuning: each part in flight should take about this long on the measured link,
+# long enough to amortize the per-request latency, short enough to retry cheaply.
+TARGET_PART_SECONDS = 4.0
+AUTO_MIN_CHUNK_SIZE = 8 * MB
+AUTO_MAX_CHUNK_SIZE = 512 * MB
+# Bytes that have to be transferred before the link speed is trusted.
+MIN_MEASURED_BYTES = 16 * MB
+
+# ---- 1. Transfer Settings ----
+
+def parse_s3_url(url):
+    """´s3://bucket/some/key´ -> ´("bucket", "some/key")´"""
+    if not url.startswith("s3://"):
+        raise ValueError("Expected an S3 URL like s3://bucket/prefix, got '{}'".format(url))
+    bucket_name, _, key = url[len("s3://"):].partition("/")
+    return bucket_name, key
+
+def transfer_config(multipart_threshold=DEFAULT_MULTIPART_THRESHOLD, chunk_size=DEFAULT_CHUNK_SIZE,
+                    max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    return TransferConfig(
+        multipart_threshold=multipart_threshold,
+        multipart_chunksize=chunk_size,
+        max_concurrency=max_concurrency,
+        use_threads=max_concurrency > 1
+    )
+
+def auto_chunk_size(file_size, link_bytes_per_second=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Picks the part size of one file: about ´TARGET_PART_SECONDS´ of the link share of
+    each thread, small enough that every thread gets a part of the file, and large
+    enough to stay under the 10,000 parts of an S3 object. Rounded up to whole MB.
+    """
+    chunk_size = AUTO_MIN_CHUNK_SIZE
+    if link_bytes_per_second:
+        chunk_size = link_bytes_per_second / max(1, max_concurrency) * TARGET_PART_SECONDS
+    chunk_size = min(chunk_size, AUTO_MAX_CHUNK_SIZE, -(-file_size // max(1, max_concurrency)))
+    chunk_size = max(chunk_size, AUTO_MIN_CHUNK_SIZE, -(-file_size // MAX_PARTS))
+    chunk_size = -(-int(chunk_size) // MB) * MB
+    return max(MIN_PART_SIZE, min(MAX_PART_SIZE, chunk_size))
+
+def _ensure_pool_size(max_concurrency):
+    # One client per file worker thread, shared by the ´max_concurrency´ part threads of its file.
+    if CLIENT_SETTINGS["max_pool_connections"] < max_concurrency:
+        configure_clients(max_pool_connections=max_concurrency)
+
+# ---- 2. Planning ----
+
+def plan_upload(source, destination_url):
+    """
+    Returns ´[(local_path, key, size), ...]´ for a file or every file under a directory.
+    A destination ending in ´/´ (or a directory source) is used as key prefix.
+    """
+    bucket_name, key = parse_s3_url(destination_url)
+    if os.path.isfile(source):
+        if not key or key.endswith("/"):
+            key = key + os.path.basename(source)
+        return bucket_name, [(source, key, os.path.getsize(source))]
+
+    if not os.path.isdir(source):
+        raise ValueError("'{}' is not a file or directory".format(source))
+    prefix = key if not key or key.endswith("/") else key + "/"
+    files = []
+    for root, _, names in os.walk(source):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, source).replace(os.sep, "/")
+            files.append((path, prefix + relative, os.path.getsize(path)))
+    return bucket_name, sorted(files, key=lambda item: item[1])
+
+def local_download_path(destination, relative_key):
+    """
+    Local path of ´relative_key´ under ´destination´, or None (with a warning) when the
+    key would be written outside it, e.g. ´a/../../etc/x´.
+    """
+    path = os.path.normpath(os.path.join(destination, *relative_key.split("/")))
+    root = os.path.realpath(destination)
+    if os.path.commonpath([root, os.path.realpath(path)]) != root or os.path.realpath(path) == root:
+        print("Skipping '{}': it would be written outside '{}'".format(relative_key, destination), file=sys.stderr)
+        return None
+    return path
+
+def plan_download(source_url, destination, profile_name=None):
+    """
+    Returns ´[(local_path, key, size), ...]´ for one key, or every object under a prefix
+    (a source ending in ´/´). Folder markers (´folder/´) are skipped.
+    """
+    bucket_name, key = parse_s3_url(source_url)
+    s3_client = get_client('s3', profile_name=profile_name)
+
+    if key and not key.endswith("/"):
+        size = s3_client.head_object(Bucket=bucket_name, Key=key)['ContentLength']
+        if not (os.path.isdir(destination) or destination.endswith(os.sep)):
+            return bucket_name, [(destination, key, size)]
+        path = local_download_path(destination, os.path.basename(key))
+        return bucket_name, [(path, key, size)] if path else []
+
+    files = []
+    for page in s3_client.get_paginator('list_objects_v2').paginate(Bucket=bucket_name, Prefix=key):
+        for obj in page.get('Contents', []):
+            if obj['Key'].endswith("/"):
+                continue
+            path = local_download_path(destination, obj['Key'][len(key):])
+            if path:
+                files.append((path, obj['Key'], obj['Size']))
+    return bucket_name, files
+
+# ---- 3. Concurrent Transfers ----
+
+def _new_progress(total_bytes):
+    return {
+        "lock": threading.Lock(),
+        "total_bytes": total_bytes,
+        "bytes": 0,  # reported by the transfer callbacks while parts are in flight
+        "completed_bytes": 0,  # of the files already finished
+        "started": time.perf_counter()
+    }
+
+def _add_bytes(progress, amount):
+    with progress["lock"]:
+        progress["bytes"] += amount
+
+def _transferred_bytes(progress):
+    return max(progress["bytes"], progress["completed_bytes"])
+
+def measured_link_speed(progress):
+    """Bytes per second of every transfer so far, or None until enough was transferred"""
+    with progress["lock"]:
+        elapsed = time.perf_counter() - progress["started"]
+        transferred = _transferred_bytes(progress)
+        if transferred < MIN_MEASURED_BYTES or elapsed <= 0:
+            return None
+        return transferred / elapsed
+
+def _transfer_file_logic(direction, bucket_name, local_path, key, size, settings, progress, profile_name):
+    chunk_size = settings["chunk_size"]
+    if settings["auto_tune"]:
+        chunk_size = auto_chunk_size(size, measured_link_speed(progress), settings["max_concurrency"])
+    config = transfer_config(settings["multipart_threshold"], chunk_size, settings["max_concurrency"])
+    s3_client = get_client('s3', settings["region"], profile_name)
+
+    result = {"file": local_path, "key": key, "size": size, "chunk_size": chunk_size,
+              "multipart": size >= settings["multipart_threshold"], "status": "OK", "error": None}
+    started = time.perf_counter()
+    try:
+        if direction == "upload":
+            s3_client.upload_file(local_path, bucket_name, key, Config=config,
+                                  Callback=lambda amount: _add_bytes(progress, amount))
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(local_path)), exist_ok=True)
+            s3_client.download_file(bucket_name, key, local_path, Config=config,
+                                    Callback=lambda amount: _add_bytes(progress, amount))
+    except Exception as e:
+        result["status"] = "ERROR"
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - started
+    if result["status"] == "OK":
+        with progress["lock"]:
+            progress["completed_bytes"] += size
+    return result
+
+def _print_progress(progress, done, total):
+    with progress["lock"]:
+        elapsed = time.perf_counter() - progress["started"]
+        transferred = _transferred_bytes(progress)
+        print("\t{}/{} file(s), {:,.1f} of {:,.1f} MB, {:,.1f} MB/s".format(
+            done, total, transferred / MB, progress["total_bytes"] / MB, transferred / MB / elapsed if elapsed else 0))
+
+def run_transfers(direction, bucket_name, files, file_workers=DEFAULT_FILE_WORKERS,
+                  multipart_threshold=DEFAULT_MULTIPART_THRESHOLD, chunk_size=DEFAULT_CHUNK_SIZE,
+                  max_concurrency=DEFAULT_MAX_CONCURRENCY, auto_tune=False, profile_name=None, region_name=None):
+    """
+    Uploads or downloads ´files´ (see ´plan_upload´ / ´plan_download´), ´file_workers´
+    files at a time, each with up to ´max_concurrency´ part threads. Returns the
+    per-file results (in plan order) and the overall stats.
+    """
+    _ensure_pool_size(max_concurrency)
+    settings = {
+        "multipart_threshold": multipart_threshold,
+        "chunk_size": chunk_size,
+        "max_concurrency": max_concurrency,
+        "auto_tune": auto_tune,
+        "region": region_name
+    }
+    progress = _new_progress(sum(size for _, _, size in files))
+    results = [None] * len(files)
+    last_print = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, file_workers)) as executor:
+        futures = {
+            executor.submit(_transfer_file_logic, direction, bucket_name, path, key, size, settings, progress, profile_name): index
+            for index, (path, key, size) in enumerate(files)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if time.perf_counter() - last_print >= PROGRESS_INTERVAL_SECONDS:
+                _print_progress(progress, done, len(files))
+                last_print = time.perf_counter()
+
+    elapsed = time.perf_counter() - progress["started"]
+    stats = {
+        "files": len(files),
+        "failed": sum(1 for result in results if result["status"] != "OK"),
+        "bytes": progress["completed_bytes"],
+        "seconds": elapsed,
+        "mb_per_second": progress["completed_bytes"] / MB / elapsed if elapsed else 0.0
+    }
+    return results, stats
+
+# ---- 4. Summary ----
+
+def print_transfer_summary(direction, results, stats):
+    header = ["FILE", "KEY", "SIZE MB", "CHUNK MB", "SECONDS", "MB/S", "STATUS"]
+    rows = [
+        [
+            result["file"], result["key"], "{:,.1f}".format(result["size"] / MB),
+            "{:.0f}".format(result["chunk_size"] / MB) if result["multipart"] else "-",
+            "{:.2f}".format(result["seconds"]),
+            "{:,.1f}".format(result["size"] / MB / result["seconds"]) if result["seconds"] else "-",
+            result["status"]
+        ]
+        for result in results
+    ]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    print("\n" + " | ".join(cell.ljust(width) for cell, width in zip(header, widths)))
+    print("-+-".join("-" * width for width in widths))
+    for row in rows:
+        print(" | ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+    for result in results:
+        if result["error"]:
+            print("Error in {} '{}': {}".format(direction, result["file"], result["error"]), file=sys.stderr)
+    print("\n{} {} file(s), {:,.1f} MB in {:.1f}s: {:,.1f} MB/s ({} failed)".format(
+        "Uploaded" if direction == "upload" else "Downloaded",
+        stats["files"] - stats["failed"], stats["bytes"] / MB, stats["seconds"], stats["mb_per_second"], stats["failed"]))
+
+def transfer(direction, source, destination, profile_name=None, **options):
+    """Plans and runs an upload (local -> s3://) or download (s3:// -> local), then prints the summary"""
+    try:
+        if direction == "upload":
+            bucket_name, files = plan_upload(source, destination)
+        else:
+            bucket_name, files = plan_download(source, destination, profile_name)
+    except Exception as e:
+        print("Error preparing the {}: {}".format(direction, e), file=sys.stderr)
+        return None, None
+
+    if not files:
+        print("Nothing to {}.".format(direction))
+        return [], None
+    print("{} {} file(s), {:,.1f} MB...".format(
+        "Uploading" if direction == "upload" else "Downloading", len(files), sum(size for _, _, size in files) / MB))
+    results, stats = run_transfers(direction, bucket_name, files, profile_name=profile_name, **options)
+    print_transfer_summary(direction, results, stats)
+    return results, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Uploads/downloads files and directories to/from S3 with tunable multipart transfers.")
+    parser.add_argument("direction", choices=["upload", "download"])
+    parser.add_argument("source", help="Local file/directory (upload) or s3://bucket/key-or-prefix/ (download)")
+    parser.add_argument("destination", help="s3://bucket/key-or-prefix/ (upload) or local file/directory (download)")
+    parser.add_argument("--file-workers", type=int, default=DEFAULT_FILE_WORKERS,
+                        help="Number of files transferred at the same time (default: {}).".format(DEFAULT_FILE_WORKERS))
+    parser.add_argument("--multipart-threshold-mb", type=float, default=DEFAULT_MULTIPART_THRESHOLD / MB,
+                        help="Files from this size up use multipart transfers (default: {:.0f}).".format(DEFAULT_MULTIPART_THRESHOLD / MB))
+    parser.add_argument("--chunk-size-mb", type=float, default=DEFAULT_CHUNK_SIZE / MB,
+                        help="Part size of multipart transfers (default: {:.0f}).".format(DEFAULT_CHUNK_SIZE / MB))
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Part threads per file (default: {}).".format(DEFAULT_MAX_CONCURRENCY))
+    parser.add_argument("--auto-tune", action="store_true",
+                        help="Pick the part size of each file from its size and the link speed measured so far.")
+    parser.add_argument("--profile", help="AWS profile (default: default credentials).")
+    parser.add_argument("--region", help="Region of the bucket (default: the profile region).")
+    args = parser.parse_args()
+
+    results, stats = transfer(
+        args.direction, args.source, args.destination, args.profile,
+        file_workers=args.file_workers,
+        multipart_threshold=int(args.multipart_threshold_mb * MB),
+        chunk_size=int(args.chunk_size_mb * MB),
+        max_concurrency=args.max_concurrency,
+        auto_tune=args.auto_tune,
+        region_name=args.region
+    )
+    sys.exit(0 if results is not None and (stats is None or not stats["failed"]) else 1)
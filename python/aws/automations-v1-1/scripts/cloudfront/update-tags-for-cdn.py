@@ -1,5 +1,12 @@
 import logging
-import boto3
+import os
+import sys
+
+# O hífen no nome impede o import, então o script só roda como
+# ´python scripts/cloudfront/update-tags-for-cdn.py´: a raiz do projeto entra no path para ´scripts.common´.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from scripts.common.clients import get_client
 from botocore.exceptions import ClientError
 from colorama import init, Fore, Back, Style
 
@@ -9,9 +16,7 @@ init(autoreset=True, color=True, style=True)
 # Definindo as configuracoes basicas de logging
 logging.basicConfig(level=logging.INFO)
 
-# Inicializando o cliente Redis
-cdn_client = boto3.client('elasticache')
-
+# O cliente Redis é criado no primeiro uso (get_client('elasticache'))
 key = ''
 value_key = ''
 new_tags = {'Key': key, 'Value': value_key}
@@ -27,7 +32,7 @@ def list_tags(resource_arn):
 
     """Lista todas as tags de um recurso Redis."""
     try:
-        response = cdn_client.list_tags_for_resource(
+        response = get_client('elasticache').list_tags_for_resource(
             ResourceName=resource_arn
         )
         tags = response.get('Tags', [])
@@ -45,14 +50,14 @@ def update_tags(resource_arn, new_tags):
         current_tags= list_tags(resource_arn)
         if current_tags is False:
             return False
-        cdn_client.add_tags_to_resource(
+        get_client('elasticache').add_tags_to_resource(
             ResourceName=resource_arn,
             Tags=[new_tags]
         )
         logging.info(Fore.GREEN + "Tags atualizadas com sucesso para {}: {}".format(resource_arn, new_tags))
 
         logging.info(Fore.CYAN + "Verificando tags atualizadas para {}".format(resource_arn))
-        response_updated = cdn_client.list_tags_for_resource(
+        response_updated = get_client('elasticache').list_tags_for_resource(
             ResourceName=resource_arn
         )
         updated_tags = response_updated.get('Tags', {}).get('Items',[])
@@ -0,0 +1,146 @@
+import functools
+import threading
+import boto3
+from botocore.config import Config
+from scripts.common.rate_control import (
+    before_send_handler,
+    default_rate_controller,
+    needs_retry_handler
+)
+
+# ---- Initialization and Global Variables ----
+
+# Connection settings of every client built by this module (see ´configure_clients()´).
+CLIENT_SETTINGS = {
+    # Shared by the threads of one client (bucket checks, sharded listings).
+    "max_pool_connections": 50,
+    "tcp_keepalive": True,
+    "connect_timeout": 5,
+    "read_timeout": 60
+}
+
+# (profile, region) -> boto3 Session
+_sessions = {}
+# profile -> account ID
+_account_ids = {}
+# boto3 sessions are not thread-safe while they build clients.
+_factory_lock = threading.Lock()
+# Per-thread client/resource cache: (kind, service, region, profile) -> client
+_local = threading.local()
+
+# ---- 1. Client Configuration ----
+
+def configure_clients(**settings):
+    """
+    Changes the connection settings (´max_pool_connections´, ´tcp_keepalive´,
+    ´connect_timeout´, ´read_timeout´) of the clients created from now on.
+    """
+    unknown = set(settings) - set(CLIENT_SETTINGS)
+    if unknown:
+        raise ValueError("Unknown client settings: {}".format(", ".join(sorted(unknown))))
+    CLIENT_SETTINGS.update(settings)
+
+def client_config(**overrides):
+    """
+    Returns the botocore ´Config´ of every client. botocore's own retries are turned
+    off because the rate-control layer decides them (see ´attach_rate_control´).
+    """
+    settings = dict(CLIENT_SETTINGS)
+    settings["retries"] = {"mode": "standard", "total_max_attempts": 1}
+    settings.update(overrides)
+    return Config(**settings)
+
+def attach_rate_control(client, controller=None):
+    """
+    Registers the shared token buckets and retry budget on a client. Returns the client.
+    """
+    controller = controller or default_rate_controller()
+    service_name = client.meta.service_model.service_id.hyphenize()
+    events = client.meta.events
+
+    events.register_first(
+        "before-send.{}".format(service_name),
+        functools.partial(before_send_handler, controller),
+        unique_id="rate-control-before-send"
+    )
+    events.register_first(
+        "needs-retry.{}".format(service_name),
+        functools.partial(needs_retry_handler, controller),
+        unique_id="rate-control-needs-retry"
+    )
+    return client
+
+# ---- 2. Client Factory ----
+
+def create_client(service_name, region_name=None, session=None, controller=None, **config_overrides):
+    """
+    Creates a client (from ´session´, or boto3's default session) that goes through the rate-control layer.
+    """
+    factory = session.client if session is not None else boto3.client
+    client = factory(service_name, region_name=region_name, config=client_config(**config_overrides))
+    return attach_rate_control(client, controller)
+
+def create_resource(service_name, region_name=None, session=None, controller=None, **config_overrides):
+    """Same as ´create_client()´ for boto3 resources"""
+    factory = session.resource if session is not None else boto3.resource
+    resource = factory(service_name, region_name=region_name, config=client_config(**config_overrides))
+    attach_rate_control(resource.meta.client, controller)
+    return resource
+
+# ---- 3. Pooled Sessions and Thread-local Clients ----
+
+def get_session(profile_name=None, region_name=None):
+    """
+    GETs the session of the profile (None: default credentials) and default region,
+    creating it once per process.
+    """
+    key = (profile_name, region_name)
+    session = _sessions.get(key)
+    if session is None:
+        with _factory_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = boto3.Session(profile_name=profile_name, region_name=region_name)
+    return session
+
+def _thread_cached(kind, service_name, region_name, profile_name):
+    cache = getattr(_local, "clients", None)
+    if cache is None:
+        cache = _local.clients = {}
+
+    key = (kind, service_name, region_name, profile_name)
+    if key not in cache:
+        # Regional clients share the profile's session: every session loads its own
+        # copy of the service models, which is far more memory than a client.
+        session = get_session(profile_name)
+        factory = create_client if kind == "client" else create_resource
+        with _factory_lock:
+            cache[key] = factory(service_name, region_name, session)
+    return cache[key]
+
+def get_client(service_name, region_name=None, profile_name=None):
+    """
+    GETs the calling thread's client of the service, creating it on first use. Modules
+    call this where they need a client instead of building one at import time, so the
+    service model and credentials are only loaded when a feature is actually used.
+
+    Every thread keeps its own clients (and connection pools) per region, all built
+    from the cached session of the profile.
+    """
+    return _thread_cached("client", service_name, region_name, profile_name)
+
+def get_resource(service_name, region_name=None, profile_name=None):
+    """Same as ´get_client()´ for boto3 resources"""
+    return _thread_cached("resource", service_name, region_name, profile_name)
+
+# ---- 4. Identity ----
+
+def get_account_id(profile_name=None):
+    """
+    GETs the AWS account ID of the profile. STS is only called the first time.
+    """
+    account_id = _account_ids.get(profile_name)
+    if account_id is None:
+        account_id = get_client('sts', profile_name=profile_name).get_caller_identity()['Account']
+        _account_ids[profile_name] = account_id
+    return account_id
@@ -0,0 +1,252 @@
+import random
+import threading
+import time
+from botocore.exceptions import ConnectionError as BotocoreConnectionError, HTTPClientError
+
+# ---- Initialization and Global Variables ----
+
+THROTTLE_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "ProvisionedThroughputExceededException",
+    "TransactionInProgressException",
+    "RequestLimitExceeded",
+    "BandwidthLimitExceeded",
+    "LimitExceededException",
+    "RequestThrottled",
+    "SlowDown",
+    "PriorRequestNotComplete",
+    "EC2ThrottledException"
+}
+TRANSIENT_ERROR_CODES = {
+    "RequestTimeout",
+    "RequestTimeoutException",
+    "InternalError",
+    "ServiceUnavailable"
+}
+TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+
+DEFAULT_MAX_ATTEMPTS = 5
+BASE_BACKOFF_SECONDS = 0.1
+MAX_BACKOFF_SECONDS = 20.0
+
+# Token bucket of one operation: off until the first throttle, then starts at the
+# measured success rate and follows AIMD.
+MIN_RATE = 0.5
+MAX_RATE = 10000.0
+DECREASE_FACTOR = 0.7
+# The rate grows by about this fraction (at least 1 request/s) per second without throttles.
+INCREASE_FRACTION = 0.05
+DECREASE_COOLDOWN_SECONDS = 1.0
+MEASURE_INTERVAL_SECONDS = 1.0
+MEASURE_SMOOTHING = 0.8
+
+# Retry budget shared by every client of the controller (same costs as botocore's standard mode).
+RETRY_BUDGET_CAPACITY = 500
+RETRY_COST = 5
+TIMEOUT_RETRY_COST = 10
+NO_RETRY_REFUND = 1
+
+# ---- 1. Controller ----
+
+def new_rate_controller(max_attempts=DEFAULT_MAX_ATTEMPTS, retry_budget=RETRY_BUDGET_CAPACITY):
+    """
+    Returns the shared state of the rate-control layer: one adaptive token bucket
+    per ´(service, operation)´ and one retry budget for every client using it.
+    """
+    return {
+        "lock": threading.Lock(),
+        "max_attempts": max_attempts,
+        "operations": {},
+        "retry_budget": {"capacity": retry_budget, "available": retry_budget},
+        "stats": {"requests": 0, "throttles": 0, "retries": 0, "retries_denied": 0}
+    }
+
+_default_controller = new_rate_controller()
+
+def default_rate_controller():
+    """GETs the controller shared by every client created without an explicit one"""
+    return _default_controller
+
+def _operation_state(controller, service_name, operation_name):
+    key = (service_name, operation_name)
+    state = controller["operations"].get(key)
+    if state is None:
+        state = {
+            "enabled": False,
+            "rate": MAX_RATE,
+            "tokens": 0.0,
+            "last_refill": time.monotonic(),
+            "last_decrease": float('-inf'),
+            "success_rate": 0.0,
+            "measure_start": time.monotonic(),
+            "measure_count": 0,
+            "throttles": 0
+        }
+        controller["operations"][key] = state
+    return state
+
+def _measure_success(state, now):
+    elapsed = now - state["measure_start"]
+    if elapsed >= MEASURE_INTERVAL_SECONDS:
+        current = state["measure_count"] / elapsed
+        state["success_rate"] = MEASURE_SMOOTHING * current + (1 - MEASURE_SMOOTHING) * state["success_rate"]
+        state["measure_start"] = now
+        state["measure_count"] = 0
+    state["measure_count"] += 1
+
+def _estimated_success_rate(state, now):
+    # A burst shorter than the interval is spread over the whole interval, so the
+    # first throttle of a run does not take the burst for the sustainable rate.
+    current = state["measure_count"] / max(now - state["measure_start"], MEASURE_INTERVAL_SECONDS)
+    return max(current, state["success_rate"])
+
+# ---- 2. Adaptive Token Buckets ----
+
+def acquire_token(controller, service_name, operation_name):
+    """
+    Blocks until the operation may send a request. Operations that were never
+    throttled are not limited at all.
+    """
+    with controller["lock"]:
+        state = _operation_state(controller, service_name, operation_name)
+        controller["stats"]["requests"] += 1
+
+    while True:
+        with controller["lock"]:
+            if not state["enabled"]:
+                return
+            now = time.monotonic()
+            capacity = max(1.0, state["rate"])
+            state["tokens"] = min(capacity, state["tokens"] + (now - state["last_refill"]) * state["rate"])
+            state["last_refill"] = now
+            if state["tokens"] >= 1.0:
+                state["tokens"] -= 1.0
+                return
+            wait = (1.0 - state["tokens"]) / state["rate"]
+        time.sleep(wait)
+
+def record_throttle(controller, service_name, operation_name):
+    """
+    The first throttle limits the operation to the rate it was getting through, later
+    ones decrease the limit multiplicatively. Throttles of the same burst only count
+    once per cooldown.
+    """
+    with controller["lock"]:
+        state = _operation_state(controller, service_name, operation_name)
+        state["throttles"] += 1
+        controller["stats"]["throttles"] += 1
+
+        now = time.monotonic()
+        if now - state["last_decrease"] < DECREASE_COOLDOWN_SECONDS:
+            return
+        if state["enabled"]:
+            state["rate"] = max(MIN_RATE, state["rate"] * DECREASE_FACTOR)
+        else:
+            state["rate"] = max(MIN_RATE, _estimated_success_rate(state, now))
+        state["enabled"] = True
+        state["tokens"] = 0.0
+        state["last_refill"] = now
+        state["last_decrease"] = now
+
+def record_success(controller, service_name, operation_name):
+    """Additive increase of a limited operation"""
+    with controller["lock"]:
+        state = _operation_state(controller, service_name, operation_name)
+        _measure_success(state, time.monotonic())
+        if state["enabled"]:
+            step = max(1.0, state["rate"] * INCREASE_FRACTION)
+            state["rate"] = min(MAX_RATE, state["rate"] + step / state["rate"])
+
+# ---- 3. Retry Budget ----
+
+def spend_retry_budget(controller, cost):
+    """Return ´TRUE´ if the shared budget still allows a retry of ´cost´"""
+    with controller["lock"]:
+        budget = controller["retry_budget"]
+        if budget["available"] < cost:
+            controller["stats"]["retries_denied"] += 1
+            return False
+        budget["available"] -= cost
+        controller["stats"]["retries"] += 1
+        return True
+
+def refund_retry_budget(controller, amount):
+    with controller["lock"]:
+        budget = controller["retry_budget"]
+        budget["available"] = min(budget["capacity"], budget["available"] + amount)
+
+def rate_control_stats(controller):
+    """
+    Returns the counters of the controller and the current limit of every throttled operation.
+    """
+    with controller["lock"]:
+        return {
+            "requests": controller["stats"]["requests"],
+            "throttles": controller["stats"]["throttles"],
+            "retries": controller["stats"]["retries"],
+            "retries_denied": controller["stats"]["retries_denied"],
+            "retry_budget_available": controller["retry_budget"]["available"],
+            "limited_operations": {
+                "{}.{}".format(service_name, operation_name): round(state["rate"], 2)
+                for (service_name, operation_name), state in sorted(controller["operations"].items())
+                if state["enabled"]
+            }
+        }
+
+# ---- 4. botocore Event Handlers ----
+
+def _split_event_name(event_name):
+    # e.g. "before-send.s3.ListObjectsV2" -> ("s3", "ListObjectsV2")
+    _, service_name, operation_name = event_name.split('.', 2)
+    return service_name, operation_name
+
+def _error_details(response, caught_exception):
+    if caught_exception is not None or response is None:
+        return None, None
+    http_response, parsed = response
+    return parsed.get('Error', {}).get('Code'), http_response.status_code
+
+def _backoff_delay(attempts):
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * (2 ** (attempts - 1))))
+
+def before_send_handler(controller, event_name=None, **kwargs):
+    """Waits for a token of the operation before every attempt, retries included"""
+    acquire_token(controller, *_split_event_name(event_name))
+    # Must return None, any other value would replace the HTTP response.
+    return None
+
+def needs_retry_handler(controller, response=None, attempts=None, caught_exception=None, request_dict=None, event_name=None, **kwargs):
+    """
+    Decides on retries in place of botocore: feeds the outcome of each attempt to the
+    token bucket of the operation and only retries while the shared budget allows it.
+    Returns the delay before the next attempt, or None to stop.
+    """
+    service_name, operation_name = _split_event_name(event_name)
+    context = request_dict.get('context', {}) if request_dict else {}
+    code, status_code = _error_details(response, caught_exception)
+
+    if caught_exception is None and code is None and status_code is not None and status_code < 300:
+        record_success(controller, service_name, operation_name)
+        refund_retry_budget(controller, context.get('retry_cost', NO_RETRY_REFUND))
+        return None
+
+    throttled = code in THROTTLE_ERROR_CODES
+    if throttled:
+        record_throttle(controller, service_name, operation_name)
+
+    timeout = isinstance(caught_exception, (BotocoreConnectionError, HTTPClientError))
+    retryable = (throttled or timeout
+                 or code in TRANSIENT_ERROR_CODES
+                 or status_code in TRANSIENT_STATUS_CODES)
+    if not retryable or attempts >= controller["max_attempts"]:
+        return None
+
+    cost = TIMEOUT_RETRY_COST if timeout else RETRY_COST
+    if not spend_retry_budget(controller, cost):
+        return None
+    context['retry_cost'] = context.get('retry_cost', 0) + cost
+    return _backoff_delay(attempts)
@@ -1,5 +1,5 @@
 import json
-import boto3
+from scripts.common.clients import get_client
 
 def show_menu_policy_creation():
     print("=== IAM Policy Creation Menu ===")
@@ -9,7 +9,6 @@ def show_menu_policy_creation():
     choice = input("Please select an option (1-3): ")
     return choice
 
-iam_client = boto3.client('iam')
 
 def get_policy_scope():
     menu_scope_policy = """Define the scope of the policy:
@@ -63,6 +62,7 @@ def _create_policy_logic(policy_name, description, policy_document):
             }
         ]
     }
+    iam_client = get_client('iam')
     try:
         response = iam_client.create_policy(
             PolicyName=policy_name,
@@ -1,7 +1,6 @@
 import json
-import boto3
+from scripts.common.clients import get_client
 
-iam_client = boto3.client('iam')
 
 def create_policy():
     print("Creating a new IAM policy...")
@@ -67,6 +66,7 @@ def create_policy():
         ]
     }
     
+    iam_client = get_client('iam')
     try:
         response = iam_client.create_policy(
             PolicyName=policy_name,
@@ -1,8 +1,7 @@
 import json
-import boto3
+from scripts.common.clients import get_client
 
 
-iam_client = boto3.client('iam')
 def show_menu_roles():
     print('''\n
 ========== IAM Role Menu ============
@@ -35,6 +34,7 @@ def create_iam_role():
         ]
     }
 
+    iam_client = get_client('iam')
     try:
         response = iam_client.create_role(
             RoleName=RoleName,
@@ -49,7 +49,7 @@ def create_iam_role():
 
 def filter_iam_roles(role_name_filter):
     searchRoles = []
-    paginator = iam_client.get_paginator('list_roles')
+    paginator = get_client('iam').get_paginator('list_roles')
 
     try:
         for page in paginator.paginate():
@@ -106,6 +106,7 @@ def attach_policy_to_role():
     policy_name = input("Enter the policy name to attach: ")
     policy_arn = "arn:aws:iam::aws:policy/{}".format(policy_name)
 
+    iam_client = get_client('iam')
     try:
         iam_client.attach_role_policy(
             RoleName=role_name,
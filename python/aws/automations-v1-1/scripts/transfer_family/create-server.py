@@ -1,9 +1,12 @@
 import json
-import boto3
+import os
+import sys
 
-transfer_client = boto3.client('transfer')
-iam_client = boto3.client('iam')
-s3_client = boto3.client('s3')
+# The hyphen keeps this script from being imported, so it only runs as
+# ´python scripts/transfer_family/create-server.py´: put the project root on the path for ´scripts.common´.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from scripts.common.clients import get_account_id, get_client
 
 
 def show_welcome():
@@ -27,17 +30,17 @@ def show_welcome():
 # CREATE FUNCTION LOGIC 
 def _create_bucket_logic(bucket_name, tag_customer):
     try:
-        region = s3_client.meta.region_name
+        region = get_client('s3').meta.region_name
         if region == 'us-east-1':
-            s3_client.create_bucket(Bucket=bucket_name)
+            get_client('s3').create_bucket(Bucket=bucket_name)
         else:
-            s3_client.create_bucket(
+            get_client('s3').create_bucket(
                 Bucket=bucket_name,
                 CreateBucketConfiguration={'LocationConstraint': region}
             )
         bucket_arn='arn:aws:s3:::{}'.format(bucket_name)
 
-        s3_client.put_bucket_tagging(
+        get_client('s3').put_bucket_tagging(
             Bucket=bucket_name,
             Tagging={
                 'TagSet': [
@@ -55,7 +58,7 @@ def _create_bucket_logic(bucket_name, tag_customer):
 
 def _create_object_bucket_logic(bucket_name, bucket_object, tag_customer):
     try:
-        s3_client.put_object(
+        get_client('s3').put_object(
             Bucket=bucket_name,
             Key=(bucket_object + "/"), Tagging=f"customer={tag_customer}"
         )
@@ -64,7 +67,7 @@ def _create_object_bucket_logic(bucket_name, bucket_object, tag_customer):
 
 def _create_policy_logic(policy_name, policy_document, tag_customer):
     try:
-        response = iam_client.create_policy(
+        response = get_client('iam').create_policy(
             PolicyName=policy_name,
             PolicyDocument=json.dumps(policy_document),
             Tags=[
@@ -82,7 +85,7 @@ def _create_policy_logic(policy_name, policy_document, tag_customer):
 
 def _create_role_logic(role_name, policy_arn, tag_customer, trust_policy):
     try:
-        iam_client.create_role(
+        get_client('iam').create_role(
             RoleName=role_name,
             AssumeRolePolicyDocument=json.dumps(trust_policy),
             Tags=[
@@ -92,9 +95,9 @@ def _create_role_logic(role_name, policy_arn, tag_customer, trust_policy):
                 }
             ]
         )
-        role_arn = iam_client.get_role(RoleName=role_name)['Role']['Arn']
+        role_arn = get_client('iam').get_role(RoleName=role_name)['Role']['Arn']
 
-        iam_client.attach_role_policy(
+        get_client('iam').attach_role_policy(
             RoleName=role_name,
             PolicyArn=policy_arn
         )
@@ -106,7 +109,7 @@ def _create_role_logic(role_name, policy_arn, tag_customer, trust_policy):
 
 def _create_server_logic(endpoint_type, tag_customer,role_arn_logging):
     try:
-        response = transfer_client.create_server(
+        response = get_client('transfer').create_server(
             IdentityProviderType='SERVICE_MANAGED',
             EndpointType=endpoint_type,
             Protocols=['SFTP'],
@@ -125,7 +128,7 @@ def _create_server_logic(endpoint_type, tag_customer,role_arn_logging):
 
 def _create_user_logic(server_id, user_name, role_arn, home_directory, ssh_key, tag_customer):
     try:
-        transfer_client.create_user(
+        get_client('transfer').create_user(
             ServerId=server_id,
             UserName=user_name,
             Role=role_arn,
@@ -214,7 +217,7 @@ def create_policy(policy_name, tag_customer, bucket_name, bucket_object):
     }
 
     _create_policy_logic(policy_name, policy_document, tag_customer)
-    return f"arn:aws:iam::{boto3.client('sts').get_caller_identity().get('Account')}:policy/{policy_name}"
+    return f"arn:aws:iam::{get_account_id()}:policy/{policy_name}"
 
 # CREATE ROLE
 def create_role(role_name, policy_arn, tag_customer):
@@ -258,7 +261,7 @@ def scope_endpoint():
 def create_server(tag_customer):
     endpoint_type = scope_endpoint()
     role_logging = input("Enter name Role for Logging: ").strip()
-    account_id = boto3.client('sts').get_caller_identity().get('Account')
+    account_id = get_account_id()
     role_arn_logging = f"arn:aws:iam::{account_id}:role/{role_logging}"
 
     _create_server_logic(endpoint_type, tag_customer, role_arn_logging)
@@ -317,28 +320,28 @@ def create_users(role_arn, policy_arn):
 # VALIDATIONS FUNCTIONS
 def bucket_exists(bucket_name):
     try:
-        s3_client.head_bucket(Bucket=bucket_name)
+        get_client('s3').head_bucket(Bucket=bucket_name)
         return True
     except Exception as e:
         return False
 
 def policy_exists(policy_name):
     try:
-        iam_client.get_policy(PolicyName=policy_name)
+        get_client('iam').get_policy(PolicyName=policy_name)
         return True
     except Exception as e:
         return False
 
 def role_exists(role_name):
     try:
-        iam_client.get_role(RoleName=role_name)
+        get_client('iam').get_role(RoleName=role_name)
         return True
     except Exception as e:
         return False
 
 def server_exists(tag_customer):
     try:
-        response = transfer_client.list_servers(
+        response = get_client('transfer').list_servers(
             Filters=[
                 {
                     'Key': 'tag:customer',
@@ -351,11 +354,11 @@ def server_exists(tag_customer):
         return False
 
 def get_policy_arn(policy_name):
-    response = iam_client.get_policy(PolicyName=policy_name)
+    response = get_client('iam').get_policy(PolicyName=policy_name)
     return response['Policy']['Arn']
 
 def get_role_arn(role_name):
-    response = iam_client.get_role(RoleName=role_name)
+    response = get_client('iam').get_role(RoleName=role_name)
     return response['Role']['Arn']
 
 
@@ -1,6 +1,6 @@
 import csv
 import json
-import boto3
+from scripts.common.clients import get_client
 
 # FUNCTIONS VIEWS MENUS
 def show_menu_transfer():
@@ -52,7 +52,6 @@ def show_scope_update_user():
     choice = input("Enter your choice: ")
     return choice
 
-transfer_client = boto3.client('transfer')
 
 # FUNCTIONS LOGICS
 ## users logics
@@ -64,7 +63,7 @@ def _create_user_logic(
     ssh_key,
     tag_user_customer):
     try:
-        response = transfer_client.create_user(
+        response = get_client('transfer').create_user(
             ServerId=server_id,
             UserName=user,
             Role=role_arn,
@@ -98,7 +97,7 @@ def _update_user_logic(
     role_arn,
     directory_mapping):
     try:
-        response = transfer_client.update_user(
+        response = get_client('transfer').update_user(
             ServerId=server_id,
             UserName=user,
             Role=role_arn,
@@ -120,7 +119,7 @@ def _delete_user_logic(
     server_id, 
     user):
     try:
-        response = transfer_client.delete_user(
+        response = get_client('transfer').delete_user(
             ServerId=server_id,
             UserName=user
         )
@@ -136,7 +135,7 @@ def _update_user_logic_directory_mapping(
     user,
     directory_mapping):
     try:
-        response = transfer_client.update_user(
+        response = get_client('transfer').update_user(
             ServerId=server_id,
             UserName=user,
             HomeDirectoryMappings=[{
@@ -156,7 +155,7 @@ def _update_user_logic_role(
     user,
     role_arn):
     try:
-        response = transfer_client.update_user(
+        response = get_client('transfer').update_user(
             ServerId=server_id,
             UserName=user,
             Role=role_arn
@@ -173,7 +172,7 @@ def _update_user_logic_ssh_key(
     user,
     ssh_key):
     try:
-        response = transfer_client.update_user(
+        response = get_client('transfer').update_user(
             ServerId=server_id,
             UserName=user,
             SshPublicKeyBody=ssh_key
@@ -191,7 +190,7 @@ def _update_ssh_public_key_logic(
     user,
     ssh_key):
     try:
-        response = transfer_client.import_ssh_public_key(
+        response = get_client('transfer').import_ssh_public_key(
             ServerId=server_id,
             UserName=user,
             PublicKey=ssh_key
@@ -209,7 +208,7 @@ def _delete_ssh_public_key_logic(
     user,
     ssh_key):
     try:
-        response = transfer_client.delete_ssh_public_key(
+        response = get_client('transfer').delete_ssh_public_key(
             ServerId=server_id,
             UserName=user,
             KeyName=ssh_key
@@ -236,7 +235,7 @@ def get_transfer_role(user_name):
 
 def get_transfer_user(user_name):
     try:
-        transfer_client.describe_user(
+        get_client('transfer').describe_user(
             UserName=user_name
         )
         user_found = True
@@ -503,12 +502,12 @@ def export_users():
         return
     
     try:
-        users = transfer_client.list_users(ServerId=server_id)['Users']
+        users = get_client('transfer').list_users(ServerId=server_id)['Users']
         export_data  = []
         for user in users:
             username = user['UserName']
             
-            user_desc = transfer_client.describe_user(
+            user_desc = get_client('transfer').describe_user(
                 ServerId=server_id,
                 UserName=username
             )['User']
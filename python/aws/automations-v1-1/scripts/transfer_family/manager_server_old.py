@@ -1,6 +1,6 @@
-import boto3
 import csv
 import json
+from scripts.common.clients import get_client
 
 
 def show_menu_transfer():
@@ -15,7 +15,6 @@ def show_menu_transfer():
     choice = input("Enter your choice: ")
     return choice
 
-transfer_client = boto3.client('transfer')
 
 policy_document = """
 {
@@ -66,7 +65,7 @@ policy_document = """
 # Functions Logics
 def _create_user_logic(server_id, user_name, role_arn, directory_mapping,ssh_key,tag_customer):
     try:
-        transfer_client.create_user(
+        get_client('transfer').create_user(
             ServerId=server_id,
             UserName=user_name,
             Role=role_arn,
@@ -95,7 +94,7 @@ def _create_user_logic(server_id, user_name, role_arn, directory_mapping,ssh_key
 
 def _update_user_logic(server_id, user_name, role_arn, home_directory):
     try:
-        transfer_client.update_user(
+        get_client('transfer').update_user(
             ServerId=server_id,
             UserName=user_name,
             Role=role_arn,
@@ -113,7 +112,7 @@ def _update_user_logic(server_id, user_name, role_arn, home_directory):
 
 def _delete_user_logic(server_id, user_name):
     try:
-        transfer_client.delete_user(
+        get_client('transfer').delete_user(
             ServerId=server_id,
             UserName=user_name
         )
@@ -144,7 +143,7 @@ def create_server():
         return
     
     try:
-        response = transfer_client.create_server(
+        response = get_client('transfer').create_server(
             EndpointType=endpoint_type,
             Protocol=protocol_type
         )
@@ -277,7 +276,7 @@ def delete_ssh_public_key():
         return
     
     try:
-        transfer_client.delete_ssh_public_key(
+        get_client('transfer').delete_ssh_public_key(
             ServerId=server_id,
             UserName=user_name,
             KeyName=ssh_key_name
@@ -312,7 +311,7 @@ def update_ssh_public_key():
         return
     
     try:
-        transfer_client.import_ssh_public_key(
+        get_client('transfer').import_ssh_public_key(
             ServerId=server_id,
             UserName=user_name,
             PublicKey=ssh_key
@@ -336,22 +335,22 @@ def export_users():
         return
     
     try:
-        users = transfer_client.list_users(ServerId=server_id)['Users']
+        users = get_client('transfer').list_users(ServerId=server_id)['Users']
         export_data  = []
         for user in users:
             username = user['UserName']
             
-            user_desc = transfer_client.describe_user(
+            user_desc = get_client('transfer').describe_user(
                 ServerId=server_id,
                 UserName=username
             )['User']
             ssh_keys = []
-            ssh_list = transfer_client.list_ssh_public_keys(
+            ssh_list = get_client('transfer').list_ssh_public_keys(
                 ServerId=server_id,
                 UserName=username
             )['SshPublicKeys']
             for ssh_key in ssh_list:
-                ssh_detail = transfer_client.describe_ssh_public_key(
+                ssh_detail = get_client('transfer').describe_ssh_public_key(
                     ServerId=server_id,
                     UserName=username,
                     KeyName=ssh_key['KeyName']
@@ -0,0 +1,71 @@
+import unittest
+from scripts.bucket_s3.duplicate_finder import find_duplicates, iter_partition_groups
+
+MB = 1024 ** 2
+
+OBJECTS = [
+    ("bucket-a", "reports/2024.pdf", 5 * MB, "aaa"),
+    ("bucket-b", "backup/2024.pdf", 5 * MB, "aaa"),
+    ("bucket-b", "backup/copy-of-2024.pdf", 5 * MB, "aaa"),
+    ("bucket-a", "same-size-other-content.bin", 5 * MB, "bbb"),
+    ("bucket-a", "video.mp4", 100 * MB, "ccc"),
+    ("bucket-c", "video.mp4", 100 * MB, "ddd-7"),
+    ("bucket-a", "folder/", 0, "empty"),
+    ("bucket-c", "folder/", 0, "empty"),
+    ("bucket-a", "unique.txt", 12, "eee")
+]
+
+
+def _groups(objects, **join_options):
+    duplicates, candidates = [], []
+    for partition_duplicates, partition_candidates in iter_partition_groups(iter(objects), **join_options):
+        duplicates.extend(partition_duplicates)
+        candidates.extend(partition_candidates)
+    key = lambda group: (group["size"], str(group.get("etag", group.get("etags"))))
+    return sorted(duplicates, key=key), sorted(candidates, key=key)
+
+
+class PartitionJoinTest(unittest.TestCase):
+    """Spilling to disk partitions must give the same groups as the in-memory join."""
+
+    def test_in_memory_groups(self):
+        duplicates, candidates = _groups(OBJECTS, candidate_min_size=64 * MB)
+        self.assertEqual(duplicates, [{
+            "size": 5 * MB,
+            "etag": "aaa",
+            "objects": [("bucket-a", "reports/2024.pdf"), ("bucket-b", "backup/2024.pdf"),
+                        ("bucket-b", "backup/copy-of-2024.pdf")]
+        }])
+        self.assertEqual(candidates, [{
+            "size": 100 * MB,
+            "etags": ["ccc", "ddd-7"],
+            "objects": [("bucket-a", "video.mp4"), ("bucket-c", "video.mp4")]
+        }])
+
+    def test_spilled_groups_match_in_memory(self):
+        expected = _groups(OBJECTS, candidate_min_size=64 * MB)
+        for memory_entries, partitions in [(1, 1), (2, 3), (3, 64)]:
+            with self.subTest(memory_entries=memory_entries, partitions=partitions):
+                self.assertEqual(_groups(OBJECTS, memory_entries=memory_entries, partitions=partitions,
+                                         candidate_min_size=64 * MB), expected)
+
+    def test_listed_twice_is_not_a_duplicate(self):
+        duplicates, _ = _groups([OBJECTS[0], OBJECTS[0]], memory_entries=1, partitions=2)
+        self.assertEqual(duplicates, [])
+
+
+class FindDuplicatesTest(unittest.TestCase):
+
+    def test_summary(self):
+        summary = find_duplicates(iter(OBJECTS), memory_entries=2, partitions=4, candidate_min_size=64 * MB)
+        self.assertTrue(summary["spilled"])
+        self.assertEqual(summary["objects"], 7)
+        self.assertEqual(summary["groups"], 1)
+        self.assertEqual(summary["reclaimable_bytes"], 2 * 5 * MB)
+        self.assertEqual(summary["pairs"], {"bucket-a <-> bucket-b": 5 * MB})
+        self.assertEqual(summary["candidate_groups"], 1)
+        self.assertEqual(summary["candidate_bytes"], 100 * MB)
+
+
+if __name__ == "__main__":
+    unittest.main()
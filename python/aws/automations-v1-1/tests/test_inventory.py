@@ -0,0 +1,130 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from urllib.parse import unquote_plus
+from scripts.bucket_s3.inventory import _split_csv_block, decode_keys, inventory_stats_from_local
+from scripts.bucket_s3.object_stats import object_stats_report, stream_object_stats
+
+SCHEMA = "Bucket, Key, VersionId, IsLatest, IsDeleteMarker, Size, LastModifiedDate, StorageClass"
+
+# (key as written by S3 Inventory, version, is_latest, is_delete_marker, size, last_modified, storage_class)
+INVENTORY_ROWS = [
+    ("docs%2Freport+2024.pdf", "v1", "true", "false", "2048", "2024-03-01T10:00:00.000Z", "STANDARD"),
+    ("docs%2Freport+2024.pdf", "v0", "false", "false", "1024", "2024-02-01T10:00:00.000Z", "STANDARD"),
+    ("photos%2Fa%20b%2B%C3%A9.jpg", "v3", "true", "false", "5000000", "2024-01-15T08:30:00.000Z", "GLACIER"),
+    ("photos%2Fdeleted.jpg", "v4", "true", "true", "", "2024-04-01T00:00:00.000Z", ""),
+    ("empty", "v5", "true", "false", "0", "2023-12-31T23:59:59.000Z", "STANDARD_IA")
+]
+
+
+class _Paginator:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def paginate(self, **kwargs):
+        yield {"Contents": self.objects}
+
+
+class _ListingClient:
+    """Answers ´list_objects_v2´ with the current objects of the inventory, like S3 would."""
+
+    def __init__(self, rows):
+        self.objects = [
+            {
+                "Key": unquote_plus(key),
+                "Size": int(size or 0),
+                "LastModified": datetime.fromisoformat(modified.replace("Z", "+00:00")),
+                "StorageClass": storage_class or "STANDARD"
+            }
+            for key, _, latest, marker, size, modified, storage_class in rows
+            if latest == "true" and marker == "false"
+        ]
+
+    def get_paginator(self, name):
+        return _Paginator(self.objects)
+
+
+class InventoryStatsFromLocalTest(unittest.TestCase):
+    """The inventory mode must give the same statistics as a live listing of the bucket."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        data = os.path.join(self.directory.name, "data")
+        os.makedirs(data)
+        with gzip.open(os.path.join(data, "part-0.csv.gz"), 'wt', encoding='utf-8') as f:
+            for row in INVENTORY_ROWS:
+                f.write(",".join('"{}"'.format(value) for value in ("bucket",) + row) + "\n")
+        self.manifest_path = os.path.join(self.directory.name, "manifest.json")
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "sourceBucket": "bucket",
+                "fileFormat": "CSV",
+                "fileSchema": SCHEMA,
+                "files": [{"key": "bucket/config/data/part-0.csv.gz"}]
+            }, f)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_counts_current_objects_only(self):
+        stats = inventory_stats_from_local(self.manifest_path)
+        self.assertEqual(stats["count"], 3)
+        self.assertEqual(stats["total_bytes"], 2048 + 5000000)
+
+    def test_decodes_keys(self):
+        stats = inventory_stats_from_local(self.manifest_path)
+        self.assertEqual(stats["sample_keys"], ["docs/report 2024.pdf", "photos/a b+é.jpg", "empty"])
+
+    def test_matches_live_listing(self):
+        inventory = inventory_stats_from_local(self.manifest_path)
+        listing = stream_object_stats(_ListingClient(INVENTORY_ROWS), "bucket")
+        self.assertEqual(inventory["count"], listing["count"])
+        self.assertEqual(inventory["sample_keys"], listing["sample_keys"])
+        self.assertEqual(object_stats_report(inventory), object_stats_report(listing))
+        self.assertEqual(listing["oldest_last_modified"], datetime(2023, 12, 31, 23, 59, 59, tzinfo=timezone.utc))
+
+
+class DecodeKeysTest(unittest.TestCase):
+    """´decode_keys´ decodes a whole batch at once and must match ´unquote_plus´ key by key."""
+
+    def assertDecodesLikeUnquotePlus(self, keys):
+        self.assertEqual(decode_keys(keys), [unquote_plus(key) for key in keys])
+
+    def test_plain_keys_are_returned_as_is(self):
+        self.assertEqual(decode_keys(("a/b.txt", "c")), ["a/b.txt", "c"])
+
+    def test_escapes_and_plus(self):
+        self.assertDecodesLikeUnquotePlus(["a%2Fb", "c+d", "%E2%9C%93+ok", "caf%C3%A9", "100%25"])
+
+    def test_malformed_escapes(self):
+        self.assertDecodesLikeUnquotePlus(["bad%zz", "trailing%", "half%4", "%C3"])
+
+    def test_backslashes_and_non_ascii(self):
+        self.assertDecodesLikeUnquotePlus(["back\\slash%41", "é+%41"])
+
+    def test_encoded_newline_keeps_one_key_per_row(self):
+        self.assertDecodesLikeUnquotePlus(["line%0Abreak", "next", ""])
+
+
+class SplitCsvBlockTest(unittest.TestCase):
+    """´_split_csv_block´ must only accept the all-quoted shape S3 writes."""
+
+    def test_splits_columns(self):
+        block = '"b","k1","10"\n"b","k2",""\n'
+        self.assertEqual(_split_csv_block(block, 3), [["b", "b"], ["k1", "k2"], ["10", ""]])
+
+    def test_rejects_quoted_newline(self):
+        self.assertIsNone(_split_csv_block('"b","a\nb","10"\n', 3))
+
+    def test_rejects_escaped_quote(self):
+        self.assertIsNone(_split_csv_block('"b","a""b","10"\n', 3))
+
+    def test_rejects_short_row(self):
+        self.assertIsNone(_split_csv_block('"b","k1","10"\n"b","k2"\n', 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from scripts.bucket_s3.listing_snapshot import (
+    close_snapshot,
+    diff_snapshots,
+    iter_snapshot,
+    open_snapshot,
+    prefix_children,
+    prefix_summary,
+    write_snapshot
+)
+
+
+def _rows(keys):
+    return [(key, index + 1, 1700000000 + index, "STANDARD") for index, key in enumerate(sorted(keys))]
+
+
+# Several blocks of front-coded keys (block size 4) and non-ASCII keys, which sort in UTF-8 byte order.
+KEYS = (
+    ["clientes/acme/{:03d}.csv".format(number) for number in range(10)]
+    + ["clientes/acme2/x.csv", "clientes/beta/a.txt", "clientes/beta/b.txt", "clientes/ção/a.txt"]
+    + ["logs/2024/01.log", "logs/2024/02.log", "readme.md", "\U0001F600.txt"]
+)
+
+
+class SnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def snapshot(self, name, rows):
+        path = os.path.join(self.directory.name, name)
+        write_snapshot(path, rows, {"bucket": "bucket"}, block_size=4)
+        snapshot = open_snapshot(path)
+        self.addCleanup(close_snapshot, snapshot)
+        return snapshot
+
+
+class PrefixSummaryTest(SnapshotTestCase):
+    """´prefix_summary´ (binary searches) must match a scan of every key."""
+
+    def setUp(self):
+        super().setUp()
+        self.rows = _rows(KEYS)
+        self.snap = self.snapshot("snap", self.rows)
+
+    def assertMatchesScan(self, prefix):
+        matching = [row for row in self.rows if row[0].startswith(prefix)]
+        self.assertEqual(
+            prefix_summary(self.snap, prefix),
+            {"prefix": prefix, "objects": len(matching), "bytes": sum(row[1] for row in matching)}
+        )
+
+    def test_prefixes(self):
+        for prefix in ["", "clientes/", "clientes/acme", "clientes/acme/", "clientes/acme/00", "clientes/ção/",
+                       "logs/2024/", "readme.md", "\U0001F600", "zzz", "a"]:
+            with self.subTest(prefix=prefix):
+                self.assertMatchesScan(prefix)
+
+    def test_children(self):
+        self.assertEqual(
+            [(child["prefix"], child["objects"]) for child in prefix_children(self.snap, "clientes/")],
+            [("clientes/acme/", 10), ("clientes/acme2/", 1), ("clientes/beta/", 2), ("clientes/ção/", 1)]
+        )
+
+    def test_iter_round_trip(self):
+        self.assertEqual(list(iter_snapshot(self.snap)), self.rows)
+
+
+class DiffSnapshotsTest(SnapshotTestCase):
+    """´diff_snapshots´ must report every added, removed and changed key, and nothing else."""
+
+    def test_added_removed_and_changed(self):
+        old_rows = _rows(["a", "b", "c", "d"])
+        new_rows = [old_rows[0], (old_rows[2][0], 99) + old_rows[2][2:], ("c2", 5, 1700000000, "GLACIER"), old_rows[3],
+                    ("e", 1, 1700000000, "STANDARD")]
+        diff = list(diff_snapshots(self.snapshot("old", old_rows), self.snapshot("new", new_rows)))
+        self.assertEqual(diff, [
+            ("b", old_rows[1], None),
+            ("c", old_rows[2], new_rows[1]),
+            ("c2", None, new_rows[2]),
+            ("e", None, new_rows[4])
+        ])
+
+    def test_prefix_and_identical(self):
+        rows = _rows(KEYS)
+        old, new = self.snapshot("old", rows), self.snapshot("new", rows)
+        self.assertEqual(list(diff_snapshots(old, new)), [])
+        changed = [row if not row[0].startswith("logs/") else (row[0], row[1] + 1) + row[2:] for row in rows]
+        diff = list(diff_snapshots(old, self.snapshot("changed", changed), "logs/"))
+        self.assertEqual([key for key, _, _ in diff], ["logs/2024/01.log", "logs/2024/02.log"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import os
+import unittest
+from benchmarks.startup_benchmark import HEAVY_MODULES, measure_startup
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StartupTest(unittest.TestCase):
+    """The menu must start without boto3/botocore and without reading AWS credentials."""
+
+    def setUp(self):
+        self.measurement = measure_startup(PROJECT_DIR)
+
+    def test_main_imports_without_errors(self):
+        self.assertNotIn("error", self.measurement)
+
+    def test_main_does_not_load_heavy_modules(self):
+        for name in HEAVY_MODULES:
+            self.assertNotIn(name, self.measurement.get("loaded_modules", HEAVY_MODULES))
+
+    def test_main_does_not_open_credential_files(self):
+        self.assertEqual(self.measurement.get("credential_files_opened"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import os
 import requests
 import boto3
+from boto3.s3.transfer import TransferConfig
 from requests.auth import HTTPDigestAuth
 from datetime import datetime, timezone
 
@@ -19,6 +20,13 @@ cluster_name = os.environ.get('cluster_name')
 s3_client = boto3.client('s3')
 bucket_name = 'NOME_BUCKET_S3'
 
+# Snapshots têm vários GB: partes de 64 MB e 16 threads em vez do padrão (8 MB / 10 threads)
+transfer_config = TransferConfig(
+    multipart_threshold=64 * 1024 ** 2,
+    multipart_chunksize=64 * 1024 ** 2,
+    max_concurrency=16
+)
+
 
 # Função para obter o snapshot
 def get_daily_snapshot():
@@ -110,7 +118,7 @@ def download_and_upload_snapshot(download_link, destino_diretorio):
 # Função para fazer o upload do arquivo para o S3
 def upload_to_s3(arquivo_local):
     try:
-        s3_client.upload_file(arquivo_local, bucket_name, os.path.basename(arquivo_local))
+        s3_client.upload_file(arquivo_local, bucket_name, os.path.basename(arquivo_local), Config=transfer_config)
         print(f"Arquivo {arquivo_local} enviado para o S3 com sucesso!")
     except Exception as e:
         print(f"Erro ao enviar o arquivo para o S3: {e}")
@@ -1,5 +1,6 @@
 import requests
 import boto3
+from boto3.s3.transfer import TransferConfig
 import time
 from requests.auth import HTTPDigestAuth
 import logging
@@ -23,6 +24,13 @@ os.environ['s3_folder_path']='NOME_DIRETORIO_S3'
 s3_bucket_name = os.environ.get('s3_bucket_name')
 s3_folder_path = os.environ.get('s3_folder_path')
 
+# Snapshots têm vários GB: partes de 64 MB e 16 threads em vez do padrão (8 MB / 10 threads)
+transfer_config = TransferConfig(
+    multipart_threshold=64 * 1024 ** 2,
+    multipart_chunksize=64 * 1024 ** 2,
+    max_concurrency=16
+)
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -64,7 +72,7 @@ def upload_to_s3(file_name):
     try:
         s3_client = boto3.client('s3')
         s3_path = f'{s3_folder_path}/{file_name}'
-        s3_client.upload_file(file_name, s3_bucket_name, s3_path)
+        s3_client.upload_file(file_name, s3_bucket_name, s3_path, Config=transfer_config)
         logging.info(f'Backup enviado para o S3: s3://{s3_bucket_name}/{s3_path}')
     except Exception as e:
         logging.error(f"Erro ao enviar o arquivo para o S3: {e}")